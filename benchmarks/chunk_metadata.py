@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark mapping chunks back to their source page: the old substring
+scan over every extracted line vs the offset index of ExtractedText.
+
+The document is synthetic: --pages pages of --lines lines, each page
+starting with the same running header, as exported CVs and reports do.
+Every body line carries a "[p<page>]" tag, so the true first page of a
+chunk is the page of the first tag (or the header) it contains.
+
+Usage: python -m benchmarks.chunk_metadata [--pages 300] [--lines 40]
+"""
+
+import argparse
+import re
+import time
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.application.ingest import ExtractedText, split_blocks
+
+HEADER = "Ilyas Abdurahman - Software Engineer - Curriculum Vitae"
+TAG = re.compile(r"\[p(\d+)\]")
+
+
+def make_document(pages: int, lines: int) -> ExtractedText:
+    extracted = ExtractedText("bench.pdf")
+    for page in range(1, pages + 1):
+        extracted.append(HEADER, {"page": page})
+        for line in range(lines):
+            extracted.append(
+                f"[p{page}] Line {line}: built and operated services in "
+                f"Python and Go, item {page * lines + line}",
+                {"page": page},
+            )
+    return extracted
+
+
+def legacy_split(extracted: ExtractedText) -> tuple[list[str], list[dict]]:
+    """The mapping upload_doc used before: first line found inside the chunk"""
+    text_blocks = list(zip(extracted.lines, extracted.meta))
+    combined_text = "\n".join(chunk for chunk, _ in text_blocks)
+    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
+
+    seen = set()
+    indexed_chunks = []
+    metadata = []
+    for chunk in splitter.split_text(combined_text):
+        chunk = chunk.strip()
+        if chunk and chunk not in seen:
+            seen.add(chunk)
+            for original_chunk, meta in text_blocks:
+                if original_chunk in chunk:
+                    metadata.append({**meta, "text": chunk})
+                    break
+            else:
+                metadata.append({"text": chunk})
+            indexed_chunks.append(chunk)
+    return indexed_chunks, metadata
+
+
+def true_page(chunk: str) -> int:
+    # A header opening a chunk is followed by lines of its own page
+    return int(TAG.search(chunk).group(1))
+
+
+def report(name: str, split, extracted: ExtractedText):
+    started = time.perf_counter()
+    chunks, metadata = split(extracted)
+    elapsed = time.perf_counter() - started
+    correct = sum(
+        meta.get("page") == true_page(chunk)
+        for chunk, meta in zip(chunks, metadata)
+    )
+    print(
+        f"{name:8s} {elapsed * 1000:9.1f} ms  {len(chunks)} chunks  "
+        f"page correct {correct / len(chunks):.3f}"
+    )
+
+
+def main(pages: int, lines: int):
+    extracted = make_document(pages, lines)
+    print(
+        f"{pages} pages, {len(extracted.lines)} lines, {len(extracted.text)} chars"
+    )
+    report("legacy", legacy_split, extracted)
+    report("offsets", split_blocks, extracted)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument("--lines", type=int, default=40)
+    args = parser.parse_args()
+    main(args.pages, args.lines)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Benchmark the embedding backends (torch, ONNX Runtime, int8-quantized
+ONNX): model load time, single-query latency, batch throughput, peak
+RSS, and cosine similarity of each backend's vectors to torch's.
+
+Each backend runs in its own subprocess so RSS and import cost are not
+shared. ONNX variants need the onnx extra (pip install '.[onnx]').
+
+Usage: python -m benchmarks.embedding_backends [--queries 200] [--batch 64] [--threads 0]
+       [--onnx-model DIR_OR_REPO]
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+VARIANTS = {
+    "torch": ("torch", None),
+    "onnx": ("onnx", "onnx/model.onnx"),
+    "onnx-int8": ("onnx", "onnx/model_qint8_avx2.onnx"),
+}
+
+TEXTS = [
+    "what is your current job",
+    "tech stack",
+    "what did you do at Stickearn",
+    "tell me about ProcurA",
+    "which databases have you used",
+    "how do you deploy your projects",
+    "experience with FastAPI",
+    "where did you work in 2023",
+    "Built a retrieval-augmented chat assistant on FastAPI with sqlite-vec "
+    "for vector search and streamed answers from an OpenAI-compatible API.",
+    "Led the migration of the ad-serving pipeline from cron jobs to a "
+    "queue-based worker fleet, cutting report latency from hours to minutes.",
+]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024
+
+
+def worker(
+    variant: str,
+    queries: int,
+    batch: int,
+    threads: int,
+    onnx_model: str,
+    out: str,
+):
+    from src.application.rag import EMBEDDING_MODEL_NAME
+    from src.modules.embedding_backends import create_embedding_backend
+
+    backend, onnx_file = VARIANTS[variant]
+    started = time.perf_counter()
+    model = create_embedding_backend(
+        backend,
+        EMBEDDING_MODEL_NAME,
+        onnx_model=onnx_model or None,
+        onnx_file=onnx_file or "onnx/model.onnx",
+        threads=threads or None,
+    )
+    load_ms = (time.perf_counter() - started) * 1000
+    if model.name != backend:
+        raise SystemExit(f"{variant}: {backend} backend unavailable")
+
+    model.encode(["warmup"])
+    latencies = []
+    for i in range(queries):
+        started = time.perf_counter()
+        model.encode([f"{TEXTS[i % len(TEXTS)]} #{i}"])
+        latencies.append((time.perf_counter() - started) * 1000)
+    latencies.sort()
+
+    texts = [TEXTS[i % len(TEXTS)] for i in range(batch)]
+    started = time.perf_counter()
+    rounds = 5
+    for _ in range(rounds):
+        model.encode(texts)
+    throughput = rounds * batch / (time.perf_counter() - started)
+
+    vectors = np.asarray(model.encode(TEXTS), dtype="float32")
+    np.save(out, vectors / np.linalg.norm(vectors, axis=1, keepdims=True))
+    print(
+        json.dumps(
+            {
+                "load_ms": load_ms,
+                "p50_ms": statistics.median(latencies),
+                "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+                "throughput": throughput,
+                "rss_mb": peak_rss_mb(),
+            }
+        )
+    )
+
+
+def main(queries: int, batch: int, threads: int, onnx_model: str):
+    print(f"{queries} single queries, batches of {batch}")
+    print(
+        f"{'backend':10s} {'load ms':>8s} {'p50 ms':>7s} {'p95 ms':>7s} "
+        f"{'texts/s':>8s} {'RSS MB':>7s} {'cos vs torch':>12s}"
+    )
+    reference = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for variant in VARIANTS:
+            out = os.path.join(tmp, f"{variant}.npy")
+            result = subprocess.run(
+                [
+                    sys.executable,
+                    "-m",
+                    "benchmarks.embedding_backends",
+                    "--worker",
+                    variant,
+                    "--out",
+                    out,
+                    "--queries",
+                    str(queries),
+                    "--batch",
+                    str(batch),
+                    "--threads",
+                    str(threads),
+                    "--onnx-model",
+                    onnx_model,
+                ],
+                capture_output=True,
+                text=True,
+            )
+            if result.returncode != 0:
+                error = (result.stderr or result.stdout).strip().splitlines()
+                print(
+                    f"{variant:10s} skipped: {error[-1] if error else 'failed'}"
+                )
+                continue
+
+            row = json.loads(result.stdout.strip().splitlines()[-1])
+            vectors = np.load(out)
+            if reference is None and variant == "torch":
+                reference = vectors
+            cosine = (
+                f"{float(np.min(np.sum(vectors * reference, axis=1))):12.4f}"
+                if reference is not None
+                else f"{'-':>12s}"
+            )
+            print(
+                f"{variant:10s} {row['load_ms']:8.0f} {row['p50_ms']:7.2f} "
+                f"{row['p95_ms']:7.2f} {row['throughput']:8.1f} "
+                f"{row['rss_mb']:7.0f} {cosine}"
+            )
+    print("cos vs torch is the minimum over the sample texts")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument(
+        "--threads",
+        type=int,
+        default=0,
+        help="onnxruntime intra-op threads (0 = onnxruntime default)",
+    )
+    parser.add_argument(
+        "--onnx-model",
+        default="",
+        help="Hub repo id or local directory of the ONNX export "
+        "(default: sentence-transformers/all-MiniLM-L6-v2)",
+    )
+    parser.add_argument("--worker", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        worker(
+            args.worker,
+            args.queries,
+            args.batch,
+            args.threads,
+            args.onnx_model,
+            args.out,
+        )
+    else:
+        main(args.queries, args.batch, args.threads, args.onnx_model)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Benchmark query embedding throughput: one encode per request vs the
+micro-batching EmbeddingBatcher, under N concurrent requests.
+
+Usage: python -m benchmarks.embedding_batcher [--requests 512] [--concurrency 32]
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.application.rag import get_embedding_model
+from src.modules.bounded_executor import BoundedExecutor
+from src.modules.embedding_batcher import EmbeddingBatcher
+
+QUERIES = [
+    "what is your current job",
+    "tech stack",
+    "what did you do at Stickearn",
+    "tell me about ProcurA",
+    "which databases have you used",
+    "how do you deploy your projects",
+    "experience with FastAPI",
+    "where did you work in 2023",
+]
+
+
+def encode(texts: list[str]):
+    return get_embedding_model().encode(texts)
+
+
+async def run(embed, requests: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            await embed(f"{QUERIES[i % len(QUERIES)]} #{i}")
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started
+
+
+async def main(requests: int, concurrency: int, workers: int):
+    executor = BoundedExecutor(max_workers=workers, name="bench")
+    encode(["warmup"])
+
+    async def per_request(text: str):
+        return (await executor.run(encode, [text]))[0]
+
+    elapsed = await run(per_request, requests, concurrency)
+    print(
+        f"per-request: {requests / elapsed:8.1f} req/s "
+        f"({elapsed * 1000 / requests:.2f} ms/req)"
+    )
+
+    batcher = EmbeddingBatcher(encode, executor)
+    elapsed = await run(batcher.embed, requests, concurrency)
+    await batcher.stop()
+    print(
+        f"batched:     {requests / elapsed:8.1f} req/s "
+        f"({elapsed * 1000 / requests:.2f} ms/req)"
+    )
+    stats = batcher.stats()
+    print(f"avg batch size: {stats['batch_size']['avg']}")
+    print(f"avg queue wait: {stats['wait_ms']['avg']} ms")
+
+    executor.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=512)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency, args.workers))
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark recall and latency of vector-only vs hybrid (KNN + BM25, RRF)
+retrieval on the configured index (SQLITE_DB_PATH).
+
+Queries are generated from the index itself: for each rare term
+(company names, technologies, anything in at most --max-df chunks) the
+query "What did Ilyas do with <term>?" should retrieve the chunks that
+contain it. Embedding time is excluded; both searches get the same
+query vector.
+
+Usage: python -m benchmarks.hybrid_retrieval [--k 5] [--queries 100] [--max-df 2]
+"""
+
+import argparse
+import re
+import statistics
+import time
+from collections import defaultdict
+
+from src.application.rag import (
+    embed_query,
+    get_sqlite_vec_pool,
+    search_by_vector,
+    search_hybrid,
+)
+
+
+def build_queries(max_df: int, limit: int) -> list[tuple[str, set[str]]]:
+    with get_sqlite_vec_pool().reader() as client:
+        rows = client.execute("SELECT text FROM chunks").fetchall()
+
+    chunks_by_term = defaultdict(set)
+    for (text,) in rows:
+        for term in set(
+            re.findall(r"\b[A-Z][A-Za-z0-9+#.]{2,}\b", text or "")
+        ):
+            chunks_by_term[term.rstrip(".")].add(text)
+
+    queries = [
+        (f"What did Ilyas do with {term}?", texts)
+        for term, texts in sorted(chunks_by_term.items())
+        if len(texts) <= max_df
+    ]
+    return queries[:limit]
+
+
+def run(search, queries, k: int) -> tuple[float, list[float]]:
+    hits, latencies = 0.0, []
+    for query, relevant, vector in queries:
+        started = time.perf_counter()
+        results = search(query, vector, k)
+        latencies.append((time.perf_counter() - started) * 1000)
+        found = {r["text"] for r in results}
+        hits += len(found & relevant) / min(len(relevant), k)
+    return hits / len(queries), latencies
+
+
+def report(name: str, recall: float, latencies: list[float]):
+    latencies = sorted(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(
+        f"{name:8s} recall@k {recall:.3f}  "
+        f"mean {statistics.mean(latencies):.2f} ms  p95 {p95:.2f} ms"
+    )
+
+
+def main(k: int, limit: int, max_df: int):
+    queries = [
+        (query, relevant, embed_query(query))
+        for query, relevant in build_queries(max_df, limit)
+    ]
+    if not queries:
+        print("No rare terms found; index some documents first")
+        return
+    print(f"{len(queries)} queries, k={k}")
+
+    recall, latencies = run(lambda q, v, k: search_by_vector(v, k), queries, k)
+    report("vector", recall, latencies)
+
+    recall, latencies = run(search_hybrid, queries, k)
+    report("hybrid", recall, latencies)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--max-df", type=int, default=2)
+    args = parser.parse_args()
+    main(args.k, args.queries, args.max_df)
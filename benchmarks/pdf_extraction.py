@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark PDF text extraction: the old serial loop over fitz pages of an
+in-memory document vs PDFExtractor with 1..N worker processes reading
+a memory map of the file.
+
+The document is synthetic (--pages pages of dense text); pass --pdf to
+use a real one instead. Times include pool start-up on the first run
+only, which is reported separately.
+
+Usage: python -m benchmarks.pdf_extraction [--pages 300] [--processes 1 2 4] [--shard 16] [--pdf FILE]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import fitz  # PyMuPDF
+
+from src.modules.pdf_extractor import PDFExtractor
+
+
+def make_pdf(path: str, pages: int):
+    doc = fitz.open()
+    for p in range(pages):
+        page = doc.new_page()
+        y = 40
+        for line in range(50):
+            page.insert_text(
+                (40, y),
+                f"Page {p + 1} line {line}: designed and shipped services in "
+                f"Python, Go and SQL for project {p * 50 + line}",
+                fontsize=8,
+            )
+            y += 15
+    doc.save(path)
+
+
+def serial(path: str) -> int:
+    with open(path, "rb") as f:
+        doc = fitz.open(stream=f.read(), filetype="pdf")
+    return sum(len(page.get_text("text")) for page in doc)
+
+
+def main(pages: int, processes: list[int], shard: int, pdf: str | None):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pdf or os.path.join(tmp, "bench.pdf")
+        if pdf is None:
+            make_pdf(path, pages)
+        print(
+            f"{path}: {fitz.open(path).page_count} pages, {os.cpu_count()} CPUs"
+        )
+
+        started = time.perf_counter()
+        chars = serial(path)
+        baseline = time.perf_counter() - started
+        print(f"{'serial':12s} {baseline * 1000:8.0f} ms  {chars} chars")
+
+        for n in processes:
+            extractor = PDFExtractor(
+                processes=n, pages_per_shard=shard, min_parallel_pages=0
+            )
+            started = time.perf_counter()
+            sum(len(text) for _, text in extractor.iter_pages(path))
+            first = time.perf_counter() - started
+
+            started = time.perf_counter()
+            chars = sum(len(text) for _, text in extractor.iter_pages(path))
+            elapsed = time.perf_counter() - started
+            extractor.shutdown()
+            print(
+                f"{f'{n} process' + ('es' if n > 1 else ''):12s} "
+                f"{elapsed * 1000:8.0f} ms  {chars} chars  "
+                f"x{baseline / elapsed:.2f}  (first run {first * 1000:.0f} ms)"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pages", type=int, default=300)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        nargs="*",
+        default=sorted({1, 2, os.cpu_count() or 1}),
+    )
+    parser.add_argument("--shard", type=int, default=16)
+    parser.add_argument("--pdf")
+    args = parser.parse_args()
+    main(args.pages, args.processes, args.shard, args.pdf)
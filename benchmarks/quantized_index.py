@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Benchmark float vs int8 vs bit storage for the documents index: file
+size, KNN latency and recall@k against exact cosine search, with and
+without float re-scoring of the top candidates.
+
+Vectors are synthetic (clustered unit vectors, like sentence
+embeddings of a corpus about a few topics); queries are noisy copies
+of corpus vectors.
+
+Usage: python -m benchmarks.quantized_index [--vectors 20000] [--queries 200] [--k 10]
+"""
+
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+import numpy as np
+from sqlite_vec import load
+
+from src.application.rag import (
+    DEFAULT_VECTOR_DIM,
+    VECTOR_COLUMNS,
+    VECTOR_SQL,
+    _rescore,
+)
+
+
+def make_vectors(n: int, clusters: int, seed: int) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, DEFAULT_VECTOR_DIM))
+    vectors = centers[rng.integers(clusters, size=n)] + rng.normal(
+        scale=0.8, size=(n, DEFAULT_VECTOR_DIM)
+    )
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors.astype("float32")
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.enable_load_extension(True)
+    load(conn)
+    conn.enable_load_extension(False)
+    return conn
+
+
+def build(path: str, storage: str, vectors: np.ndarray, keep_floats: bool):
+    conn = connect(path)
+    conn.execute(f"""
+        CREATE VIRTUAL TABLE documents USING vec0(
+            embedding {VECTOR_COLUMNS[storage]},
+            text TEXT,
+            source TEXT,
+            page INTEGER
+        )
+    """)
+    conn.executemany(
+        f"""
+        INSERT INTO documents (rowid, embedding, text, source, page)
+        VALUES (?, {VECTOR_SQL[storage]}, '', 'bench', 0)
+        """,
+        ((i, v.tobytes()) for i, v in enumerate(vectors)),
+    )
+    if keep_floats:
+        conn.execute(
+            "CREATE TABLE chunk_vectors (id INTEGER PRIMARY KEY, embedding BLOB NOT NULL)"
+        )
+        conn.executemany(
+            "INSERT INTO chunk_vectors (id, embedding) VALUES (?, ?)",
+            ((i, v.tobytes()) for i, v in enumerate(vectors)),
+        )
+    conn.commit()
+    conn.execute("VACUUM")
+    return conn
+
+
+def search(conn, storage: str, query: np.ndarray, k: int, multiplier: int):
+    depth = k * multiplier if multiplier > 1 else k
+    rows = conn.execute(
+        f"""
+        SELECT rowid, text, source, page, distance
+        FROM documents
+        WHERE embedding MATCH {VECTOR_SQL[storage]}
+        ORDER BY distance
+        LIMIT ?
+        """,
+        (query.tobytes(), depth),
+    ).fetchall()
+    if multiplier > 1:
+        rows = _rescore(conn, query, rows)[:k]
+    return {row[0] for row in rows}
+
+
+def main(n: int, n_queries: int, k: int, multipliers: list[int]):
+    vectors = make_vectors(n, clusters=50, seed=0)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(n, size=n_queries)] + rng.normal(
+        scale=0.02, size=(n_queries, DEFAULT_VECTOR_DIM)
+    ).astype("float32")
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    truth = [set(np.argsort(-(vectors @ q))[:k].tolist()) for q in queries]
+
+    print(f"{n} vectors, {n_queries} queries, recall@{k}")
+    print(
+        f"{'storage':8s} {'rescore':>7s} {'MB':>7s} {'recall':>7s} {'mean ms':>8s} {'p95 ms':>7s}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for storage in VECTOR_COLUMNS:
+            variants = [1] if storage == "float" else [1, *multipliers]
+            for multiplier in variants:
+                path = os.path.join(tmp, f"{storage}-{multiplier}.db")
+                conn = build(
+                    path, storage, vectors, keep_floats=multiplier > 1
+                )
+                size_mb = os.path.getsize(path) / 1024 / 1024
+
+                latencies, recall = [], 0.0
+                for query, expected in zip(queries, truth):
+                    started = time.perf_counter()
+                    found = search(conn, storage, query, k, multiplier)
+                    latencies.append((time.perf_counter() - started) * 1000)
+                    recall += len(found & expected) / k
+                conn.close()
+
+                latencies.sort()
+                print(
+                    f"{storage:8s} {('x' + str(multiplier)) if multiplier > 1 else '-':>7s} "
+                    f"{size_mb:7.1f} {recall / n_queries:7.3f} "
+                    f"{statistics.mean(latencies):8.2f} "
+                    f"{latencies[int(len(latencies) * 0.95) - 1]:7.2f}"
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument(
+        "--rescore",
+        type=int,
+        nargs="*",
+        default=[4, 10],
+        help="re-scoring multipliers to try for quantized storage",
+    )
+    args = parser.parse_args()
+    main(args.vectors, args.queries, args.k, args.rescore)
@@ -1,24 +1,38 @@
 #!/usr/bin/env python3
 """
-Script to clear sqlite-vec database and reindex data from experience.txt
+Script to reindex data from experience.txt into sqlite-vec.
+
+By default only new or changed sections are embedded and stale ones are
+removed. Pass --full to clear the database and rebuild it from scratch.
 """
 
+import argparse
 import sys
 
 sys.path.insert(0, "/home/ubuntu/repository/personal-portfolio-ai")
 
 import sqlite3
 from pathlib import Path
-from src.application.rag import get_sqlite_vec_client, index_chunks, config
+from src.application.rag import (
+    close_sqlite_vec_pool,
+    config,
+    index_chunks,
+    prepare_index,
+    reindex_source,
+)
 
 DATA_FILE = "/home/ubuntu/repository/experience.txt"
 
 
 def clear_sqlite_db():
     """Clear all data from sqlite-vec database"""
+    close_sqlite_vec_pool()
     db_path = Path(config.sqlite_db_path)
     if db_path.exists():
         db_path.unlink()
+        # WAL mode leaves these next to the database file
+        for suffix in ("-wal", "-shm"):
+            Path(f"{db_path}{suffix}").unlink(missing_ok=True)
         print(f"Cleared database: {db_path}")
     else:
         print(f"Database does not exist yet: {db_path}")
@@ -47,22 +61,45 @@ def create_chunks_from_file(file_path: str, separator: str = "---"):
     return chunks, metadata
 
 
-def main():
+def main(full: bool = False):
     print("Starting reindexing process...")
 
-    print("\nStep 1: Clearing existing sqlite-vec data...")
-    clear_sqlite_db()
+    if full:
+        print("\nStep 1: Clearing existing sqlite-vec data...")
+        clear_sqlite_db()
+    else:
+        print("\nStep 1: Incremental mode, keeping existing sqlite-vec data")
+        prepare_index()
 
     print("\nStep 2: Creating chunks from experience.txt...")
     chunks, metadata = create_chunks_from_file(DATA_FILE)
     print(f"Created {len(chunks)} chunks")
 
     print("\nStep 3: Indexing chunks in sqlite-vec...")
-    index_chunks(chunks, metadata)
-    print(f"Successfully indexed {len(chunks)} chunks")
+
+    def progress(done, total):
+        print(f"  processed {done}/{total}")
+
+    if full:
+        added = index_chunks(chunks, metadata, progress=progress)
+        print(f"Successfully indexed {added} chunks")
+    else:
+        result = reindex_source(
+            "experience.txt", chunks, metadata, progress=progress
+        )
+        print(
+            f"Added {result['added']}, removed {result['removed']}, "
+            f"kept {result['unchanged']} unchanged chunks"
+        )
 
     print("\nReindexing complete!")
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="delete the database and re-embed everything",
+    )
+    main(full=parser.parse_args().full)
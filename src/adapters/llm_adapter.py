@@ -2,10 +2,22 @@ from typing import Dict, List, Optional
 
 from loguru import logger
 
+from src.common import LLMConstants
 from src.common.prompts import Prompts
 from src.configs.configs import Config, config
+from src.modules.context_builder import ContextBuilder, parse_context_budgets
 from src.modules.simple_memory import SimpleMemory
 
+context_builder = ContextBuilder(
+    default_budget=int(config.context_token_budget),
+    budgets=parse_context_budgets(
+        getattr(config, "context_model_budgets", None),
+        LLMConstants.CONTEXT_BUDGETS,
+    ),
+    history_share=float(config.context_history_share),
+    max_history_messages=int(config.context_max_history_messages),
+)
+
 
 class LLMAdapter:
     def __init__(self, api_key: str, api_url: str, system_prompt: str = None, memory: Optional[SimpleMemory] = None):
@@ -23,7 +35,7 @@ class LLMAdapter:
             raise ValueError("LLM API key not configured")
 
         logger.info(
-            f"Initialized simple memory with the last 7 messages: {self.memory.get_last7_messages()}"
+            f"Initialized LLM adapter for session {self.memory.session_id}"
         )
 
     def _get_headers(self) -> Dict[str, str]:
@@ -33,10 +45,26 @@ class LLMAdapter:
             "Content-Type": "application/json",
         }
 
-    def _build_messages(self) -> List[Dict[str, str]]:
-        """Build the messages list with system prompt and user messages."""
-        messages = [{"role": "system", "content": self.system_prompt}]
-        messages.extend(self.memory.get_last7_messages())
+    def _build_messages(
+        self,
+        question: str,
+        chunks: Optional[List[dict]] = None,
+        current_context: str = "",
+        model: Optional[str] = None,
+    ) -> List[Dict[str, str]]:
+        """Build the messages list within the model's prompt token budget."""
+        history = self.memory.get_recent_messages(
+            context_builder.max_history_messages
+        )
+        messages = context_builder.build(
+            self.system_prompt,
+            history,
+            question,
+            chunks or [],
+            current_context,
+            model,
+            summary=self.memory.get_summary(),
+        )
         logger.info(f"Final message list to send: {messages}")
 
         return messages
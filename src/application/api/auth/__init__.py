@@ -4,21 +4,28 @@ from typing import Optional
 
 from fastapi import APIRouter, Header, HTTPException, Request,Depends
 from fastapi.responses import JSONResponse
-from httpx import AsyncClient, HTTPStatusError
+from httpx import HTTPStatusError
 from loguru import logger
 
 from src.common.constants import LLMConstants
 from src.common.exceptions import LLMError
 from src.configs.configs import config
+from src.modules.auth_cache import CredentialCache
+from src.modules.http_clients import get_http_client
 from src.modules.llm_modules import LLMModules
 from src.schemas.auth import APIAuth
 from src.modules.simple_memory import SimpleMemory
 from fastapi.responses import StreamingResponse
-from src.configs.middleware import SESSION_MEMORY
+from src.configs.middleware import SESSION_MEMORY, get_session
 import uuid
 
 router = APIRouter()
 llm = LLMModules()
+credential_cache = CredentialCache(
+    ttl=float(config.auth_cache_ttl_seconds),
+    failure_ttl=float(config.auth_cache_failure_ttl_seconds),
+    max_entries=int(config.auth_cache_max_entries),
+)
 # Global session memory map
 
 
@@ -37,11 +44,21 @@ async def get_api_auth(
     if not api_key or not api_url:
         raise HTTPException(status_code=400, detail="Missing API credentials")
 
-    response = await test_api_connection(api_key, api_url, use_model)
-    if response.status_code == 200:
-        return APIAuth(api_key=api_key, api_url=api_url, use_model=use_model)
+    # Only the first request for a credential tuple pays the upstream
+    # round-trip; the rest are answered from the cache until it expires
+    await credential_cache.validate(
+        api_key, api_url, use_model, test_api_connection
+    )
+    return APIAuth(api_key=api_key, api_url=api_url, use_model=use_model)
+
 
-    raise HTTPException(status_code=401, detail="Invalid API credentials")
+async def get_authenticated_session(
+    request: Request,
+    api_auth: APIAuth = Depends(get_api_auth),
+) -> dict:
+    """The caller's session, created only after its credentials validate,
+    so rejected requests never write to the session backend."""
+    return await asyncio.to_thread(get_session, request)
 
 
 async def parse_stream_response(response) -> str:
@@ -95,82 +112,82 @@ async def test_api_connection(
         }
 
         logger.info(f"Testing API connection: {payload}")
-        async with AsyncClient() as client:
-            # Handle both API URLs with and without trailing /v1
-            api_url_clean = api_url.rstrip('/')
-            if not api_url_clean.endswith('/v1'):
-                api_url_clean = f"{api_url_clean}/v1"
-
-            response = await client.post(
-                f"{api_url_clean}/chat/completions",
-                headers={"Authorization": f"Bearer {api_key}"},
-                json=payload,
-                timeout=30.0,
-            )
-
-            logger.debug(f"Response status: {response.status_code}")
-            logger.debug(f"Response headers: {dict(response.headers)}")
-            # logger.debug(f"Response body: {response.text}")
-
-            # Handle non-200 responses
-            if response.status_code != 200:
-                error_message = response.text
-                try:
-                    error_data = response.json()
-                    error_message = error_data.get("error", {}).get(
-                        "message", response.text
-                    )
-                except json.JSONDecodeError:
-                    pass
-
-                logger.error(f"API returned error: {error_message}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"API error: {error_message}",
-                )
+        # Handle both API URLs with and without trailing /v1
+        api_url_clean = api_url.rstrip('/')
+        if not api_url_clean.endswith('/v1'):
+            api_url_clean = f"{api_url_clean}/v1"
+
+        client = get_http_client(api_url_clean)
+        response = await client.post(
+            f"{api_url_clean}/chat/completions",
+            headers={"Authorization": f"Bearer {api_key}"},
+            json=payload,
+            timeout=30.0,
+        )
 
-            # Handle streaming responses
-            content_type = response.headers.get("content-type", "")
-            logger.info(f"Content-Type: {content_type}")
-            if "text/event-stream" in content_type:
-                result = await parse_stream_response(response)
-                return JSONResponse(
-                    content={"message": result}, status_code=200
-                )
+        logger.debug(f"Response status: {response.status_code}")
+        logger.debug(f"Response headers: {dict(response.headers)}")
+        # logger.debug(f"Response body: {response.text}")
 
-            # Handle JSON responses
+        # Handle non-200 responses
+        if response.status_code != 200:
+            error_message = response.text
             try:
-                data = response.json()
-            except json.JSONDecodeError:
-                raise HTTPException(
-                    status_code=500, detail="Invalid JSON response from API"
+                error_data = response.json()
+                error_message = error_data.get("error", {}).get(
+                    "message", response.text
                 )
+            except json.JSONDecodeError:
+                pass
 
-            # Check for API-level errors
-            if "error" in data:
-                error = data["error"]
-                raise LLMError(
-                    message=error.get("message", "Unknown error"),
-                    code=error.get("code"),
-                    metadata=error.get("metadata", {}),
-                )
+            logger.error(f"API returned error: {error_message}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"API error: {error_message}",
+            )
 
-            # Validate response structure
-            if "choices" not in data or not data["choices"]:
-                logger.error(f"Invalid response structure: {data}")
-                raise HTTPException(
-                    status_code=500,
-                    detail="Invalid response structure from API",
-                )
+        # Handle streaming responses
+        content_type = response.headers.get("content-type", "")
+        logger.info(f"Content-Type: {content_type}")
+        if "text/event-stream" in content_type:
+            result = await parse_stream_response(response)
+            return JSONResponse(
+                content={"message": result}, status_code=200
+            )
 
-            result = data["choices"][0]["message"]["content"]
-            logger.info("API connection test successful")
+        # Handle JSON responses
+        try:
+            data = response.json()
+        except json.JSONDecodeError:
+            raise HTTPException(
+                status_code=500, detail="Invalid JSON response from API"
+            )
 
-            return JSONResponse(
-                content={"message": result},
-                status_code=200,
+        # Check for API-level errors
+        if "error" in data:
+            error = data["error"]
+            raise LLMError(
+                message=error.get("message", "Unknown error"),
+                code=error.get("code"),
+                metadata=error.get("metadata", {}),
             )
 
+        # Validate response structure
+        if "choices" not in data or not data["choices"]:
+            logger.error(f"Invalid response structure: {data}")
+            raise HTTPException(
+                status_code=500,
+                detail="Invalid response structure from API",
+            )
+
+        result = data["choices"][0]["message"]["content"]
+        logger.info("API connection test successful")
+
+        return JSONResponse(
+            content={"message": result},
+            status_code=200,
+        )
+
     except asyncio.TimeoutError:
         logger.error("Request timed out")
         raise HTTPException(status_code=504, detail="Request timed out")
@@ -205,8 +222,10 @@ async def post_test_api_connection(
 @router.get("/get-session")
 async def get_session_endpoint(request: Request):
     session_id = request.state.session_id
-    memory = SESSION_MEMORY[session_id]
+    memory = await asyncio.to_thread(SESSION_MEMORY.get, session_id)
     return JSONResponse(content={
         "session_id": session_id,
-        "messages": memory.get_messages()
+        "messages": (
+            await asyncio.to_thread(memory.get_messages) if memory else []
+        )
     })
\ No newline at end of file
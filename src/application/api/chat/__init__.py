@@ -1,11 +1,13 @@
+import asyncio
+
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import StreamingResponse
 
-from src.application.api.auth import get_api_auth
+from src.application.api.auth import get_api_auth, get_authenticated_session
 from src.modules.llm_modules import LLMModules
 from src.schemas.auth import APIAuth
 from src.schemas.chat import ChatRequest, ChatResponse
-from src.configs.middleware import get_or_create_session_memory, get_session
+from src.configs.middleware import get_or_create_session_memory
 
 router = APIRouter()
 llm = LLMModules()
@@ -17,11 +19,12 @@ llm = LLMModules()
 async def chat(
     request: ChatRequest,
     raw_request: Request,
-    session: dict = Depends(get_session),
+    session: dict = Depends(get_authenticated_session),
+    # Resolved once: the session dependency already validated it
     api_auth: APIAuth = Depends(get_api_auth),
 ):
     session_id = session["session_id"]
-    memory = get_or_create_session_memory(session_id)
+    memory = await asyncio.to_thread(get_or_create_session_memory, session_id)
 
     response = await llm.chat_completion(
         message=request.message,
@@ -30,9 +33,15 @@ async def chat(
         api_url=api_auth.api_url,
         use_model=api_auth.use_model,
         memory=memory,
+        sources=request.sources,
     )
 
     if request.stream:
-        return StreamingResponse(response, media_type="text/event-stream")
+        return StreamingResponse(
+            response,
+            media_type="text/event-stream",
+            # Keep proxies (nginx) from buffering the deltas
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
     else:
         return ChatResponse(response=response.content)
@@ -1,73 +1,149 @@
 # src/routes/upload.py
 
-import fitz  # PyMuPDF
-from uuid import uuid4
-from fastapi import APIRouter, File, UploadFile
+import asyncio
+import os
+from typing import AsyncIterator
 
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from src.application.rag import index_chunks
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import JSONResponse
+from starlette.datastructures import UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+
+from src.application.ingest import (
+    SNIFF_BYTES,
+    ingestion_stages,
+    save_upload,
+    sniff_content_type,
+)
+from src.configs.configs import config
+from src.modules.ingestion_jobs import IngestionJobs, IngestionQueueFull
+from src.modules.pdf_extractor import page_count
 
 router = APIRouter()
 
-def is_valid_chunk(chunk: str) -> bool:
-    stripped = chunk.strip()
-    return (
-        len(stripped) > 30 and
-        not stripped.lower().startswith("job description") and
-        not stripped.startswith("| ---") and
-        not stripped.startswith("---")
-    )
+ingestion_jobs = IngestionJobs(
+    config.ingest_job_db_path,
+    workers=int(config.ingest_workers),
+    max_pending=int(config.ingest_max_pending),
+    max_jobs=int(config.ingest_job_retention),
+)
 
-@router.post("/")
-async def upload_doc(file: UploadFile = File(...)):
-    if file.content_type not in {"application/pdf", "text/plain"}:
-        return {"error": "Only PDF and TXT files allowed"}
-
-    contents = await file.read()
-    text_blocks = []
-
-    # Extract text depending on file type
-    if file.content_type == "application/pdf":
-        doc = fitz.open(stream=contents, filetype="pdf")
-        for i, page in enumerate(doc):
-            text = page.get_text("text")
-            for line in text.split("\n"):
-                if is_valid_chunk(line):
-                    text_blocks.append((line.strip(), {"source": file.filename, "page": i + 1}))
-    elif file.content_type == "text/plain":
-        text = contents.decode("utf-8")
-        for i, line in enumerate(text.splitlines()):
-            if is_valid_chunk(line):
-                text_blocks.append((line.strip(), {"source": file.filename, "line": i + 1}))
-
-    # Combine and chunk using RecursiveCharacterTextSplitter
-    combined_text = "\n".join(chunk for chunk, _ in text_blocks)
-    splitter = RecursiveCharacterTextSplitter(chunk_size=500, chunk_overlap=50)
-    chunks = splitter.split_text(combined_text)
-
-    # Map back to source metadata
-    seen = set()
-    indexed_chunks = []
-    metadata = []
-
-    for chunk in chunks:
-        chunk = chunk.strip()
-        if chunk and chunk not in seen:
-            seen.add(chunk)
-            # Optionally find matching original metadata block
-            for original_chunk, meta in text_blocks:
-                if original_chunk in chunk:
-                    metadata.append({**meta, "text": chunk})
-                    break
-            else:
-                metadata.append({"source": file.filename, "text": chunk})
-            indexed_chunks.append(chunk)
-
-    index_chunks(indexed_chunks, metadata)
-
-    return {
-        "status": "indexed",
-        "file": file.filename,
-        "chunks": len(indexed_chunks),
-        "sample": metadata[:3],
+# The body is parsed by hand, so document it for the OpenAPI schema
+UPLOAD_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "required": ["file"],
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            }
+        },
     }
+}
+
+
+class UploadTooLarge(MultiPartException):
+    pass
+
+
+async def _limited(
+    stream: AsyncIterator[bytes], max_bytes: int
+) -> AsyncIterator[bytes]:
+    """The request body, failing as soon as it exceeds ``max_bytes``"""
+    received = 0
+    async for chunk in stream:
+        received += len(chunk)
+        if received > max_bytes:
+            raise UploadTooLarge(f"Upload exceeds {max_bytes} bytes")
+        yield chunk
+
+
+def _error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": message})
+
+
+@router.post("/", openapi_extra=UPLOAD_REQUEST_BODY)
+async def upload_doc(request: Request):
+    max_bytes = int(config.upload_max_bytes)
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > max_bytes:
+        return _error(413, f"Upload exceeds {max_bytes} bytes")
+    if not request.headers.get("content-type", "").startswith("multipart/form-data"):
+        return _error(400, "Expected a multipart/form-data upload")
+
+    # The file is written to a spooled temp file as it arrives (on disk
+    # past 1 MB), so an upload never sits in memory whole
+    parser = MultiPartParser(
+        request.headers,
+        _limited(request.stream(), max_bytes),
+        max_files=1,
+        max_fields=10,
+    )
+    try:
+        form = await parser.parse()
+    except UploadTooLarge as e:
+        return _error(413, str(e))
+    except MultiPartException as e:
+        return _error(400, e.message)
+
+    file = form.get("file")
+    if not isinstance(file, UploadFile):
+        await form.close()
+        return _error(422, "Missing file field")
+
+    # The type comes from the file's magic bytes, not the client's header
+    try:
+        content_type = sniff_content_type(await file.read(SNIFF_BYTES))
+        if content_type is None:
+            return _error(415, "Only PDF and TXT files allowed")
+        await file.seek(0)
+        # Extraction workers open (and map) the file by path
+        path = await asyncio.to_thread(save_upload, file.file, content_type)
+    finally:
+        await form.close()
+
+    if content_type == "application/pdf":
+        max_pages = int(config.upload_max_pages)
+        try:
+            pages = await asyncio.to_thread(page_count, path)
+        except Exception:
+            os.unlink(path)
+            return _error(422, "Not a readable PDF")
+        if pages > max_pages:
+            os.unlink(path)
+            return _error(413, f"PDF has {pages} pages; the limit is {max_pages}")
+
+    # Extraction, splitting, embedding and indexing run in the background;
+    # poll GET /upload/jobs/{job_id} for progress and the result. The job
+    # deletes the file once extracted, or unlinks it if dropped at shutdown
+    try:
+        job = ingestion_jobs.submit(
+            file.filename,
+            ingestion_stages(file.filename, content_type),
+            path,
+            discard=os.unlink,
+        )
+    except IngestionQueueFull as e:
+        os.unlink(path)
+        return _error(503, f"Upload queue is full: {e}")
+
+    return JSONResponse(
+        status_code=202,
+        content={
+            "status": "queued",
+            "job_id": job.id,
+            "file": file.filename,
+            "status_url": str(request.url_for("get_upload_job", job_id=job.id)),
+        },
+    )
+
+
+@router.get("/jobs/{job_id}")
+async def get_upload_job(job_id: str):
+    job = await asyncio.to_thread(ingestion_jobs.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown upload job")
+    return job
@@ -0,0 +1,206 @@
+# src/application/ingest/__init__.py
+
+import codecs
+import os
+import shutil
+import tempfile
+from bisect import bisect_right
+from typing import BinaryIO, Callable
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from src.application.rag import embed_new_chunks, reindex_source
+from src.configs.configs import config
+from src.modules.ingestion_jobs import Stage
+from src.modules.pdf_extractor import PDFExtractor
+
+INGEST_STAGES = ("extract", "split", "embed", "write")
+
+# Uploads are typed by their first bytes, not the client's Content-Type
+PDF_MAGIC = b"%PDF-"
+SNIFF_BYTES = 1024
+COPY_BUFFER = 1024 * 1024
+
+pdf_extractor = PDFExtractor(
+    processes=int(config.pdf_extract_processes),
+    pages_per_shard=int(config.pdf_pages_per_shard),
+    min_parallel_pages=int(config.pdf_parallel_min_pages),
+)
+
+
+def is_valid_chunk(chunk: str) -> bool:
+    stripped = chunk.strip()
+    return (
+        len(stripped) > 30
+        and not stripped.lower().startswith("job description")
+        and not stripped.startswith("| ---")
+        and not stripped.startswith("---")
+    )
+
+
+class ExtractedText:
+    """Valid lines of a document joined by newlines, with an offset index.
+
+    ``starts[i]`` is where line ``i`` begins in ``text`` and ``meta[i]``
+    its source position ({"page": n} or {"line": n}), so the lines a
+    chunk covers are found by bisecting its character span.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self.lines: list[str] = []
+        self.starts: list[int] = []
+        self.meta: list[dict] = []
+        self._length = 0
+
+    def append(self, line: str, meta: dict):
+        if self.lines:
+            self._length += 1  # the joining newline
+        self.starts.append(self._length)
+        self.lines.append(line)
+        self.meta.append(meta)
+        self._length += len(line)
+
+    @property
+    def text(self) -> str:
+        return "\n".join(self.lines)
+
+    def span(self, start: int, end: int) -> dict:
+        """Source position of the first and last line overlapping
+        ``text[start:end]``, e.g. {"page": 3, "page_end": 4}"""
+        first = self.meta[bisect_right(self.starts, start) - 1]
+        last = self.meta[bisect_right(self.starts, end - 1) - 1]
+        span = {"source": self.source}
+        for key, value in first.items():
+            span[key] = value
+            span[f"{key}_end"] = last[key]
+        return span
+
+
+def sniff_content_type(head: bytes) -> str | None:
+    """application/pdf, text/plain (UTF-8 without NUL bytes) or None
+    for anything else, from the first SNIFF_BYTES of a file"""
+    if PDF_MAGIC in head[:SNIFF_BYTES]:
+        return "application/pdf"
+    if b"\x00" in head:
+        return None
+    try:
+        # Not final: the sample may end inside a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return None
+    return "text/plain"
+
+
+def save_upload(file: BinaryIO, content_type: str) -> str:
+    """Copy an uploaded file to a named temp file, COPY_BUFFER bytes at a
+    time, for extraction to read (or map) from disk; returns its path"""
+    suffix = ".pdf" if content_type == "application/pdf" else ".txt"
+    with tempfile.NamedTemporaryFile(
+        prefix="upload-", suffix=suffix, delete=False
+    ) as out:
+        try:
+            shutil.copyfileobj(file, out, COPY_BUFFER)
+        except BaseException:
+            os.unlink(out.name)
+            raise
+    return out.name
+
+
+def extract_blocks(
+    path: str,
+    filename: str,
+    content_type: str,
+    progress: Callable[[int, int | None], None] | None = None,
+) -> ExtractedText:
+    """Valid lines of the document at ``path`` with their page (PDF) or
+    line (TXT); the file is read from disk, never loaded whole"""
+    extracted = ExtractedText(filename)
+
+    if content_type == "application/pdf":
+        for page, text in pdf_extractor.iter_pages(path, progress):
+            for line in text.split("\n"):
+                if is_valid_chunk(line):
+                    extracted.append(line.strip(), {"page": page})
+    elif content_type == "text/plain":
+        with open(path, encoding="utf-8") as f:
+            for i, line in enumerate(f):
+                if is_valid_chunk(line):
+                    extracted.append(line.strip(), {"line": i + 1})
+
+    return extracted
+
+
+def split_blocks(extracted: ExtractedText) -> tuple[list[str], list[dict]]:
+    """Chunk the extracted lines; each chunk carries the page or line
+    span it was cut from, looked up by its offset in the joined text"""
+    if not extracted.lines:
+        return [], []
+
+    splitter = RecursiveCharacterTextSplitter(
+        chunk_size=500, chunk_overlap=50, add_start_index=True
+    )
+    documents = splitter.create_documents([extracted.text])
+
+    seen = set()
+    indexed_chunks = []
+    metadata = []
+
+    for document in documents:
+        chunk = document.page_content
+        if chunk and chunk not in seen:
+            seen.add(chunk)
+            start = max(document.metadata["start_index"], 0)
+            metadata.append(
+                {**extracted.span(start, start + len(chunk)), "text": chunk}
+            )
+            indexed_chunks.append(chunk)
+
+    return indexed_chunks, metadata
+
+
+def ingestion_stages(filename: str, content_type: str) -> list[Stage]:
+    """extract -> split -> embed -> write for one uploaded file.
+
+    The pipeline's input is the path of the saved upload, which the
+    extract stage deletes when done. The embed stage indexes new chunks
+    batch by batch, each in a short write transaction, and the write
+    stage removes the chunks of a previous version of the file, so a
+    re-upload keeps unchanged chunks and embeds only new ones.
+    """
+
+    def extract(path, progress):
+        try:
+            return extract_blocks(path, filename, content_type, progress)
+        finally:
+            os.unlink(path)
+
+    def split(extracted, progress):
+        return split_blocks(extracted)
+
+    def embed(split_result, progress):
+        chunks, metadata = split_result
+        written = embed_new_chunks(
+            filename, chunks, metadata, progress=progress
+        )
+        return chunks, metadata, written
+
+    def write(embedded, progress):
+        chunks, metadata, written = embedded
+        result = reindex_source(
+            filename, chunks, metadata, progress=progress, written=written
+        )
+        return {
+            "status": "indexed",
+            "file": filename,
+            "chunks": len(chunks),
+            "added": result["added"],
+            "removed": result["removed"],
+            "unchanged": result["unchanged"],
+            "moved": result["moved"],
+            "skipped": result["skipped"],
+            "merged": result["merged"],
+            "sample": metadata[:3],
+        }
+
+    return list(zip(INGEST_STAGES, (extract, split, embed, write)))
@@ -1,110 +1,1592 @@
 # src/application/rag/__init__.py
 
+import asyncio
+import hashlib
+import json
+import re
 import sqlite3
-from pathlib import Path
-from uuid import uuid4
+import threading
+import time
+from collections.abc import Sized
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Sequence
 
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from sqlite_vec import load
 
+from src.common import RAGConstants
 from src.configs.configs import config
+from src.modules.bounded_executor import BoundedExecutor
+from src.modules.embedding_backends import create_embedding_backend
+from src.modules.embedding_batcher import EmbeddingBatcher
+from src.modules.embedding_cache import EmbeddingCache
+from src.modules.pinned_chunks import (
+    PinnedChunks,
+    parse_pin_rules,
+    parse_tag_rules,
+)
+from src.modules.sqlite_pool import SQLiteVecPool
 
-model = SentenceTransformer("all-MiniLM-L6-v2")
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
 DEFAULT_VECTOR_DIM = 384
 
+# How ``documents`` stores embeddings: full floats scored by L2, int8
+# scored by cosine, or one bit per dimension scored by hamming distance
+VECTOR_COLUMNS = {
+    "float": f"float[{DEFAULT_VECTOR_DIM}]",
+    "int8": f"int8[{DEFAULT_VECTOR_DIM}] distance_metric=cosine",
+    "bit": f"bit[{DEFAULT_VECTOR_DIM}]",
+}
+VECTOR_SQL = {
+    "float": "?",
+    "int8": "vec_quantize_int8(?, 'unit')",
+    "bit": "vec_quantize_binary(?)",
+}
 
-def get_sqlite_vec_client(db_path: str | None = None):
-    """Get or create a sqlite-vec database connection"""
-    from src.configs.configs import config
+# Where a chunk comes from, stored with it in ``chunks`` (and
+# ``chunk_duplicates``): a page span for paginated sources, a line span
+# for plain text; NULL when it does not apply
+SPAN_KEYS = ("page", "page_end", "line", "line_end")
 
-    if db_path is None:
-        db_path = config.sqlite_db_path
+# Ingestion-time dedup against other sources: off, exact (same text) or
+# near (also embeddings within RAG_DEDUP_THRESHOLD cosine similarity)
+DEDUP_MODES = ("off", "exact", "near")
+
+# Storage mode of the open index, which wins over RAG_VECTOR_STORAGE
+# until the index is rebuilt
+_vector_storage = "float"
+# Indexes built before chunk text moved to ``chunks`` also keep a copy
+# in ``documents``, which vec0 requires on insert
+_documents_text = False
+
+
+def _configured_storage() -> str:
+    storage = str(config.rag_vector_storage).lower()
+    if storage not in VECTOR_COLUMNS:
+        raise ValueError(
+            f"Invalid RAG_VECTOR_STORAGE {storage!r}; "
+            f"expected one of {', '.join(VECTOR_COLUMNS)}"
+        )
+    return storage
+
+
+def _table_sql(conn: sqlite3.Connection, name: str) -> str:
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE name = ?", (name,)
+    ).fetchone()
+    return row[0] if row else ""
+
+
+def _detect_storage(conn: sqlite3.Connection) -> str:
+    sql = _table_sql(conn, "documents")
+    for storage in ("int8", "bit"):
+        if f"{storage}[" in sql:
+            return storage
+    return "float"
+
+
+def _detect_documents_text(conn: sqlite3.Connection) -> bool:
+    return (
+        re.search(r"\btext\s+TEXT\b", _table_sql(conn, "documents"))
+        is not None
+    )
+
+
+_SPAN_COLUMNS = {key: "INTEGER" for key in SPAN_KEYS}
+
+
+def _span(values: Iterable) -> dict:
+    """{"page": .., "page_end": ..} or {"line": .., ...} from SPAN_KEYS
+    column values, leaving out NULLs"""
+    return {
+        key: value
+        for key, value in zip(SPAN_KEYS, values)
+        if value is not None
+    }
+
+
+def _add_columns(conn: sqlite3.Connection, table: str, columns: dict):
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, definition in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
 
-    db_path = Path(db_path).as_posix()
-    conn = sqlite3.connect(db_path)
-    load(conn)
 
-    cursor = conn.cursor()
-    cursor.execute("""
+def init_schema(conn: sqlite3.Connection):
+    """Create the index tables if they do not exist yet.
+
+    ``documents`` holds only what KNN needs (embedding, source, and the
+    first page as a filter key, 0 for sources without pages); chunk text
+    and spans live in ``chunks``, which ``documents_fts`` indexes as its
+    external content.
+    """
+    conn.execute(f"""
         CREATE VIRTUAL TABLE IF NOT EXISTS documents USING vec0(
-            embedding float[384],
+            embedding {VECTOR_COLUMNS[_configured_storage()]},
+            source TEXT partition key,
+            page INTEGER
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_tags (
+            chunk_id INTEGER NOT NULL,
+            tag TEXT NOT NULL,
+            PRIMARY KEY (chunk_id, tag)
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunks (
+            id INTEGER PRIMARY KEY,
+            source TEXT,
+            content_hash TEXT NOT NULL,
             text TEXT,
+            page INTEGER,
+            page_end INTEGER,
+            line INTEGER,
+            line_end INTEGER
+        )
+    """)
+    _add_columns(conn, "chunks", {"text": "TEXT", **_SPAN_COLUMNS})
+    conn.execute("CREATE INDEX IF NOT EXISTS chunks_source ON chunks (source)")
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS chunks_content_hash ON chunks (content_hash)"
+    )
+    # Chunks not indexed because another source already holds the same
+    # (exact) or nearly the same (near) text; re-inserted if that copy
+    # is removed
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_duplicates (
+            id INTEGER PRIMARY KEY,
             source TEXT,
-            page INTEGER
+            page INTEGER,
+            text TEXT NOT NULL,
+            duplicate_of INTEGER NOT NULL,
+            kind TEXT NOT NULL,
+            page_end INTEGER,
+            line INTEGER,
+            line_end INTEGER
+        )
+    """)
+    _add_columns(conn, "chunk_duplicates", _SPAN_COLUMNS)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS chunk_duplicates_source ON chunk_duplicates (source)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS chunk_duplicates_of ON chunk_duplicates (duplicate_of)"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS source_fingerprints (
+            source TEXT PRIMARY KEY,
+            fingerprint TEXT NOT NULL,
+            chunk_count INTEGER NOT NULL,
+            updated_at TEXT NOT NULL
+        )
+    """)
+    # Bumped by every index write, in any process, so caches of answers
+    # built on the old index can tell they are stale
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS index_version (
+            id INTEGER PRIMARY KEY CHECK (id = 0),
+            version INTEGER NOT NULL
+        )
+    """)
+    conn.execute(
+        "INSERT OR IGNORE INTO index_version (id, version) VALUES (0, 0)"
+    )
+    # Lexical index over ``chunks`` (same ids as ``documents`` rowids),
+    # kept in sync by triggers; it stores no copy of the text. A chunk's
+    # text never changes under its content-addressed id, so there is no
+    # update trigger. Older indexes had a self-contained table, rebuilt
+    # by prepare_index
+    if "content=" not in _table_sql(conn, "documents_fts"):
+        conn.execute("DROP TABLE IF EXISTS documents_fts")
+    conn.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+            text, content='chunks', content_rowid='id'
+        )
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_insert AFTER INSERT ON chunks
+        BEGIN
+            INSERT INTO documents_fts (rowid, text) VALUES (new.id, new.text);
+        END
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS chunks_fts_delete AFTER DELETE ON chunks
+        BEGIN
+            INSERT INTO documents_fts (documents_fts, rowid, text)
+            VALUES ('delete', old.id, old.text);
+        END
+    """)
+    # Unit-length float embeddings kept beside a quantized index for
+    # re-scoring its top candidates; never scanned by KNN
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS chunk_vectors (
+            id INTEGER PRIMARY KEY,
+            embedding BLOB NOT NULL
         )
     """)
-    conn.commit()
 
-    return conn
 
+_pool: SQLiteVecPool | None = None
+_pool_lock = threading.Lock()
 
-def get_embedding(texts: list[str]) -> list[list[float]]:
-    return model.encode(texts, show_progress_bar=True)
 
+def get_sqlite_vec_pool(db_path: str | None = None) -> SQLiteVecPool:
+    """Get the process-wide sqlite-vec pool, opening it on first use"""
+    global _pool, _vector_storage, _documents_text
 
-def ensure_collection(vector_size: int = 384):
-    client = get_sqlite_vec_client()
-    cursor = client.cursor()
-    cursor.execute(
-        "SELECT name FROM sqlite_master WHERE type='table' AND name='documents'"
+    if db_path is None:
+        db_path = config.sqlite_db_path
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = SQLiteVecPool(
+                db_path,
+                busy_timeout_ms=int(config.sqlite_busy_timeout_ms),
+                init_schema=init_schema,
+            ).open()
+            with _pool.reader() as client:
+                _vector_storage = _detect_storage(client)
+                _documents_text = _detect_documents_text(client)
+            if _documents_text:
+                print(
+                    "[RAG] Index keeps a second copy of chunk text in "
+                    "documents; run reindex_data.py --full to drop it"
+                )
+            if _vector_storage != _configured_storage():
+                print(
+                    f"[RAG] Index stores {_vector_storage} vectors but "
+                    f"RAG_VECTOR_STORAGE={_configured_storage()}; "
+                    f"run reindex_data.py --full to rebuild it"
+                )
+    return _pool
+
+
+def close_sqlite_vec_pool():
+    """Close the pool; the next call to get_sqlite_vec_pool reopens it"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+
+_executor: BoundedExecutor | None = None
+
+
+def get_rag_executor() -> BoundedExecutor:
+    """Thread pool that runs embedding and sqlite work off the event loop"""
+    global _executor
+
+    with _pool_lock:
+        if _executor is None:
+            _executor = BoundedExecutor(
+                max_workers=int(config.rag_executor_workers), name="rag"
+            )
+    return _executor
+
+
+def shutdown_rag_executor():
+    global _executor
+
+    with _pool_lock:
+        if _executor is not None:
+            _executor.shutdown()
+            _executor = None
+
+
+_batcher: EmbeddingBatcher | None = None
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """Batcher that folds concurrent query embeddings into one encode call"""
+    global _batcher
+
+    executor = get_rag_executor()
+    with _pool_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(
+                encode=get_embedding,
+                executor=executor,
+                max_batch_size=int(config.embedding_batch_max_size),
+                max_wait_ms=float(config.embedding_batch_max_wait_ms),
+            )
+    return _batcher
+
+
+async def stop_embedding_batcher():
+    global _batcher
+
+    if _batcher is not None:
+        await _batcher.stop()
+        _batcher = None
+
+
+_model = None
+_model_lock = threading.Lock()
+_rag_warm = False
+_warmup_task: asyncio.Task | None = None
+# Why the last warmup failed, for /readyz; None once one succeeds
+_warmup_error: str | None = None
+
+# Milliseconds spent in each startup step; None until the step has run
+startup_timings: dict[str, float | None] = {
+    "model_load_ms": None,
+    "model_warmup_ms": None,
+    "index_warm_ms": None,
+}
+
+
+def get_embedding_model():
+    """Load the embedding backend (EMBEDDING_BACKEND) on first use.
+
+    The torch backend pulls in torch and the ONNX one onnxruntime, so
+    they are imported here rather than when this module is, keeping
+    imports of the RAG layer (routers, reindex_data.py) cheap.
+    """
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                started = time.perf_counter()
+                _model = create_embedding_backend(
+                    str(config.embedding_backend).lower(),
+                    EMBEDDING_MODEL_NAME,
+                    onnx_model=config.embedding_onnx_model or None,
+                    onnx_file=config.embedding_onnx_file,
+                )
+                elapsed = (time.perf_counter() - started) * 1000
+                startup_timings["model_load_ms"] = round(elapsed, 1)
+                print(
+                    f"[RAG] Loaded {EMBEDDING_MODEL_NAME} "
+                    f"({_model.name} backend) in {elapsed:.0f} ms"
+                )
+    return _model
+
+
+def get_embedding(texts: list[str]) -> np.ndarray:
+    """float32 vectors of ``texts``; chunks, queries (directly or through
+    the batcher) and the warmup all encode here, so every backend is
+    called the same way"""
+    return np.asarray(get_embedding_model().encode(texts), dtype="float32")
+
+
+def warmup_rag():
+    """Load the model, then run a dummy encode and a dummy KNN so the
+    first real request pays for neither"""
+    global _rag_warm
+
+    get_embedding_model()
+
+    started = time.perf_counter()
+    vector = get_embedding(["warmup"])[0]
+    startup_timings["model_warmup_ms"] = round(
+        (time.perf_counter() - started) * 1000, 1
+    )
+
+    started = time.perf_counter()
+    search_by_vector(vector, top_k=1)
+    startup_timings["index_warm_ms"] = round(
+        (time.perf_counter() - started) * 1000, 1
     )
-    if not cursor.fetchone():
-        raise ValueError("Documents table not found")
 
+    _rag_warm = True
+    print(f"[RAG] Warm: {startup_timings}")
+
+
+def _warmup_done(task: asyncio.Task):
+    global _warmup_error
+
+    if task.cancelled():
+        return
+    # Retrieving the exception here also keeps asyncio from reporting it
+    # as never retrieved when nobody awaits the task
+    error = task.exception()
+    if error is None:
+        _warmup_error = None
+        return
+    _warmup_error = f"{type(error).__name__}: {error}"
+    print(f"[RAG] Warmup failed: {_warmup_error}")
+
+
+def start_rag_warmup() -> asyncio.Task:
+    """Run warmup_rag on the RAG executor once; a failed warmup is
+    retried on the next call"""
+    global _warmup_task
+
+    if _warmup_task is None or (
+        _warmup_task.done()
+        and (_warmup_task.cancelled() or _warmup_task.exception() is not None)
+    ):
+        _warmup_task = asyncio.ensure_future(
+            get_rag_executor().run(warmup_rag)
+        )
+        _warmup_task.add_done_callback(_warmup_done)
+    return _warmup_task
+
+
+def rag_readiness() -> dict:
+    return {
+        "ready": _rag_warm,
+        "model_loaded": _model is not None,
+        "embedding_backend": _model.name if _model is not None else None,
+        "index_open": _pool is not None,
+        "warmup_error": _warmup_error,
+        **startup_timings,
+    }
+
+
+def rewrite_time_references(text: str) -> str:
+    """Replace "current year" references with "currently" to match documents"""
+    current_year = str(datetime.now().year)
+    if current_year not in text:
+        return text
+    text = re.sub(
+        r"\b" + current_year + r"\b", "currently", text, flags=re.IGNORECASE
+    )
+    return re.sub(r"\bthis year\b", "currently", text, flags=re.IGNORECASE)
+
+
+def normalize_query(query: str) -> str:
+    # all-MiniLM-L6-v2 is uncased, so folding case and whitespace does not
+    # change the vector; it only lets equivalent questions share a cache slot
+    return EmbeddingCache.default_normalize(rewrite_time_references(query))
+
+
+query_embedding_cache = EmbeddingCache(
+    max_entries=int(config.query_embedding_cache_size),
+    ttl=float(config.query_embedding_cache_ttl_seconds),
+    normalize=normalize_query,
+)
+
+
+def embed_query(query: str) -> np.ndarray:
+    key = query_embedding_cache.normalize(query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = get_embedding([key])[0]
+        query_embedding_cache.put(key, vector)
+    return vector
+
+
+async def aembed_query(query: str) -> np.ndarray:
+    key = query_embedding_cache.normalize(query)
+    vector = query_embedding_cache.get(key)
+    if vector is None:
+        vector = await get_embedding_batcher().embed(key)
+        query_embedding_cache.put(key, vector)
+    return vector
+
+
+pinned_chunks = PinnedChunks(
+    tag_rules=parse_tag_rules(
+        getattr(config, "rag_tag_rules", None), RAGConstants.TAG_RULES
+    ),
+    pin_rules=parse_pin_rules(
+        getattr(config, "rag_pin_rules", None), RAGConstants.PIN_RULES
+    ),
+)
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_id(text: str, source: str | None) -> int:
+    """Stable 63-bit row id derived from a chunk's source and content"""
+    digest = hashlib.sha256(
+        f"{source or ''}\0{content_hash(text)}".encode("utf-8")
+    ).digest()
+    return int.from_bytes(digest[:8], "big") >> 1
+
+
+def prepare_index():
+    """One-off backfills for indexes built by older versions, then load
+    pinned chunks into memory"""
+    pool = get_sqlite_vec_pool()
+    with pool.writer() as client:
+        untracked = client.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM chunks)"
+        ).fetchone()[0]
+        if untracked and _documents_text:
+            # Legacy rows keep their random ids; an incremental reindex
+            # replaces them with content-addressed ones
+            client.executemany(
+                "INSERT OR IGNORE INTO chunks (id, source, content_hash, text) VALUES (?, ?, ?, ?)",
+                [
+                    (rowid, source, content_hash(text or ""), text or "")
+                    for rowid, text, source in client.execute(
+                        "SELECT rowid, text, source FROM documents"
+                    ).fetchall()
+                ],
+            )
+        elif _documents_text:
+            # Chunks tracked before the text moved out of ``documents``
+            client.execute(
+                """
+                UPDATE chunks
+                SET text = (SELECT text FROM documents WHERE rowid = chunks.id)
+                WHERE text IS NULL
+                """
+            )
+
+        untagged = client.execute(
+            "SELECT NOT EXISTS (SELECT 1 FROM chunk_tags)"
+        ).fetchone()[0]
+        if untagged:
+            client.executemany(
+                "INSERT OR IGNORE INTO chunk_tags (chunk_id, tag) VALUES (?, ?)",
+                [
+                    (rowid, tag)
+                    for rowid, text in client.execute(
+                        "SELECT id, text FROM chunks"
+                    ).fetchall()
+                    for tag in pinned_chunks.tags_for(text or "")
+                ],
+            )
 
-def index_chunks(chunks: list[str], metadata: list[dict]):
-    client = get_sqlite_vec_client()
-    embeddings = np.array(get_embedding(chunks)).astype("float32")
-    ensure_collection(embeddings.shape[1])
+        # The external-content index is empty after replacing the old
+        # self-contained one, or stale after the text backfill above
+        unsearchable = client.execute(
+            """
+            SELECT (SELECT count(*) FROM documents_fts_docsize)
+                != (SELECT count(*) FROM chunks)
+            """
+        ).fetchone()[0]
+        if unsearchable:
+            client.execute(
+                "INSERT INTO documents_fts (documents_fts) VALUES ('rebuild')"
+            )
+    with pool.reader() as client:
+        pinned_chunks.load(client)
 
-    cursor = client.cursor()
 
-    for vec, meta, chunk in zip(embeddings, metadata, chunks):
-        vec_blob = vec.tobytes()
+def ensure_collection(vector_size: int = 384):
+    with get_sqlite_vec_pool().reader() as client:
+        cursor = client.cursor()
         cursor.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name='documents'"
+        )
+        if not cursor.fetchone():
+            raise ValueError("Documents table not found")
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _existing_ids(client: sqlite3.Connection, ids: list[int]) -> set[int]:
+    if not ids:
+        return set()
+    placeholders = ",".join("?" * len(ids))
+    rows = client.execute(
+        f"""
+        SELECT id FROM chunks WHERE id IN ({placeholders})
+        UNION ALL
+        SELECT id FROM chunk_duplicates WHERE id IN ({placeholders})
+        """,
+        ids + ids,
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def _dedup_mode() -> str:
+    mode = str(config.rag_dedup).lower()
+    if mode not in DEDUP_MODES:
+        raise ValueError(
+            f"Invalid RAG_DEDUP {mode!r}; expected one of {', '.join(DEDUP_MODES)}"
+        )
+    return mode
+
+
+def _exact_duplicates(
+    client: sqlite3.Connection, keyed: dict[int, tuple[str, str | None]]
+) -> dict[int, int]:
+    """Map chunk id -> id of a chunk of another source with the same text,
+    for the (text, source) pairs in ``keyed``"""
+    hashes = {i: content_hash(text) for i, (text, _) in keyed.items()}
+    unique = list(set(hashes.values()))
+    if not unique:
+        return {}
+    placeholders = ",".join("?" * len(unique))
+    stored: dict[str, list[tuple[int, str | None]]] = {}
+    for kept, source, digest in client.execute(
+        f"SELECT id, source, content_hash FROM chunks WHERE content_hash IN ({placeholders})",
+        unique,
+    ):
+        stored.setdefault(digest, []).append((kept, source))
+
+    duplicates = {}
+    for i, (_, source) in keyed.items():
+        for kept, other in stored.get(hashes[i], ()):
+            if other != source:
+                duplicates[i] = kept
+                break
+    return duplicates
+
+
+def _cosine(distance: float) -> float:
+    """Cosine similarity of two unit vectors from their KNN distance"""
+    if _vector_storage == "float":
+        return 1.0 - distance * distance / 2
+    return _similarity(distance)
+
+
+def _near_duplicates(
+    client: sqlite3.Connection,
+    vectors: dict[int, np.ndarray],
+    sources: dict[int, str | None],
+    threshold: float,
+) -> dict[int, int]:
+    """Map chunk id -> id of an indexed chunk of another source whose
+    embedding has cosine similarity >= ``threshold`` with the chunk's
+    vector, for all of ``vectors`` in one KNN query"""
+    if not vectors:
+        return {}
+    queries = json.dumps({str(i): vec.tolist() for i, vec in vectors.items()})
+    vector_sql = VECTOR_SQL[_vector_storage].replace("?", "vec_f32(q.value)")
+    candidates: dict[int, list[tuple[int, float]]] = {}
+    for key, rowid, source, distance in client.execute(
+        f"""
+        SELECT q.key, d.rowid, d.source, d.distance
+        FROM json_each(?) q
+        JOIN documents d
+            ON d.embedding MATCH {vector_sql}
+            AND d.k = ?
+        ORDER BY q.key, d.distance
+        """,
+        (queries, RAGConstants.DEDUP_CANDIDATES),
+    ):
+        i = int(key)
+        if source != sources[i]:
+            candidates.setdefault(i, []).append((rowid, _cosine(distance)))
+
+    stored = {}
+    if candidates and _keeps_float_vectors():
+        ids = list(
+            {rowid for rows in candidates.values() for rowid, _ in rows}
+        )
+        placeholders = ",".join("?" * len(ids))
+        stored = dict(
+            client.execute(
+                f"SELECT id, embedding FROM chunk_vectors WHERE id IN ({placeholders})",
+                ids,
+            ).fetchall()
+        )
+
+    duplicates = {}
+    for i, rows in candidates.items():
+        vec = _unit(vectors[i])
+        for rowid, score in rows:
+            blob = stored.get(rowid)
+            if blob is not None:
+                score = float(np.frombuffer(blob, dtype="float32") @ vec)
+            if score >= threshold:
+                duplicates[i] = rowid
+                break
+    return duplicates
+
+
+def _indexed_ids(client: sqlite3.Connection, ids: Iterable[int]) -> set[int]:
+    ids = list(set(ids))
+    if not ids:
+        return set()
+    placeholders = ",".join("?" * len(ids))
+    return {
+        row[0]
+        for row in client.execute(
+            f"SELECT id FROM chunks WHERE id IN ({placeholders})", ids
+        )
+    }
+
+
+def _insert_chunks(
+    client: sqlite3.Connection,
+    items: Iterable[tuple[str, dict]],
+    batch_size: int,
+    progress: Callable[[int, int | None], None] | None = None,
+    total: int | None = None,
+    embeddings: dict[int, np.ndarray] | None = None,
+    near: dict[int, int] | None = None,
+) -> dict:
+    """Embed and insert (chunk, metadata) pairs not already in the index.
+
+    Vectors found in ``embeddings`` (by chunk id) are used as they are;
+    only the rest are embedded here, inside the write transaction. With
+    RAG_DEDUP, chunks whose text another source already holds are
+    recorded in chunk_duplicates instead ("skipped"), and with ``near``
+    so are chunks whose embedding is within RAG_DEDUP_THRESHOLD cosine
+    similarity of another source's chunk ("merged"). The near-duplicate
+    lookup for ``embeddings`` was done before the lock and comes in as
+    ``near``; matches whose kept chunk is gone since are indexed. Returns
+    the counts of inserted, skipped and merged chunks.
+    """
+    dedup = _dedup_mode()
+    threshold = float(config.rag_dedup_threshold)
+    processed = 0
+    inserted = 0
+    skipped = 0
+    merged = 0
+    for batch in _batched(items, batch_size):
+        processed += len(batch)
+
+        # Content-addressed ids: anything already stored needs no embedding
+        keyed = {}
+        for chunk, meta in batch:
+            keyed.setdefault(
+                chunk_id(chunk, meta.get("source")), (chunk, meta)
+            )
+        for existing in _existing_ids(client, list(keyed)):
+            del keyed[existing]
+
+        duplicate_rows = []
+        if dedup != "off":
+            exact = _exact_duplicates(
+                client,
+                {
+                    i: (chunk, meta.get("source"))
+                    for i, (chunk, meta) in keyed.items()
+                },
+            )
+            for i, kept in exact.items():
+                chunk, meta = keyed.pop(i)
+                duplicate_rows.append(
+                    (
+                        i,
+                        meta.get("source"),
+                        chunk,
+                        kept,
+                        "exact",
+                        *(meta.get(key) for key in SPAN_KEYS),
+                    )
+                )
+            skipped += len(exact)
+
+        if keyed:
+            ids = list(keyed)
+            vectors = dict(embeddings or {})
+            missing = [i for i in ids if i not in vectors]
+            if missing:
+                vectors.update(
+                    zip(
+                        missing,
+                        get_embedding([keyed[i][0] for i in missing]),
+                    )
+                )
+
+            if dedup == "near":
+                # Vectors from ``embeddings`` were looked up with them
+                unchecked = ids if near is None else missing
+                found = {i: near[i] for i in ids if near and i in near}
+                alive = _indexed_ids(client, found.values())
+                found = {i: kept for i, kept in found.items() if kept in alive}
+                found.update(
+                    _near_duplicates(
+                        client,
+                        {i: vectors[i] for i in unchecked},
+                        {i: keyed[i][1].get("source") for i in unchecked},
+                        threshold,
+                    )
+                )
+                for i, kept in found.items():
+                    chunk, meta = keyed[i]
+                    ids.remove(i)
+                    duplicate_rows.append(
+                        (
+                            i,
+                            meta.get("source"),
+                            chunk,
+                            kept,
+                            "near",
+                            *(meta.get(key) for key in SPAN_KEYS),
+                        )
+                    )
+                merged += len(found)
+
+            rows = []
+            vector_rows = []
+            chunk_rows = []
+            tag_rows = []
+            for rowid in ids:
+                vec = vectors[rowid]
+                chunk, meta = keyed[rowid]
+                rows.append(
+                    (
+                        rowid,
+                        vec.tobytes(),
+                        chunk,
+                        meta.get("source"),
+                        # vec0 INTEGER metadata columns reject NULL; 0
+                        # keeps pageless chunks out of ``pages`` filters
+                        meta.get("page") or 0,
+                    )
+                )
+                chunk_rows.append(
+                    (
+                        rowid,
+                        meta.get("source"),
+                        content_hash(chunk),
+                        chunk,
+                        *(meta.get(key) for key in SPAN_KEYS),
+                    )
+                )
+                if _keeps_float_vectors():
+                    vector_rows.append((rowid, _unit(vec).tobytes()))
+                tag_rows.extend(
+                    (rowid, tag)
+                    for tag in pinned_chunks.tags_for(
+                        chunk, meta.get("tags", ())
+                    )
+                )
+
+            if _documents_text:
+                client.executemany(
+                    f"""
+                    INSERT INTO documents (rowid, embedding, text, source, page)
+                    VALUES (?, {VECTOR_SQL[_vector_storage]}, ?, ?, ?)
+                    """,
+                    rows,
+                )
+            else:
+                client.executemany(
+                    f"""
+                    INSERT INTO documents (rowid, embedding, source, page)
+                    VALUES (?, {VECTOR_SQL[_vector_storage]}, ?, ?)
+                    """,
+                    [row[:2] + row[3:] for row in rows],
+                )
+            client.executemany(
+                "INSERT OR REPLACE INTO chunk_vectors (id, embedding) VALUES (?, ?)",
+                vector_rows,
+            )
+            # Also indexes the text in documents_fts (chunks_fts_insert)
+            client.executemany(
+                """
+                INSERT INTO chunks (
+                    id, source, content_hash, text,
+                    page, page_end, line, line_end
+                )
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                chunk_rows,
+            )
+            client.executemany(
+                "INSERT OR IGNORE INTO chunk_tags (chunk_id, tag) VALUES (?, ?)",
+                tag_rows,
+            )
+            inserted += len(rows)
+
+        client.executemany(
             """
-            INSERT INTO documents (rowid, embedding, text, source, page)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT OR REPLACE INTO chunk_duplicates (
+                id, source, text, duplicate_of, kind,
+                page, page_end, line, line_end
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            duplicate_rows,
+        )
+
+        if progress is not None:
+            progress(processed, total)
+
+    return {"inserted": inserted, "skipped": skipped, "merged": merged}
+
+
+def _delete_chunks(
+    client: sqlite3.Connection, ids: Iterable[int]
+) -> list[tuple[str, dict]]:
+    """Delete chunks (indexed or recorded as duplicates).
+
+    Returns the (chunk, metadata) of other sources' duplicates of the
+    deleted chunks, which lost their indexed copy and must be inserted
+    again.
+    """
+    ids = list(ids)
+    params = [(i,) for i in ids]
+    orphans = []
+    for batch in _batched(ids, 500):
+        placeholders = ",".join("?" * len(batch))
+        orphans.extend(
+            client.execute(
+                f"""
+                SELECT id, text, source, page, page_end, line, line_end
+                FROM chunk_duplicates
+                WHERE duplicate_of IN ({placeholders})
+                """,
+                batch,
+            ).fetchall()
+        )
+    deleted = set(ids)
+    orphans = [row for row in orphans if row[0] not in deleted]
+
+    client.executemany("DELETE FROM documents WHERE rowid = ?", params)
+    # Also drops the text from documents_fts (chunks_fts_delete)
+    client.executemany("DELETE FROM chunks WHERE id = ?", params)
+    client.executemany("DELETE FROM chunk_tags WHERE chunk_id = ?", params)
+    client.executemany("DELETE FROM chunk_vectors WHERE id = ?", params)
+    client.executemany("DELETE FROM chunk_duplicates WHERE id = ?", params)
+    client.executemany(
+        "DELETE FROM chunk_duplicates WHERE id = ?",
+        [(row[0],) for row in orphans],
+    )
+    return [
+        (text, {"source": source, **_span(span)})
+        for _, text, source, *span in orphans
+    ]
+
+
+def _bump_index_version(client: sqlite3.Connection):
+    client.execute(
+        "UPDATE index_version SET version = version + 1 WHERE id = 0"
+    )
+
+
+# (version, monotonic time it was read); None after a write by this process
+_index_version: tuple[int, float] | None = None
+
+
+def get_index_version() -> int:
+    global _index_version
+    with get_sqlite_vec_pool().reader() as client:
+        version = client.execute(
+            "SELECT version FROM index_version WHERE id = 0"
+        ).fetchone()[0]
+    _index_version = (version, time.monotonic())
+    return version
+
+
+async def aget_index_version() -> int:
+    """The index version, from memory while fresh, otherwise read from
+    SQLite in the RAG executor rather than on the event loop"""
+    cached = _index_version
+    if (
+        cached is not None
+        and time.monotonic() - cached[1] < RAGConstants.INDEX_VERSION_TTL
+    ):
+        return cached[0]
+    return await get_rag_executor().run(get_index_version)
+
+
+def _after_index_write():
+    global _index_version
+    _index_version = None
+
+    with get_sqlite_vec_pool().reader() as client:
+        pinned_chunks.load(client)
+
+    # A reindex may come with a new model or normalization rules
+    query_embedding_cache.clear()
+
+
+def embed_new_chunks(
+    source: str,
+    chunks: Sequence[str],
+    metadata: Sequence[dict],
+    batch_size: int | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+) -> dict:
+    """Embed and index the chunks of ``source`` the index does not hold
+    yet, one batch at a time.
+
+    Each batch is embedded (and, under RAG_DEDUP=near, looked up for
+    near-duplicates) without the write lock, then written in its own
+    short transaction, so one batch of vectors is in memory at a time
+    and other writers proceed between batches. Exact duplicates of other
+    sources' chunks are not embedded. Pass the result to reindex_source
+    as ``written``. Returns the counts of inserted, skipped and merged
+    chunks.
+    """
+    if batch_size is None:
+        batch_size = int(config.index_batch_size)
+
+    dedup = _dedup_mode()
+    threshold = float(config.rag_dedup_threshold)
+    total = len(chunks)
+    totals = {"inserted": 0, "skipped": 0, "merged": 0}
+    processed = 0
+
+    ensure_collection()
+
+    for batch in _batched(zip(chunks, metadata), batch_size):
+        processed += len(batch)
+        batch = [(chunk, {**meta, "source": source}) for chunk, meta in batch]
+        keyed = {}
+        for chunk, _ in batch:
+            keyed.setdefault(chunk_id(chunk, source), chunk)
+        with get_sqlite_vec_pool().reader() as client:
+            stored = _existing_ids(client, list(keyed))
+            new = {i: chunk for i, chunk in keyed.items() if i not in stored}
+            duplicates = (
+                _exact_duplicates(
+                    client, {i: (chunk, source) for i, chunk in new.items()}
+                )
+                if dedup != "off"
+                else {}
+            )
+        missing = [i for i in new if i not in duplicates]
+
+        vectors: dict[int, np.ndarray] = {}
+        near: dict[int, int] = {}
+        if missing:
+            vectors = dict(
+                zip(
+                    missing,
+                    get_embedding([new[i] for i in missing]),
+                )
+            )
+            if dedup == "near":
+                with get_sqlite_vec_pool().reader() as client:
+                    near = _near_duplicates(
+                        client,
+                        vectors,
+                        dict.fromkeys(vectors, source),
+                        threshold,
+                    )
+
+        if new:
+            with get_sqlite_vec_pool().writer() as client:
+                counts = _insert_chunks(
+                    client, batch, len(batch), embeddings=vectors, near=near
+                )
+                if counts["inserted"]:
+                    _bump_index_version(client)
+            for key in totals:
+                totals[key] += counts[key]
+
+        if progress is not None:
+            progress(processed, total)
+
+    if any(totals.values()):
+        _after_index_write()
+    return totals
+
+
+def index_chunks(
+    chunks: Iterable[str],
+    metadata: Iterable[dict],
+    batch_size: int | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+) -> int:
+    """Embed and insert chunks batch by batch in a single transaction.
+
+    Only one batch of embeddings is held in memory at a time, so chunks
+    and metadata may be lazy iterables. Chunks already in the index (same
+    source and content), and duplicates of other sources' chunks under
+    RAG_DEDUP, are skipped. ``progress(processed, total)`` is called
+    after each batch; ``total`` is None when it is not known. Returns the
+    number of chunks inserted.
+    """
+    if batch_size is None:
+        batch_size = int(config.index_batch_size)
+    total = len(chunks) if isinstance(chunks, Sized) else None
+
+    ensure_collection()
+
+    with get_sqlite_vec_pool().writer() as client:
+        counts = _insert_chunks(
+            client, zip(chunks, metadata), batch_size, progress, total
+        )
+        if counts["inserted"]:
+            _bump_index_version(client)
+
+    _after_index_write()
+    if counts["skipped"] or counts["merged"]:
+        print(
+            f"[RAG] Skipped {counts['skipped']} duplicate and "
+            f"{counts['merged']} near-duplicate chunks"
+        )
+    return counts["inserted"]
+
+
+def _update_spans(client: sqlite3.Connection, spans: dict[int, tuple]) -> int:
+    """Move kept chunks (and recorded duplicates) to their new spans, e.g.
+    when a re-upload shifts text to other pages. Returns how many moved."""
+    if not spans:
+        return 0
+    ids = list(spans)
+    placeholders = ",".join("?" * len(ids))
+    moved = [
+        (table, rowid)
+        for table in ("chunks", "chunk_duplicates")
+        for rowid, *span in client.execute(
+            f"""
+            SELECT id, page, page_end, line, line_end FROM {table}
+            WHERE id IN ({placeholders})
+            """,
+            ids,
+        )
+        if tuple(span) != spans[rowid]
+    ]
+    for table, rowid in moved:
+        client.execute(
+            f"""
+            UPDATE {table}
+            SET page = ?, page_end = ?, line = ?, line_end = ?
+            WHERE id = ?
+            """,
+            (*spans[rowid], rowid),
+        )
+        if table == "chunks":
+            client.execute(
+                "UPDATE documents SET page = ? WHERE rowid = ?",
+                (spans[rowid][0] or 0, rowid),
+            )
+    return len(moved)
+
+
+def reindex_source(
+    source: str,
+    chunks: list[str],
+    metadata: list[dict],
+    batch_size: int | None = None,
+    progress: Callable[[int, int | None], None] | None = None,
+    written: dict | None = None,
+) -> dict:
+    """Make the index hold exactly ``chunks`` for ``source``.
+
+    Only new or changed chunks are embedded and stale ones are deleted;
+    an unchanged source (same fingerprint) costs no embedding at all.
+    After embed_new_chunks, pass its counts as ``written``: the new
+    chunks are already indexed, and this only removes stale ones. Under RAG_DEDUP, chunks another source
+    already holds are recorded rather than indexed ("skipped" for the
+    same text, "merged" for near-duplicates); when a chunk with recorded
+    duplicates is deleted, one of them takes its place ("restored").
+    Kept chunks whose page or line span changed are updated ("moved").
+    """
+    if batch_size is None:
+        batch_size = int(config.index_batch_size)
+
+    metadata = [{**meta, "source": source} for meta in metadata]
+    desired = [chunk_id(chunk, source) for chunk in chunks]
+    # Where each chunk sits; the first copy of a repeated chunk is the
+    # one indexed
+    spans: dict[int, tuple] = {}
+    for i, meta in zip(desired, metadata):
+        spans.setdefault(i, tuple(meta.get(key) for key in SPAN_KEYS))
+    fingerprint = hashlib.sha256(
+        "\n".join(f"{i} {spans[i]}" for i in sorted(spans)).encode("utf-8")
+    ).hexdigest()
+
+    ensure_collection()
+
+    with get_sqlite_vec_pool().writer() as client:
+        stored = client.execute(
+            "SELECT fingerprint FROM source_fingerprints WHERE source = ?",
+            (source,),
+        ).fetchone()
+        if stored and stored[0] == fingerprint:
+            print(f"[RAG] {source} unchanged, nothing to reindex")
+            return {
+                "source": source,
+                "added": 0,
+                "removed": 0,
+                "unchanged": len(set(desired)),
+                "moved": 0,
+                "skipped": 0,
+                "merged": 0,
+                "restored": 0,
+            }
+
+        existing = {
+            row[0]
+            for row in client.execute(
+                """
+                SELECT id FROM chunks WHERE source = ?
+                UNION ALL
+                SELECT id FROM chunk_duplicates WHERE source = ?
+                """,
+                (source, source),
+            )
+        }
+        stale = existing - set(desired)
+        orphans = _delete_chunks(client, stale)
+        moved = _update_spans(
+            client, {i: spans[i] for i in existing & set(desired)}
+        )
+
+        counts = _insert_chunks(
+            client,
+            zip(chunks, metadata),
+            batch_size,
+            progress,
+            len(chunks),
+        )
+        for key, count in (written or {}).items():
+            counts[key] += count
+        added = counts["inserted"]
+        # Other sources' duplicates of deleted chunks are indexed again,
+        # unless they still duplicate something else
+        restored = (
+            _insert_chunks(client, orphans, batch_size)["inserted"]
+            if orphans
+            else 0
+        )
+
+        client.execute(
+            """
+            INSERT INTO source_fingerprints
+                (source, fingerprint, chunk_count, updated_at)
+            VALUES (?, ?, ?, ?)
+            ON CONFLICT (source) DO UPDATE SET
+                fingerprint = excluded.fingerprint,
+                chunk_count = excluded.chunk_count,
+                updated_at = excluded.updated_at
             """,
             (
-                hash(str(uuid4())) % (2**31),
-                vec_blob,
-                chunk,
-                meta.get("source"),
-                meta.get("page"),
+                source,
+                fingerprint,
+                len(set(desired)),
+                datetime.now().isoformat(),
             ),
         )
+        if added or stale or restored or moved:
+            _bump_index_version(client)
 
-    client.commit()
+    _after_index_write()
+    print(
+        f"[RAG] Reindexed {source}: +{added} -{len(stale)} ~{moved}, "
+        f"{counts['skipped']} duplicates skipped, "
+        f"{counts['merged']} near-duplicates merged"
+    )
+    return {
+        "source": source,
+        "added": added,
+        "removed": len(stale),
+        # Chunks embed_new_chunks wrote were already there
+        "unchanged": len(existing & set(desired))
+        - sum((written or {}).values()),
+        "moved": moved,
+        "skipped": counts["skipped"],
+        "merged": counts["merged"],
+        "restored": restored,
+    }
+
+
+def _hybrid_enabled() -> bool:
+    return str(config.rag_retrieval).lower() == "hybrid"
 
 
 def search_chunks(
-    query: str, top_k: int = 10, min_score: float = 0.0
+    query: str,
+    top_k: int = 10,
+    min_score: float = 0.0,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
 ) -> list[dict]:
+    """Search the index, optionally only within ``sources`` and an
+    inclusive ``pages`` range"""
     print(f"[RAG] Searching for: {query}")
-    client = get_sqlite_vec_client()
-    query_vec = np.array(get_embedding([query])).astype("float32")[0]
-
-    cursor = client.cursor()
-    cursor.execute(
-        """
-        SELECT rowid, text, source, page, distance
-        FROM documents
-        WHERE embedding MATCH ?
-        ORDER BY distance
+    query_vec = embed_query(query)
+    if _hybrid_enabled():
+        return search_hybrid(
+            query, query_vec, top_k, min_score, sources, pages
+        )
+    return search_by_vector(query_vec, top_k, min_score, sources, pages)
+
+
+def _filter_sql(
+    sources: Sequence[str] | None,
+    pages: tuple[int, int] | None,
+    prefix: str = "",
+) -> tuple[str, list]:
+    """Extra ``AND`` conditions on the source and page columns"""
+    sql, params = "", []
+    if sources:
+        sql += f" AND {prefix}source IN ({','.join('?' * len(sources))})"
+        params.extend(sources)
+    if pages is not None:
+        sql += f" AND {prefix}page >= ? AND {prefix}page <= ?"
+        params.extend(pages)
+    return sql, params
+
+
+def _unit(vec: np.ndarray) -> np.ndarray:
+    norm = float(np.linalg.norm(vec))
+    return vec / norm if norm else vec
+
+
+def _rescore_multiplier() -> int:
+    return int(config.rag_rescore_multiplier)
+
+
+def _keeps_float_vectors() -> bool:
+    return _vector_storage != "float" and _rescore_multiplier() > 1
+
+
+def _similarity(distance: float) -> float:
+    if _vector_storage == "int8":
+        return 1.0 - distance
+    if _vector_storage == "bit":
+        # 0 differing bits -> 1.0, all bits differ -> -1.0, like cosine
+        return 1.0 - 2.0 * distance / DEFAULT_VECTOR_DIM
+    return 1.0 / (1.0 + distance) if distance > 0 else 1.0
+
+
+def _rescore(
+    client: sqlite3.Connection, query_vec: np.ndarray, rows: list[tuple]
+) -> list[tuple]:
+    """Exact cosine from the stored float vectors; rows without one
+    keep their quantized score"""
+    # k * RAG_RESCORE_MULTIPLIER ids may be more than SQLite allows
+    # bound variables, so they go in as one JSON array
+    stored = dict(
+        client.execute(
+            """
+            SELECT id, embedding FROM chunk_vectors
+            WHERE id IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps([row[0] for row in rows]),),
+        ).fetchall()
+    )
+    query_vec = _unit(query_vec)
+    rescored = []
+    for rowid, text, source, span, score in rows:
+        blob = stored.get(rowid)
+        if blob is not None:
+            score = float(np.frombuffer(blob, dtype="float32") @ query_vec)
+        rescored.append((rowid, text, source, span, score))
+    return sorted(rescored, key=lambda row: row[4], reverse=True)
+
+
+# SPAN_KEYS columns of a chunk; rows indexed before spans were stored
+# fall back to the page in ``documents``
+_SPAN_SQL = (
+    "COALESCE({chunks}.page, NULLIF({documents}.page, 0)), "
+    "{chunks}.page_end, {chunks}.line, {chunks}.line_end"
+)
+
+
+def _duplicate_aliases(
+    client: sqlite3.Connection,
+    sources: Sequence[str] | None,
+    pages: tuple[int, int] | None,
+) -> dict[int, list[tuple]]:
+    """(id, text, source, span) of the chunks RAG_DEDUP recorded instead
+    of indexing that match the filter, keyed by the indexed chunk each
+    duplicates. That chunk may belong to a source outside the filter."""
+    filter_sql, filter_params = _filter_sql(sources, pages)
+    aliases: dict[int, list[tuple]] = {}
+    for rowid, text, source, kept, *span in client.execute(
+        f"""
+        SELECT id, text, source, duplicate_of, page, page_end, line, line_end
+        FROM chunk_duplicates
+        WHERE 1{filter_sql}
+        """,
+        filter_params,
+    ):
+        aliases.setdefault(kept, []).append((rowid, text, source, _span(span)))
+    return aliases
+
+
+def _rowid_filter(
+    ids: Sequence[int], column: str = "rowid"
+) -> tuple[str, list]:
+    """An ``AND`` condition on ``column`` being one of ``ids``, bound as
+    one JSON parameter however many ids there are"""
+    sql = f" AND {column} IN (SELECT value FROM json_each(?))"
+    return sql, [json.dumps(ids)]
+
+
+def _vector_candidates(
+    client: sqlite3.Connection,
+    query_vec: np.ndarray,
+    k: int,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
+) -> list[tuple]:
+    """Top ``k`` (rowid, text, source, span, score) by vector similarity.
+
+    Filters run inside the KNN. A filtered search also matches the
+    filter's deduplicated chunks through their indexed copies, scored as
+    those copies.
+    """
+    rows = _knn(client, query_vec, k, *_filter_sql(sources, pages))
+    if sources or pages is not None:
+        aliases = _duplicate_aliases(client, sources, pages)
+        if aliases:
+            kept = list(aliases)
+            rows += [
+                (*alias, score)
+                for rowid, _, _, _, score in _knn(
+                    client, query_vec, k, *_rowid_filter(kept)
+                )
+                for alias in aliases[rowid]
+            ]
+            rows = sorted(rows, key=lambda row: row[4], reverse=True)[:k]
+    return rows
+
+
+def _knn(
+    client: sqlite3.Connection,
+    query_vec: np.ndarray,
+    k: int,
+    filter_sql: str = "",
+    filter_params: Sequence = (),
+) -> list[tuple]:
+    """Top ``k`` (rowid, text, source, span, score) of ``documents``
+    under extra ``AND`` conditions. A quantized index over-fetches
+    ``RAG_RESCORE_MULTIPLIER`` times as many candidates and re-ranks them
+    with the float vectors.
+    """
+    rescore = _keeps_float_vectors()
+    depth = k * _rescore_multiplier() if rescore else k
+    # ``k = ?`` rather than LIMIT: sqlite-vec only sees a LIMIT inside a
+    # CTE on SQLite 3.41+, and with the source partition key a filtered
+    # search returns up to k rows per partition, trimmed below
+    rows = client.execute(
+        f"""
+        WITH knn AS (
+            SELECT rowid, source, page, distance
+            FROM documents
+            WHERE embedding MATCH {VECTOR_SQL[_vector_storage]}
+                AND k = ?{filter_sql}
+        )
+        SELECT knn.rowid, c.text, knn.source,
+            {_SPAN_SQL.format(chunks="c", documents="knn")}, knn.distance
+        FROM knn JOIN chunks c ON c.id = knn.rowid
+        ORDER BY knn.distance
+        """,
+        (query_vec.tobytes(), depth, *filter_params),
+    ).fetchall()[:depth]
+    rows = [(*row[:3], _span(row[3:7]), _similarity(row[7])) for row in rows]
+    if rescore and rows:
+        rows = _rescore(client, query_vec, rows)[:k]
+    return rows
+
+
+def _fts_query(query: str) -> str | None:
+    # Any term may match; BM25 already weighs rare terms (names,
+    # technologies) over common ones
+    terms = dict.fromkeys(
+        term
+        for term in re.findall(r"\w+", query.lower())
+        if term not in RAGConstants.LEXICAL_STOPWORDS
+    )
+    if not terms:
+        return None
+    return " OR ".join(f'"{term}"' for term in terms)
+
+
+def _lexical_candidates(
+    client: sqlite3.Connection,
+    query: str,
+    k: int,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
+) -> list[tuple]:
+    """Top ``k`` (rowid, text, source, span) by BM25; like
+    _vector_candidates, filtered searches include deduplicated chunks"""
+    match = _fts_query(query)
+    if match is None:
+        return []
+    filter_sql, filter_params = _filter_sql(sources, pages, prefix="d.")
+    rows = _bm25(client, match, k, filter_sql, filter_params)
+    if sources or pages is not None:
+        aliases = _duplicate_aliases(client, sources, pages)
+        if aliases:
+            kept = list(aliases)
+            rows += [
+                (*alias, rank)
+                for rowid, _, _, _, rank in _bm25(
+                    client, match, k, *_rowid_filter(kept, "c.id")
+                )
+                for alias in aliases[rowid]
+            ]
+            # FTS5 ranks are negated BM25 scores: lower is better
+            rows = sorted(rows, key=lambda row: row[4])[:k]
+    return [row[:4] for row in rows]
+
+
+def _bm25(
+    client: sqlite3.Connection,
+    match: str,
+    k: int,
+    filter_sql: str,
+    filter_params: Sequence,
+) -> list[tuple]:
+    rows = client.execute(
+        f"""
+        SELECT c.id, c.text, c.source,
+            {_SPAN_SQL.format(chunks="c", documents="d")}, f.rank
+        FROM documents_fts f
+        JOIN chunks c ON c.id = f.rowid
+        JOIN documents d ON d.rowid = f.rowid
+        WHERE documents_fts MATCH ?{filter_sql}
+        ORDER BY f.rank
         LIMIT ?
         """,
-        (query_vec.tobytes(), top_k),
+        (match, *filter_params, k),
+    ).fetchall()
+    return [(*row[:3], _span(row[3:7]), row[7]) for row in rows]
+
+
+def search_hybrid(
+    query: str,
+    query_vec: np.ndarray,
+    top_k: int = 10,
+    min_score: float = 0.0,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
+) -> list[dict]:
+    """BM25 and KNN candidates fused with weighted reciprocal-rank fusion.
+
+    ``score`` is the fused RRF score. ``min_score`` applies to the vector
+    similarity of KNN candidates only; lexical matches always count.
+    """
+    depth = max(top_k, int(config.rag_hybrid_candidates))
+    rrf_k = float(config.rag_rrf_k)
+    weights = (
+        float(config.rag_vector_weight),
+        float(config.rag_lexical_weight),
     )
 
-    results = cursor.fetchall()
+    with get_sqlite_vec_pool().reader() as client:
+        vector_rows = _vector_candidates(
+            client, query_vec, depth, sources, pages
+        )
+        lexical_rows = _lexical_candidates(
+            client, query, depth, sources, pages
+        )
+    print(
+        f"[RAG] Found {len(vector_rows)} vector and "
+        f"{len(lexical_rows)} lexical candidates"
+    )
+
+    vector_rows = [row[:4] for row in vector_rows if row[4] >= min_score]
+
+    fused: dict[int, dict] = {}
+    for weight, rows in zip(weights, (vector_rows, lexical_rows)):
+        for rank, (rowid, text, source, span) in enumerate(rows, start=1):
+            entry = fused.setdefault(
+                rowid,
+                {"text": text, "source": source, **span, "score": 0.0},
+            )
+            entry["score"] += weight / (rrf_k + rank)
+
+    results = sorted(fused.values(), key=lambda c: c["score"], reverse=True)
+    return results[:top_k]
+
+
+def search_by_vector(
+    query_vec: np.ndarray,
+    top_k: int = 10,
+    min_score: float = 0.0,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
+) -> list[dict]:
+    with get_sqlite_vec_pool().reader() as client:
+        results = _vector_candidates(client, query_vec, top_k, sources, pages)
     print(f"[RAG] Found {len(results)} results")
 
     formatted_results = []
     for row in results:
-        rowid, text, source, page, distance = row
-        similarity = 1.0 / (1.0 + distance) if distance > 0 else 1.0
+        rowid, text, source, span, similarity = row
 
         if similarity >= min_score:
             print(
@@ -114,7 +1596,7 @@ def search_chunks(
                 {
                     "text": text,
                     "source": source,
-                    "page": page,
+                    **span,
                     "score": similarity,
                 }
             )
@@ -122,39 +1604,28 @@ def search_chunks(
     return formatted_results
 
 
-def get_rag_context(query: str, top_k: int = 10) -> str:
-    chunks = search_chunks(query, top_k)
-    print(f"Retrieved chunks: {chunks}")
+async def asearch_chunks(
+    query: str,
+    top_k: int = 10,
+    min_score: float = 0.0,
+    sources: Sequence[str] | None = None,
+    pages: tuple[int, int] | None = None,
+) -> list[dict]:
+    print(f"[RAG] Searching for: {query}")
+    query_vec = await aembed_query(query)
+    if _hybrid_enabled():
+        return await get_rag_executor().run(
+            search_hybrid, query, query_vec, top_k, min_score, sources, pages
+        )
+    return await get_rag_executor().run(
+        search_by_vector, query_vec, top_k, min_score, sources, pages
+    )
 
-    from datetime import datetime
-
-    current_year = datetime.now().year
-    keywords = [
-        "currently",
-        "current",
-        "now",
-        "today",
-        "present",
-        "sekarang",
-        "skrg",
-        "kini",
-        "sekar",
-        "saat ini",
-    ]
-    year_keywords = [str(y) for y in range(current_year - 2, current_year + 1)]
-
-    if any(keyword in query.lower() for keyword in keywords + year_keywords):
-        has_insignia = any("Insignia" in c.get("text", "") for c in chunks)
-        if not has_insignia:
-            insignia_results = search_chunks(
-                "Insignia Senior Fullstack Engineer", top_k=3
-            )
-            for r in insignia_results:
-                if "Insignia" in r.get("text", ""):
-                    chunks.insert(0, r)
-                    print(
-                        f"[RAG] Added Insignia result for current work query"
-                    )
-                    break
 
-    return "\n---\n".join([c["text"] for c in chunks])
+async def aget_rag_chunks(
+    query: str, top_k: int = 10, sources: Sequence[str] | None = None
+) -> list[dict]:
+    chunks = await asearch_chunks(query, top_k, sources=sources)
+    print(f"Retrieved chunks: {chunks}")
+
+    return pinned_chunks.apply(query, chunks, sources)
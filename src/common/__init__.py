@@ -1,4 +1,4 @@
-from src.common.constants import LLMConstants
+from src.common.constants import LLMConstants, RAGConstants
 from src.common.exceptions import LLMError
 
-__all__ = ["LLMConstants", "LLMError"]
+__all__ = ["LLMConstants", "LLMError", "RAGConstants"]
@@ -14,3 +14,61 @@ class LLMConstants:
         "stop": "```",
         "stream": True,
     }
+
+    # Prompt token budget (system prompt, history, RAG context and the
+    # question) per model; unlisted models use CONTEXT_TOKEN_BUDGET.
+    # Override with CONTEXT_MODEL_BUDGETS (JSON object of model -> tokens).
+    CONTEXT_BUDGETS = {
+        "meta-llama/llama-3.2-1b-instruct:free": 2000,
+    }
+
+
+class RAGConstants:
+    # Chunks whose text matches one of these patterns get the tag at index
+    # time. Override with RAG_TAG_RULES (JSON object of tag -> patterns).
+    TAG_RULES = {
+        "current_role": [r"\bPresent\b"],
+    }
+
+    # Chunks carrying ``tag`` are injected into the context, without a
+    # search, when the query contains one of ``keywords`` or one of the
+    # last ``recent_years`` years. Override with RAG_PIN_RULES (JSON list).
+    PIN_RULES = [
+        {
+            "tag": "current_role",
+            "keywords": [
+                "currently",
+                "current",
+                "now",
+                "today",
+                "present",
+                "sekarang",
+                "skrg",
+                "kini",
+                "sekar",
+                "saat ini",
+            ],
+            "recent_years": 2,
+            "max_chunks": 1,
+        },
+    ]
+
+    # Left out of the FTS5 query so BM25 candidates come from the terms
+    # that carry meaning, not from question boilerplate
+    LEXICAL_STOPWORDS = frozenset(
+        """
+        a about all an and any are as at be been but by can did do does
+        for from had has have he her him his how i in is it its me my of
+        on or our she so tell than that the their them then there they
+        this to us was we were what when where which who whom why will
+        with you your
+        """.split()
+    )
+
+    # Nearest neighbours checked for a near-duplicate of a new chunk; the
+    # closest may be chunks of its own source, which never count
+    DEDUP_CANDIDATES = 8
+
+    # Seconds the index version is served from memory; writes by this
+    # process refresh it at once, other processes' within this interval
+    INDEX_VERSION_TTL = 1.0
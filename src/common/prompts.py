@@ -41,3 +41,29 @@ out_of_context_protocol: >
   If the user greets (e.g. "hi", "hello"), respond briefly and encourage them to ask a question about Ilyas' work or projects.
 
 """
+
+    # User turn sent upstream when RAG found context; only the question
+    # itself is kept in session memory
+    RAG_CONTEXT_TEMPLATE = """Context information:
+{current_context}
+
+Relevant information about Ilyas:
+{context}
+
+User question: {question}"""
+
+    # Compacts old turns for the optional summarizing memory
+    CONVERSATION_SUMMARY_PROMPT = """Update the running summary of a conversation between a visitor and an assistant that answers questions about Ilyas Abduttawab.
+Keep the facts the assistant gave and what the visitor wanted to know. Write plain sentences, at most {max_words} words.
+
+Current summary:
+{summary}
+
+New turns:
+{conversation}
+
+Updated summary:"""
+
+    # Sent ahead of recent history when a session has a summary
+    SUMMARY_CONTEXT_TEMPLATE = """Summary of the earlier conversation:
+{summary}"""
@@ -38,6 +38,146 @@ class Config:
                         # Set default vector database path
                         if not hasattr(self, "sqlite_db_path"):
                             self.sqlite_db_path = "vectors.db"
+                        if not hasattr(self, "sqlite_busy_timeout_ms"):
+                            self.sqlite_busy_timeout_ms = "5000"
+                        if not hasattr(self, "rag_executor_workers"):
+                            self.rag_executor_workers = "2"
+                        if not hasattr(self, "index_batch_size"):
+                            self.index_batch_size = "64"
+                        if not hasattr(self, "embedding_batch_max_size"):
+                            self.embedding_batch_max_size = "32"
+                        if not hasattr(self, "embedding_batch_max_wait_ms"):
+                            self.embedding_batch_max_wait_ms = "5"
+                        if not hasattr(self, "query_embedding_cache_size"):
+                            self.query_embedding_cache_size = "1024"
+                        if not hasattr(self, "query_embedding_cache_ttl_seconds"):
+                            self.query_embedding_cache_ttl_seconds = "3600"
+
+                        # Load and warm the embedding model in the lifespan
+                        if not hasattr(self, "embedding_warmup"):
+                            self.embedding_warmup = "false"
+                        # Embedding backend: torch (sentence-transformers)
+                        # or onnx (onnxruntime; EMBEDDING_ONNX_FILE may
+                        # name a quantized export). EMBEDDING_ONNX_MODEL
+                        # is a Hub repo id or a local directory
+                        if not hasattr(self, "embedding_backend"):
+                            self.embedding_backend = "torch"
+                        if not hasattr(self, "embedding_onnx_model"):
+                            self.embedding_onnx_model = ""
+                        if not hasattr(self, "embedding_onnx_file"):
+                            self.embedding_onnx_file = "onnx/model.onnx"
+
+                        # Background ingestion of uploads
+                        if not hasattr(self, "ingest_workers"):
+                            self.ingest_workers = "1"
+                        if not hasattr(self, "ingest_max_pending"):
+                            self.ingest_max_pending = "16"
+                        if not hasattr(self, "ingest_job_retention"):
+                            self.ingest_job_retention = "100"
+                        if not hasattr(self, "ingest_job_db_path"):
+                            self.ingest_job_db_path = "ingest_jobs.db"
+                        # PDF text extraction across worker processes
+                        # (0 = one per CPU) for documents of at least
+                        # PDF_PARALLEL_MIN_PAGES pages
+                        if not hasattr(self, "pdf_extract_processes"):
+                            self.pdf_extract_processes = "0"
+                        if not hasattr(self, "pdf_pages_per_shard"):
+                            self.pdf_pages_per_shard = "16"
+                        if not hasattr(self, "pdf_parallel_min_pages"):
+                            self.pdf_parallel_min_pages = "32"
+                        # Uploads are streamed to disk and rejected once
+                        # past these limits
+                        if not hasattr(self, "upload_max_bytes"):
+                            self.upload_max_bytes = "20971520"
+                        if not hasattr(self, "upload_max_pages"):
+                            self.upload_max_pages = "500"
+
+                        # Retrieval: vector (KNN only) or hybrid (KNN + BM25,
+                        # RRF), opt-in since its scores are fused ranks
+                        if not hasattr(self, "rag_retrieval"):
+                            self.rag_retrieval = "vector"
+                        if not hasattr(self, "rag_hybrid_candidates"):
+                            self.rag_hybrid_candidates = "30"
+                        if not hasattr(self, "rag_rrf_k"):
+                            self.rag_rrf_k = "60"
+                        if not hasattr(self, "rag_vector_weight"):
+                            self.rag_vector_weight = "1.0"
+                        if not hasattr(self, "rag_lexical_weight"):
+                            self.rag_lexical_weight = "1.0"
+
+                        # Dedup against other sources: off, exact or near
+                        if not hasattr(self, "rag_dedup"):
+                            self.rag_dedup = "exact"
+                        if not hasattr(self, "rag_dedup_threshold"):
+                            self.rag_dedup_threshold = "0.97"
+
+                        # Embedding storage for new indexes: float, int8 or bit
+                        if not hasattr(self, "rag_vector_storage"):
+                            self.rag_vector_storage = "float"
+                        if not hasattr(self, "rag_rescore_multiplier"):
+                            self.rag_rescore_multiplier = "4"
+
+                        # Token-budgeted prompt assembly
+                        if not hasattr(self, "context_token_budget"):
+                            self.context_token_budget = "3000"
+                        if not hasattr(self, "context_history_share"):
+                            self.context_history_share = "0.4"
+                        if not hasattr(self, "context_max_history_messages"):
+                            self.context_max_history_messages = "10"
+
+                        # Optional rolling summary of long sessions
+                        if not hasattr(self, "memory_summarization"):
+                            self.memory_summarization = "off"
+                        if not hasattr(self, "summary_model"):
+                            self.summary_model = ""
+                        if not hasattr(self, "summary_keep_recent"):
+                            self.summary_keep_recent = "10"
+                        if not hasattr(self, "summary_compact_batch"):
+                            self.summary_compact_batch = "10"
+                        if not hasattr(self, "summary_max_chars"):
+                            self.summary_max_chars = "2000"
+
+                        # Semantic cache of first-turn answers
+                        if not hasattr(self, "response_cache_enabled"):
+                            self.response_cache_enabled = "false"
+                        if not hasattr(self, "response_cache_size"):
+                            self.response_cache_size = "256"
+                        if not hasattr(self, "response_cache_threshold"):
+                            self.response_cache_threshold = "0.95"
+                        if not hasattr(self, "response_cache_ttl_seconds"):
+                            self.response_cache_ttl_seconds = "21600"
+
+                        # Credential validation cache
+                        if not hasattr(self, "auth_cache_ttl_seconds"):
+                            self.auth_cache_ttl_seconds = "300"
+                        if not hasattr(self, "auth_cache_failure_ttl_seconds"):
+                            self.auth_cache_failure_ttl_seconds = "10"
+                        if not hasattr(self, "auth_cache_max_entries"):
+                            self.auth_cache_max_entries = "1024"
+
+                        # Session store limits
+                        if not hasattr(self, "session_max_entries"):
+                            self.session_max_entries = "10000"
+                        if not hasattr(self, "session_max_bytes"):
+                            self.session_max_bytes = str(64 * 1024 * 1024)
+                        if not hasattr(self, "session_idle_ttl_seconds"):
+                            self.session_idle_ttl_seconds = "86400"
+                        if not hasattr(self, "session_backend"):
+                            self.session_backend = "memory"
+                        if not hasattr(self, "session_db_path"):
+                            self.session_db_path = "sessions.db"
+                        if not hasattr(self, "session_redis_url"):
+                            self.session_redis_url = ""
+
+                        # Pooled upstream HTTP clients
+                        if not hasattr(self, "http_max_connections"):
+                            self.http_max_connections = "100"
+                        if not hasattr(self, "http_max_keepalive_connections"):
+                            self.http_max_keepalive_connections = "20"
+                        if not hasattr(self, "http_keepalive_expiry"):
+                            self.http_keepalive_expiry = "30"
+                        if not hasattr(self, "http_http2"):
+                            self.http_http2 = "false"
 
                         # Set defaults for required variables
                         if not hasattr(self, "environment"):
@@ -1,28 +1,32 @@
 from starlette.middleware.base import BaseHTTPMiddleware
 from fastapi.responses import Response
 import uuid
+from src.modules.session_backends import create_session_backend
 from src.modules.simple_memory import SimpleMemory
 from fastapi import Request
 import time
 
-SESSION_MEMORY: dict[str, SimpleMemory] = {}
+SESSION_MEMORY = create_session_backend()
 
 def generate_session_id():
     return str(uuid.uuid4())
 
 def get_session(request: Request) -> dict:
+    # Only routes that depend on this create a session (and its cookie);
+    # health checks, bots and preflights never allocate memory. Routes
+    # behind credentials use get_authenticated_session instead
     session_id = request.state.session_id
-    memory = SESSION_MEMORY[session_id]
+    memory, created = SESSION_MEMORY.get_or_create(session_id)
+    if created:
+        request.state.session_created = True
     return {
         "session_id": session_id,
         "messages": memory.get_messages(),
     }
 
 def get_or_create_session_memory(session_id: str) -> SimpleMemory:
-    # This ensures that the session memory exists
-    if session_id not in SESSION_MEMORY:
-        SESSION_MEMORY[session_id] = SimpleMemory(messages=[])
-    return SESSION_MEMORY[session_id]
+    memory, _ = SESSION_MEMORY.get_or_create(session_id)
+    return memory
 
 class SessionMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request, call_next):
@@ -34,15 +38,12 @@ class SessionMiddleware(BaseHTTPMiddleware):
         else:
             request.state.new_session = False
 
-        # Always ensure memory is initialized
-        if session_id not in SESSION_MEMORY:
-            SESSION_MEMORY[session_id] = SimpleMemory(messages=[])
-
         request.state.session_id = session_id
+        request.state.session_created = False
 
         response: Response = await call_next(request)
 
-        if request.state.new_session:
+        if request.state.new_session and request.state.session_created:
             response.set_cookie(
                 key="session_id",
                 value=session_id,
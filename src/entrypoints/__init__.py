@@ -0,0 +1,5 @@
+import time
+
+# Runs just before main_app is imported, so the app's import time can be
+# measured without code ahead of main_app's own imports
+IMPORT_STARTED = time.perf_counter()
@@ -1,15 +1,70 @@
+import time
+from contextlib import asynccontextmanager
+
 from fastapi import APIRouter, FastAPI
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
-from src.configs.middleware import SessionMiddleware
-from src.application.api.auth import router as auth_router
+from src.adapters.llm_adapter import context_builder
+from src.modules.llm_modules import conversation_summarizer, response_cache
+from src.configs.middleware import SESSION_MEMORY, SessionMiddleware
+from src.application.api.auth import (
+    credential_cache,
+    router as auth_router,
+)
 from src.application.api.chat import router as chat_router
-from src.application.api.upload import router as upload_router
-from src.configs.configs import Config
+from src.application.ingest import pdf_extractor
+from src.application.api.upload import (
+    ingestion_jobs,
+    router as upload_router,
+)
+from src.application.rag import (
+    close_sqlite_vec_pool,
+    get_embedding_batcher,
+    get_rag_executor,
+    get_sqlite_vec_pool,
+    pinned_chunks,
+    prepare_index,
+    query_embedding_cache,
+    rag_readiness,
+    shutdown_rag_executor,
+    start_rag_warmup,
+    stop_embedding_batcher,
+)
+from src.configs.configs import Config, config
+from src.entrypoints import IMPORT_STARTED
+from src.modules.http_clients import (
+    close_http_clients,
+    init_http_clients,
+)
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from loguru import logger
 import sys
 
-app = FastAPI(title="Chat API with LLM")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the sqlite-vec pool and create the schema once, before serving
+    get_sqlite_vec_pool()
+    prepare_index()
+    get_rag_executor()
+    get_embedding_batcher().start()
+    init_http_clients()
+    ingestion_jobs.start()
+    # Lazy by default: the model loads on the first request or /readyz
+    if str(config.embedding_warmup).lower() in {"1", "true", "yes"}:
+        await start_rag_warmup()
+    yield
+    await ingestion_jobs.stop()
+    pdf_extractor.shutdown()
+    await conversation_summarizer.stop()
+    await close_http_clients()
+    await stop_embedding_batcher()
+    shutdown_rag_executor()
+    close_sqlite_vec_pool()
+    SESSION_MEMORY.close()
+
+
+app = FastAPI(title="Chat API with LLM", lifespan=lifespan)
 
 # Configure loguru to output to stderr (captured by uvicorn)
 logger.remove()
@@ -46,5 +101,37 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/readyz")
+async def readiness_check():
+    # Ready once the model and index are warm; the first probe starts the
+    # warmup when the lifespan did not
+    status = {**rag_readiness(), "import_ms": IMPORT_MS}
+    if not status["ready"]:
+        start_rag_warmup()
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "startup": {**rag_readiness(), "import_ms": IMPORT_MS},
+        "sqlite_vec_pool": get_sqlite_vec_pool().stats(),
+        "rag_executor": get_rag_executor().stats(),
+        "embedding_batcher": get_embedding_batcher().stats(),
+        "query_embedding_cache": query_embedding_cache.stats(),
+        "pinned_chunks": pinned_chunks.stats(),
+        "credential_cache": credential_cache.stats(),
+        "http_clients": init_http_clients().stats(),
+        "sessions": SESSION_MEMORY.stats(),
+        "context_builder": context_builder.stats(),
+        "conversation_summarizer": conversation_summarizer.stats(),
+        "response_cache": response_cache.stats(),
+        "ingestion": ingestion_jobs.stats(),
+        "pdf_extractor": pdf_extractor.stats(),
+    }
+
 # Include the parent router in the app
 app.include_router(api_router)
+
+IMPORT_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+logger.info(f"App imported in {IMPORT_MS} ms")
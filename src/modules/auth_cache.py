@@ -0,0 +1,147 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional
+
+from fastapi import HTTPException
+from loguru import logger
+
+
+class CredentialCache:
+    """TTL cache of validated (api_key, api_url, model) tuples.
+
+    Keys never hold the raw API key, only its SHA-256 digest. Concurrent
+    validations of the same credentials share one upstream call, and
+    failures are remembered for ``failure_ttl`` seconds so a bad key
+    cannot be used to hammer the provider.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        failure_ttl: float = 10.0,
+        max_entries: int = 1024,
+    ):
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.max_entries = max_entries
+
+        # key -> (expires_at, error or None)
+        self._entries: OrderedDict[
+            str, tuple[float, Optional[HTTPException]]
+        ] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.failures = 0
+
+    @staticmethod
+    def make_key(api_key: str, api_url: str, use_model: Optional[str]) -> str:
+        digest = hashlib.sha256(api_key.encode("utf-8")).hexdigest()
+        return f"{digest}|{api_url.rstrip('/')}|{use_model or ''}"
+
+    def _get(
+        self, key: str
+    ) -> Optional[tuple[float, Optional[HTTPException]]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _put(self, key: str, error: Optional[HTTPException]):
+        ttl = self.failure_ttl if error is not None else self.ttl
+        self._entries[key] = (time.monotonic() + ttl, error)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def validate(
+        self,
+        api_key: str,
+        api_url: str,
+        use_model: Optional[str],
+        validator: Callable[[str, str, Optional[str]], Awaitable[Any]],
+    ) -> None:
+        """Raise HTTPException unless the credentials are known to be valid."""
+        key = self.make_key(api_key, api_url, use_model)
+
+        while True:
+            entry = self._get(key)
+            if entry is not None:
+                self.hits += 1
+                error = entry[1]
+                if error is not None:
+                    raise HTTPException(
+                        status_code=error.status_code, detail=error.detail
+                    )
+                return
+
+            inflight = self._inflight.get(key)
+            if inflight is None:
+                break
+            self.coalesced += 1
+            # wait() does not raise the leader's cancellation in this task
+            await asyncio.wait((inflight,))
+            if inflight.cancelled():
+                # The leader gave up before learning anything; look again
+                # and validate as the new leader if nobody else has
+                continue
+            error = inflight.result()
+            if error is not None:
+                raise HTTPException(
+                    status_code=error.status_code, detail=error.detail
+                )
+            return
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        error: Optional[HTTPException] = None
+        try:
+            response = await validator(api_key, api_url, use_model)
+            if response.status_code != 200:
+                error = HTTPException(
+                    status_code=401, detail="Invalid API credentials"
+                )
+        except HTTPException as e:
+            error = e
+        except Exception as e:
+            logger.error(f"Credential validation failed: {e}")
+            error = HTTPException(
+                status_code=500, detail=f"Credential validation failed: {e}"
+            )
+        except BaseException:
+            # Cancelled: nothing was learned about the credentials
+            self._inflight.pop(key, None)
+            future.cancel()
+            raise
+
+        if error is not None:
+            self.failures += 1
+        self._put(key, error)
+        self._inflight.pop(key, None)
+        future.set_result(error)
+
+        if error is not None:
+            raise error
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "failures": self.failures,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,83 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+
+
+class BoundedExecutor:
+    """Fixed-size thread pool for blocking work called from async code.
+
+    Keeps counters of how many jobs are waiting for a worker, how many are
+    running and how long they waited, so saturation shows up in metrics
+    instead of as unexplained latency.
+    """
+
+    def __init__(self, max_workers: int, name: str = "worker"):
+        self.max_workers = max_workers
+        self.name = name
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix=name
+        )
+        self._lock = threading.Lock()
+
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.failed = 0
+        self.max_queue_depth = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    def _run(self, submitted: float, fn: Callable[..., Any]) -> Any:
+        waited = time.perf_counter() - submitted
+        with self._lock:
+            self.queued -= 1
+            self.active += 1
+            self._wait_total += waited
+            self._wait_max = max(self._wait_max, waited)
+        try:
+            result = fn()
+        except BaseException:
+            with self._lock:
+                self.failed += 1
+            raise
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+        return result
+
+    async def run(self, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run ``fn(*args, **kwargs)`` on the pool and await its result."""
+        with self._lock:
+            self.queued += 1
+            self.max_queue_depth = max(self.max_queue_depth, self.queued)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor,
+            self._run,
+            time.perf_counter(),
+            partial(fn, *args, **kwargs),
+        )
+
+    def shutdown(self, wait: bool = True):
+        self._executor.shutdown(wait=wait)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "failed": self.failed,
+                "max_queue_depth": self.max_queue_depth,
+                "wait_ms_avg": round(
+                    self._wait_total / self.completed * 1000, 3
+                )
+                if self.completed
+                else 0.0,
+                "wait_ms_max": round(self._wait_max * 1000, 3),
+            }
@@ -0,0 +1,199 @@
+import json
+import threading
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from src.common.prompts import Prompts
+
+# Rough token estimate for English text; close enough for budgeting
+# without pulling a tokenizer for every upstream model
+CHARS_PER_TOKEN = 4
+MESSAGE_OVERHEAD_TOKENS = 4
+
+CHUNK_SEPARATOR = "\n---\n"
+RAG_BLOCK_PREFIX = "Context information:"
+RAG_QUESTION_MARKER = "User question: "
+
+
+def estimate_tokens(text: str) -> int:
+    return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+
+
+def strip_rag_context(content: str) -> str:
+    """Reduce a stored user turn to the question it asked.
+
+    Sessions written before questions were stored raw still hold the
+    whole RAG block; only the text after the last marker is kept.
+    """
+    if content.startswith(RAG_BLOCK_PREFIX) and RAG_QUESTION_MARKER in content:
+        return content.rsplit(RAG_QUESTION_MARKER, 1)[1]
+    return content
+
+
+def parse_context_budgets(raw: Optional[str], default: dict) -> dict[str, int]:
+    budgets = json.loads(raw) if raw else default
+    return {model: int(tokens) for model, tokens in budgets.items()}
+
+
+class ContextBuilder:
+    """Assemble the prompt for one turn within a per-model token budget.
+
+    The system prompt and the current question always go in. Recent
+    history, stripped of old RAG blocks, may take up to ``history_share``
+    of what is left, newest turns first; a conversation summary, when the
+    session has one, comes out of that share first. The rest is filled
+    with retrieved chunks: pinned ones first, then by descending score.
+    """
+
+    def __init__(
+        self,
+        default_budget: int,
+        budgets: Optional[dict[str, int]] = None,
+        history_share: float = 0.4,
+        max_history_messages: int = 10,
+    ):
+        self.default_budget = default_budget
+        self.budgets = budgets or {}
+        self.history_share = history_share
+        self.max_history_messages = max_history_messages
+        self._lock = threading.Lock()
+
+        self.builds = 0
+        self.prompt_tokens_total = 0
+        self.prompt_tokens_max = 0
+        self.chunks_used = 0
+        self.chunks_dropped = 0
+        self.history_dropped = 0
+        self.rag_blocks_stripped = 0
+        self.summaries_used = 0
+        self.last_prompt_tokens = 0
+
+    def budget_for(self, model: Optional[str]) -> int:
+        return self.budgets.get(model, self.default_budget)
+
+    @staticmethod
+    def _message_tokens(content: str) -> int:
+        return estimate_tokens(content) + MESSAGE_OVERHEAD_TOKENS
+
+    def _select_history(
+        self, history: List[Dict[str, str]], budget: int
+    ) -> tuple[List[Dict[str, str]], int, int]:
+        selected, used, stripped = [], 0, 0
+        for message in reversed(history):
+            content = message["content"]
+            if message["role"] == "user":
+                raw = strip_rag_context(content)
+                if raw is not content:
+                    stripped += 1
+                content = raw
+            tokens = self._message_tokens(content)
+            if used + tokens > budget:
+                break
+            selected.append({"role": message["role"], "content": content})
+            used += tokens
+        selected.reverse()
+        return selected, used, stripped
+
+    def _select_chunks(self, chunks: List[dict], budget: int) -> List[str]:
+        # Pinned chunks carry no score and always rank first
+        ranked = sorted(
+            chunks,
+            key=lambda c: (c.get("score") is not None, -(c.get("score") or 0)),
+        )
+        selected, used = [], 0
+        for chunk in ranked:
+            tokens = estimate_tokens(chunk["text"] + CHUNK_SEPARATOR)
+            if used + tokens <= budget:
+                selected.append(chunk["text"])
+                used += tokens
+        return selected
+
+    def build(
+        self,
+        system_prompt: str,
+        history: List[Dict[str, str]],
+        question: str,
+        chunks: List[dict],
+        current_context: str,
+        model: Optional[str] = None,
+        summary: str = "",
+    ) -> List[Dict[str, str]]:
+        budget = self.budget_for(model)
+        empty_block = Prompts.RAG_CONTEXT_TEMPLATE.format(
+            current_context=current_context, context="", question=question
+        )
+        remaining = (
+            budget
+            - self._message_tokens(system_prompt)
+            - self._message_tokens(empty_block)
+        )
+
+        history_budget = max(0, int(remaining * self.history_share))
+        summary_message = None
+        if summary:
+            content = Prompts.SUMMARY_CONTEXT_TEMPLATE.format(summary=summary)
+            tokens = self._message_tokens(content)
+            if tokens <= history_budget:
+                summary_message = {"role": "system", "content": content}
+                history_budget -= tokens
+                remaining -= tokens
+
+        # history[-0:] would be the whole conversation, not none of it
+        limit = self.max_history_messages
+        candidates = history[-limit:] if limit > 0 else []
+        history, history_tokens, stripped = self._select_history(
+            candidates, history_budget
+        )
+        remaining -= history_tokens
+
+        texts = self._select_chunks(chunks, max(0, remaining))
+        if texts:
+            user_content = Prompts.RAG_CONTEXT_TEMPLATE.format(
+                current_context=current_context,
+                context=CHUNK_SEPARATOR.join(texts),
+                question=question,
+            )
+        else:
+            user_content = question
+
+        messages = [{"role": "system", "content": system_prompt}]
+        if summary_message is not None:
+            messages.append(summary_message)
+        messages.extend(history)
+        messages.append({"role": "user", "content": user_content})
+
+        prompt_tokens = sum(
+            self._message_tokens(m["content"]) for m in messages
+        )
+        with self._lock:
+            self.builds += 1
+            self.prompt_tokens_total += prompt_tokens
+            self.prompt_tokens_max = max(self.prompt_tokens_max, prompt_tokens)
+            self.chunks_used += len(texts)
+            self.chunks_dropped += len(chunks) - len(texts)
+            self.history_dropped += len(candidates) - len(history)
+            self.rag_blocks_stripped += stripped
+            self.summaries_used += summary_message is not None
+            self.last_prompt_tokens = prompt_tokens
+        logger.info(f"Prompt tokens (estimated): {prompt_tokens} of {budget}")
+        return messages
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "builds": self.builds,
+                "default_budget": self.default_budget,
+                "prompt_tokens_avg": (
+                    round(self.prompt_tokens_total / self.builds, 1)
+                    if self.builds
+                    else 0.0
+                ),
+                "prompt_tokens_max": self.prompt_tokens_max,
+                "prompt_tokens_last": self.last_prompt_tokens,
+                "chunks_used": self.chunks_used,
+                "chunks_dropped": self.chunks_dropped,
+                "history_dropped": self.history_dropped,
+                "rag_blocks_stripped": self.rag_blocks_stripped,
+                "summaries_used": self.summaries_used,
+            }
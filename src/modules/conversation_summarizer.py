@@ -0,0 +1,221 @@
+import asyncio
+import re
+from typing import Dict, List, Optional
+
+from loguru import logger
+
+from src.common.prompts import Prompts
+from src.modules.http_clients import get_http_client
+from src.modules.simple_memory import SimpleMemory
+
+SUMMARY_MODES = ("off", "extractive", "llm")
+
+# A summary may take at most this share of the bytes it replaces
+MAX_SUMMARY_RATIO = 0.5
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _stored_bytes(messages: List[Dict[str, str]], summary: str) -> int:
+    return len(summary.encode()) + sum(
+        len(m["content"].encode()) for m in messages
+    )
+
+
+def extractive_summary(
+    previous: str, messages: List[Dict[str, str]], max_chars: int
+) -> str:
+    """Keep each question and the first sentence of each answer.
+
+    The oldest lines are dropped first once the summary is over
+    ``max_chars``.
+    """
+    lines = previous.splitlines() if previous else []
+    for message in messages:
+        text = " ".join(message["content"].split())
+        if message["role"] == "user":
+            lines.append(f"Visitor asked: {text[:200]}")
+        else:
+            lines.append(
+                f"Assistant said: {_SENTENCE_END.split(text, 1)[0][:300]}"
+            )
+
+    while lines and len("\n".join(lines)) > max_chars:
+        lines.pop(0)
+    return "\n".join(lines)
+
+
+async def llm_summary(
+    previous: str,
+    messages: List[Dict[str, str]],
+    max_chars: int,
+    model: str,
+    api_key: str,
+    api_url: str,
+    timeout: float = 30.0,
+) -> str:
+    conversation = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+    prompt = Prompts.CONVERSATION_SUMMARY_PROMPT.format(
+        max_words=max_chars // 6,
+        summary=previous or "(none)",
+        conversation=conversation,
+    )
+
+    if not api_url.endswith("/v1") and not api_url.endswith("/v1/"):
+        api_url = f"{api_url}/v1"
+    full_url = f"{api_url.rstrip('/')}/chat/completions"
+
+    response = await get_http_client(full_url).post(
+        full_url,
+        headers={
+            "Authorization": f"Bearer {api_key}",
+            "Content-Type": "application/json",
+        },
+        json={
+            "model": model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": 0,
+            "max_tokens": max_chars // 4,
+            "stream": False,
+        },
+        timeout=timeout,
+    )
+    response.raise_for_status()
+    summary = response.json()["choices"][0]["message"]["content"].strip()
+    return summary[:max_chars]
+
+
+class ConversationSummarizer:
+    """Fold old session turns into a running summary in the background.
+
+    After a turn, a session holding at least ``keep_recent +
+    compact_batch`` messages has everything but the last ``keep_recent``
+    replaced by a summary, written either by a (cheap) LLM or by
+    ``extractive_summary``. LLM failures fall back to the extractive
+    summary. The summary is capped at MAX_SUMMARY_RATIO of the bytes it
+    replaces, and a compaction that would not shrink the session is
+    skipped. Mode ``off`` leaves memory untouched.
+    """
+
+    def __init__(
+        self,
+        mode: str = "off",
+        keep_recent: int = 10,
+        compact_batch: int = 10,
+        max_chars: int = 2000,
+        model: Optional[str] = None,
+        timeout: float = 30.0,
+    ):
+        if mode not in SUMMARY_MODES:
+            raise ValueError(
+                f"Invalid summarization mode {mode!r}; "
+                f"expected one of {', '.join(SUMMARY_MODES)}"
+            )
+        self.mode = mode
+        self.keep_recent = keep_recent
+        self.compact_batch = compact_batch
+        self.max_chars = max_chars
+        self.model = model
+        self.timeout = timeout
+        self._inflight: dict = {}
+
+        self.compactions = 0
+        self.messages_compacted = 0
+        self.bytes_reclaimed = 0
+        self.skipped = 0
+        self.llm_failures = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    def schedule(
+        self,
+        memory: SimpleMemory,
+        api_key: Optional[str] = None,
+        api_url: Optional[str] = None,
+        model: Optional[str] = None,
+    ):
+        """Start a compaction for this session unless one is running."""
+        if not self.enabled:
+            return
+        key = memory.session_id or id(memory)
+        if key in self._inflight:
+            return
+        task = asyncio.create_task(
+            self._compact(memory, api_key, api_url, self.model or model)
+        )
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+    async def _compact(
+        self,
+        memory: SimpleMemory,
+        api_key: Optional[str],
+        api_url: Optional[str],
+        model: Optional[str],
+    ):
+        # Shared backends do blocking I/O, so memory calls go to a thread
+        messages = list(await asyncio.to_thread(memory.get_messages))
+        if len(messages) < self.keep_recent + self.compact_batch:
+            return
+        drop = len(messages) - self.keep_recent
+        previous = await asyncio.to_thread(memory.get_summary)
+        # Short turns can summarize into more text than they take, e.g.
+        # with the extractive "Visitor asked:" prefixes
+        max_chars = min(
+            self.max_chars,
+            int(_stored_bytes(messages[:drop], previous) * MAX_SUMMARY_RATIO),
+        )
+
+        summary = None
+        if self.mode == "llm" and api_key and api_url and model:
+            try:
+                summary = await llm_summary(
+                    previous,
+                    messages[:drop],
+                    max_chars,
+                    model,
+                    api_key,
+                    api_url,
+                    self.timeout,
+                )
+            except Exception as e:
+                self.llm_failures += 1
+                logger.warning(f"LLM summary failed, using extractive: {e}")
+        if not summary:
+            summary = extractive_summary(previous, messages[:drop], max_chars)
+
+        before = _stored_bytes(messages, previous)
+        after = _stored_bytes(messages[drop:], summary)
+        if after >= before:
+            # Multi-byte text can still outgrow a character budget
+            self.skipped += 1
+            return
+
+        # Turns added while summarizing are newer than ``drop`` and kept
+        await asyncio.to_thread(memory.compact, summary, drop)
+        self.compactions += 1
+        self.messages_compacted += drop
+        self.bytes_reclaimed += before - after
+        logger.info(
+            f"Compacted {drop} messages into a {len(summary)}-char summary; "
+            f"session stores {after} bytes (was {before})"
+        )
+
+    async def stop(self):
+        tasks = list(self._inflight.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "in_flight": len(self._inflight),
+            "compactions": self.compactions,
+            "messages_compacted": self.messages_compacted,
+            "bytes_reclaimed": self.bytes_reclaimed,
+            "skipped": self.skipped,
+            "llm_failures": self.llm_failures,
+        }
@@ -0,0 +1,125 @@
+import os
+from typing import Optional
+
+import numpy as np
+from loguru import logger
+
+EMBEDDING_BACKENDS = ("torch", "onnx")
+
+
+class TorchBackend:
+    """sentence-transformers on torch, the reference implementation."""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        return self.model.encode(
+            texts, batch_size=len(texts), show_progress_bar=False
+        )
+
+
+class OnnxBackend:
+    """The same model exported to ONNX, run by onnxruntime without torch.
+
+    Reproduces the sentence-transformers pipeline of all-MiniLM-L6-v2
+    (WordPiece tokenizer, mean pooling over the attention mask, L2
+    normalization), so vectors are interchangeable with TorchBackend and
+    an index built by one can be queried by the other. ``onnx_file`` may
+    point at a quantized export such as ``onnx/model_qint8_avx2.onnx``.
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model: str,
+        onnx_file: str = "onnx/model.onnx",
+        max_length: int = 256,
+        threads: Optional[int] = None,
+    ):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        self.tokenizer = Tokenizer.from_file(
+            self._resolve(model, "tokenizer.json")
+        )
+        self.tokenizer.enable_truncation(max_length)
+        self.tokenizer.enable_padding()
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            self._resolve(model, onnx_file),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.onnx_file = onnx_file
+
+    @staticmethod
+    def _resolve(model: str, filename: str) -> str:
+        """A file from a local model directory, or from the Hugging Face
+        Hub (cached) when ``model`` is a repo id"""
+        if os.path.isdir(model):
+            return os.path.join(model, filename)
+        from huggingface_hub import hf_hub_download
+
+        return hf_hub_download(model, filename)
+
+    def encode(self, texts: list[str]) -> np.ndarray:
+        encodings = self.tokenizer.encode_batch(texts)
+        input_ids = np.array([e.ids for e in encodings], dtype=np.int64)
+        attention_mask = np.array(
+            [e.attention_mask for e in encodings], dtype=np.int64
+        )
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self.input_names:
+            feeds["token_type_ids"] = np.array(
+                [e.type_ids for e in encodings], dtype=np.int64
+            )
+
+        hidden = self.session.run(None, feeds)[0]
+        mask = attention_mask[..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(
+            mask.sum(axis=1), 1e-9, None
+        )
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return (pooled / np.clip(norms, 1e-12, None)).astype(np.float32)
+
+
+def create_embedding_backend(
+    backend: str,
+    model_name: str,
+    onnx_model: Optional[str] = None,
+    onnx_file: str = "onnx/model.onnx",
+    threads: Optional[int] = None,
+):
+    """Build the configured backend, falling back to torch (with a
+    warning) when the onnx extra is not installed"""
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Invalid embedding backend {backend!r}; "
+            f"expected one of {', '.join(EMBEDDING_BACKENDS)}"
+        )
+
+    if backend == "onnx":
+        if onnx_model is None:
+            onnx_model = (
+                model_name
+                if "/" in model_name
+                else f"sentence-transformers/{model_name}"
+            )
+        try:
+            return OnnxBackend(onnx_model, onnx_file, threads=threads)
+        except ImportError:
+            logger.warning(
+                "onnxruntime/tokenizers not installed (pip install "
+                "'.[onnx]'); using the torch embedding backend"
+            )
+    return TorchBackend(model_name)
@@ -0,0 +1,126 @@
+import asyncio
+import time
+from typing import Callable, Optional
+
+import numpy as np
+from loguru import logger
+
+from src.modules.bounded_executor import BoundedExecutor
+from src.modules.metrics import Histogram
+
+
+class EmbeddingBatcher:
+    """Collects query texts from concurrent requests into one encode call.
+
+    Each caller awaits a future for its own vector. The background task
+    takes the first queued text, keeps collecting for up to
+    ``max_wait_ms`` or until ``max_batch_size`` texts are waiting, then
+    runs a single batched encode on the executor. Requests that arrive
+    while a batch is encoding simply form the next batch.
+    """
+
+    def __init__(
+        self,
+        encode: Callable[[list[str]], np.ndarray],
+        executor: BoundedExecutor,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        self.encode = encode
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+        self.batch_sizes = Histogram([1, 2, 4, 8, 16, 32, 64])
+        self.wait_ms = Histogram([1, 2, 5, 10, 25, 50, 100, 250])
+        self.encode_ms = Histogram([5, 10, 25, 50, 100, 250, 500, 1000])
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future, _ = self._queue.get_nowait()
+                if not future.done():
+                    future.cancel()
+            self._queue = None
+
+    async def embed(self, text: str) -> np.ndarray:
+        """Return the embedding of ``text``, batched with concurrent calls."""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            if not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+                continue
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(
+                    await asyncio.wait_for(self._queue.get(), remaining)
+                )
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._collect()
+            batch = [item for item in batch if not item[1].done()]
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for _, _, enqueued in batch:
+                self.wait_ms.observe((started - enqueued) * 1000)
+            self.batch_sizes.observe(len(batch))
+
+            try:
+                vectors = await self.executor.run(
+                    self.encode, [text for text, _, _ in batch]
+                )
+            except asyncio.CancelledError:
+                for _, future, _ in batch:
+                    future.cancel()
+                raise
+            except Exception as e:
+                logger.error(f"Batched embedding failed: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.encode_ms.observe((time.perf_counter() - started) * 1000)
+            for (_, future, _), vector in zip(batch, vectors):
+                if not future.done():
+                    future.set_result(vector)
+
+    def stats(self) -> dict:
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000,
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "batch_size": self.batch_sizes.snapshot(),
+            "wait_ms": self.wait_ms.snapshot(),
+            "encode_ms": self.encode_ms.snapshot(),
+        }
@@ -0,0 +1,92 @@
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Bounded LRU/TTL cache of query vectors keyed by normalized text.
+
+    ``normalize`` decides which queries share an entry; the caller must
+    embed the normalized text itself so the cached vector is exactly what
+    a miss would have produced.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: float = 3600.0,
+        normalize: Optional[Callable[[str], str]] = None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.normalize = normalize or self.default_normalize
+
+        # key -> (expires_at, vector)
+        self._entries: OrderedDict[str, tuple[float, np.ndarray]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def default_normalize(text: str) -> str:
+        return re.sub(r"\s+", " ", text).strip().lower()
+
+    @staticmethod
+    def _entry_bytes(key: str, vector: np.ndarray) -> int:
+        return sys.getsizeof(key) + vector.nbytes
+
+    def _drop(self, key: str):
+        _, vector = self._entries.pop(key)
+        self._bytes -= self._entry_bytes(key, vector)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: str, vector: np.ndarray):
+        vector = np.asarray(vector, dtype="float32")
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, vector)
+            self._bytes += self._entry_bytes(key, vector)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
@@ -0,0 +1,111 @@
+import importlib.util
+import threading
+from urllib.parse import urlsplit
+
+import httpx
+from loguru import logger
+
+from src.configs.configs import config
+
+
+class HTTPClientRegistry:
+    """One pooled ``httpx.AsyncClient`` per upstream host.
+
+    Clients are keyed by scheme, host and port so every request to the
+    same provider reuses warm keep-alive connections instead of paying a
+    TCP+TLS handshake. Timeouts are still passed per request.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 30.0,
+        http2: bool = False,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.warning(
+                "HTTP/2 requested but the h2 package is missing; "
+                "install httpx[http2]. Falling back to HTTP/1.1"
+            )
+            http2 = False
+        self.http2 = http2
+
+        self._clients: dict[str, httpx.AsyncClient] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "HTTPClientRegistry":
+        return cls(
+            max_connections=int(config.http_max_connections),
+            max_keepalive_connections=int(
+                config.http_max_keepalive_connections
+            ),
+            keepalive_expiry=float(config.http_keepalive_expiry),
+            http2=str(config.http_http2).lower() in {"1", "true", "yes"},
+        )
+
+    @staticmethod
+    def _host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}".lower()
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """Return the shared client for the host serving ``url``."""
+        key = self._host_key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            with self._lock:
+                client = self._clients.get(key)
+                if client is None or client.is_closed:
+                    client = httpx.AsyncClient(
+                        limits=self.limits, http2=self.http2
+                    )
+                    self._clients[key] = client
+                    logger.info(f"Created pooled HTTP client for {key}")
+        return client
+
+    async def aclose(self):
+        with self._lock:
+            clients = list(self._clients.items())
+            self._clients.clear()
+        for key, client in clients:
+            await client.aclose()
+            logger.info(f"Closed pooled HTTP client for {key}")
+
+    def stats(self) -> dict:
+        return {
+            "hosts": sorted(self._clients),
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": (
+                self.limits.max_keepalive_connections
+            ),
+        }
+
+
+_registry: HTTPClientRegistry | None = None
+
+
+def init_http_clients() -> HTTPClientRegistry:
+    """Create the application-scoped registry (called from the lifespan)."""
+    global _registry
+    if _registry is None:
+        _registry = HTTPClientRegistry.from_config()
+    return _registry
+
+
+def get_http_client(url: str) -> httpx.AsyncClient:
+    return init_http_clients().get(url)
+
+
+async def close_http_clients():
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
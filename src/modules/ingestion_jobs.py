@@ -0,0 +1,316 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from functools import partial
+from typing import Any, Callable, Optional, Sequence
+from uuid import uuid4
+
+from loguru import logger
+
+from src.modules.bounded_executor import BoundedExecutor
+from src.modules.sqlite_pool import SQLiteVecPool
+
+# A stage takes the previous stage's output and a progress(done, total)
+# callback, and runs on the ingestion thread pool
+Stage = tuple[str, Callable[[Any, Callable[[int, Optional[int]], None]], Any]]
+
+
+FINISHED = ("done", "failed")
+
+
+class IngestionQueueFull(Exception):
+    pass
+
+
+def _init_job_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS ingestion_jobs (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            state TEXT NOT NULL
+        )
+    """)
+
+
+class SQLiteJobStore:
+    """Status snapshots of ingestion jobs in a SQLite file in WAL mode,
+    shared by all workers, so any of them can answer a status poll.
+
+    The last ``max_jobs`` jobs are kept; unfinished ones are never
+    pruned.
+    """
+
+    def __init__(self, db_path: str, max_jobs: int = 100):
+        self.max_jobs = max_jobs
+        self.pool = SQLiteVecPool(
+            db_path, init_schema=_init_job_schema, load_vec=False
+        ).open()
+
+    def put(self, job_id: str, status: str, state: dict):
+        with self.pool.writer() as conn:
+            # An upsert keeps the rowid, which orders jobs by submission
+            conn.execute(
+                """
+                INSERT INTO ingestion_jobs (id, status, state)
+                VALUES (?, ?, ?)
+                ON CONFLICT (id) DO UPDATE SET
+                    status = excluded.status,
+                    state = excluded.state
+                """,
+                (job_id, status, json.dumps(state)),
+            )
+            if status in FINISHED:
+                conn.execute(
+                    f"""
+                    DELETE FROM ingestion_jobs
+                    WHERE status IN {FINISHED}
+                        AND rowid <= (
+                            SELECT rowid FROM ingestion_jobs
+                            ORDER BY rowid DESC
+                            LIMIT 1 OFFSET ?
+                        )
+                    """,
+                    (self.max_jobs,),
+                )
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT state FROM ingestion_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def close(self):
+        self.pool.close()
+
+
+class IngestionJob:
+    def __init__(
+        self,
+        file: str,
+        stages: Sequence[Stage],
+        payload: Any,
+        discard: Optional[Callable[[Any], None]] = None,
+    ):
+        self.id = uuid4().hex
+        self.file = file
+        self.stages = list(stages)
+        self.payload = payload
+        self.discard = discard
+        self.status = "queued"
+        self.stage: Optional[str] = None
+        self.done: Optional[int] = None
+        self.total: Optional[int] = None
+        self.timings_ms: dict[str, float] = {}
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.submitted_at = datetime.now().isoformat()
+        self._submitted = time.perf_counter()
+        self._started: Optional[float] = None
+        self._finished: Optional[float] = None
+        self._saved = 0.0
+
+    def progress(self, done: int, total: Optional[int]):
+        self.done, self.total = done, total
+
+    def to_dict(self) -> dict:
+        now = time.perf_counter()
+        started = self._started or now
+        return {
+            "job_id": self.id,
+            "file": self.file,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": {"done": self.done, "total": self.total}
+            if self.done is not None
+            else None,
+            "submitted_at": self.submitted_at,
+            "queued_ms": round((started - self._submitted) * 1000, 1),
+            "timings_ms": dict(self.timings_ms),
+            "total_ms": round(((self._finished or now) - started) * 1000, 1)
+            if self._started
+            else None,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class IngestionJobs:
+    """Uploads processed in the background, with pollable status.
+
+    ``submit`` registers a job and returns at once; ``workers`` asyncio
+    workers take jobs from a bounded queue and run their stages in order
+    on a dedicated thread pool, so a large upload neither blocks the
+    event loop nor occupies the RAG executor that chat queries use. A job
+    runs in the process that accepted the upload, but its status is
+    saved to a SQLiteJobStore (on every change of stage and at most every
+    PROGRESS_SAVE_INTERVAL seconds of progress) that every process can
+    read.
+    """
+
+    PROGRESS_SAVE_INTERVAL = 0.5
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: int = 1,
+        max_pending: int = 16,
+        max_jobs: int = 100,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.store = SQLiteJobStore(db_path, max_jobs)
+        self.executor = BoundedExecutor(max_workers=workers, name="ingest")
+
+        # Jobs of this process that have not finished yet
+        self._jobs: dict[str, IngestionJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self._stage_totals: dict[str, float] = {}
+        self._stage_counts: dict[str, int] = {}
+
+    def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_pending)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # Jobs still queued never run; free what they hold (the upload)
+        while self._queue is not None and not self._queue.empty():
+            job = self._queue.get_nowait()
+            if job.discard is not None:
+                try:
+                    job.discard(job.payload)
+                except Exception as e:
+                    logger.warning(f"Could not discard {job.file}: {e}")
+            job.payload = None
+            self._fail(job, "cancelled at shutdown")
+        self._queue = None
+        # Let a stage already on a thread finish before the index closes
+        self.executor.shutdown(wait=True)
+        self.executor = BoundedExecutor(
+            max_workers=self.workers, name="ingest"
+        )
+
+    def submit(
+        self,
+        file: str,
+        stages: Sequence[Stage],
+        payload: Any,
+        discard: Optional[Callable[[Any], None]] = None,
+    ) -> IngestionJob:
+        """Queue a job. ``discard(payload)`` is called if the job is
+        dropped at shutdown before it runs."""
+        self.start()
+        job = IngestionJob(file, stages, payload, discard)
+        if self._queue.full():
+            self.rejected += 1
+            raise IngestionQueueFull(
+                f"{self.max_pending} uploads are already waiting"
+            )
+        # Saved first, so the job can be polled as soon as it is queued
+        self._save(job)
+        self._queue.put_nowait(job)
+
+        self.submitted += 1
+        self._jobs[job.id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """Status of a job submitted to any process, live for this
+        process's unfinished jobs"""
+        job = self._jobs.get(job_id)
+        if job is not None:
+            return job.to_dict()
+        return self.store.get(job_id)
+
+    def _save(self, job: IngestionJob):
+        job._saved = time.monotonic()
+        try:
+            self.store.put(job.id, job.status, job.to_dict())
+        except Exception as e:
+            logger.warning(f"Could not save status of job {job.id}: {e}")
+
+    def _progress(self, job: IngestionJob, done: int, total: Optional[int]):
+        job.progress(done, total)
+        if time.monotonic() - job._saved >= self.PROGRESS_SAVE_INTERVAL:
+            self._save(job)
+
+    def _fail(self, job: IngestionJob, error: str):
+        job.status = "failed"
+        job.error = error
+        job._finished = time.perf_counter()
+        self.failed += 1
+        self._jobs.pop(job.id, None)
+        self._save(job)
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: IngestionJob):
+        job.status = "running"
+        job._started = time.perf_counter()
+        value, job.payload = job.payload, None
+        progress = partial(self._progress, job)
+        try:
+            for name, stage in job.stages:
+                job.stage = name
+                job.done = job.total = None
+                self._save(job)
+                started = time.perf_counter()
+                value = await self.executor.run(stage, value, progress)
+                elapsed = (time.perf_counter() - started) * 1000
+                job.timings_ms[name] = round(elapsed, 1)
+                self._stage_totals[name] = (
+                    self._stage_totals.get(name, 0.0) + elapsed
+                )
+                self._stage_counts[name] = self._stage_counts.get(name, 0) + 1
+            job.result = value
+            job.status = "done"
+            job.stage = None
+            job._finished = time.perf_counter()
+            self.succeeded += 1
+            self._jobs.pop(job.id, None)
+            self._save(job)
+            logger.info(f"Ingested {job.file} in {job.timings_ms}")
+        except asyncio.CancelledError:
+            self._fail(job, "cancelled at shutdown")
+            raise
+        except Exception as e:
+            logger.exception(f"Ingestion of {job.file} failed in {job.stage}")
+            self._fail(job, str(e) or type(e).__name__)
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "max_pending": self.max_pending,
+            "running": sum(j.status == "running" for j in self._jobs.values()),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "stage_ms_avg": {
+                name: round(total / self._stage_counts[name], 1)
+                for name, total in self._stage_totals.items()
+            },
+            "executor": self.executor.stats(),
+        }
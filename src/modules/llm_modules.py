@@ -1,4 +1,8 @@
+import asyncio
 import json
+import re
+import time
+from contextlib import AsyncExitStack
 from datetime import datetime
 from typing import AsyncGenerator, Union, Optional
 
@@ -10,8 +14,30 @@ from src.adapters.llm_adapter import LLMAdapter
 from src.common import LLMConstants, LLMError
 from src.configs.configs import config
 from src.schemas.chat import ChatMessage, TokenUsage
+from src.modules.conversation_summarizer import ConversationSummarizer
+from src.modules.http_clients import get_http_client
+from src.modules.response_cache import SemanticResponseCache
 from src.modules.simple_memory import SimpleMemory
 
+conversation_summarizer = ConversationSummarizer(
+    mode=str(config.memory_summarization).lower(),
+    keep_recent=int(config.summary_keep_recent),
+    compact_batch=int(config.summary_compact_batch),
+    max_chars=int(config.summary_max_chars),
+    model=config.summary_model or None,
+)
+
+response_cache_enabled = str(config.response_cache_enabled).lower() in {
+    "1",
+    "true",
+    "yes",
+}
+response_cache = SemanticResponseCache(
+    max_entries=int(config.response_cache_size),
+    threshold=float(config.response_cache_threshold),
+    ttl=float(config.response_cache_ttl_seconds),
+)
+
 
 def get_current_context() -> str:
     """Get current date/time context for the LLM."""
@@ -24,6 +50,12 @@ Current context:
 """
 
 
+async def replay_stream(answer: str) -> AsyncGenerator[str, None]:
+    """Send a cached answer with the same SSE framing as a live stream."""
+    for piece in re.findall(r"\s*\S+|\s+$", answer):
+        yield f"data: {piece}\n\n"
+
+
 class LLMModules:
     async def chat_completion(
         self,
@@ -34,9 +66,12 @@ class LLMModules:
         api_url: str | None = None,
         stream: bool = False,
         memory: Optional[SimpleMemory] = None,
+        sources: Optional[list[str]] = None,
     ) -> Union[AsyncGenerator[str, None], ChatMessage]:
         """
         Send a chat completion request to LLM API.
+
+        ``sources`` restricts RAG retrieval to those documents.
         """
 
         if api_key is None:
@@ -63,70 +98,119 @@ class LLMModules:
         kwargs["model"] = use_model
         kwargs["stream"] = stream
 
-        # Get RAG context with current date
-        try:
-            from src.application.rag import get_rag_context
-            import re
-            current_year = str(datetime.now().year)
+        # A first-turn question close enough to one answered before, by
+        # the same model and provider on the same index, is served from
+        # the cache; source-scoped questions are not cached. Memory calls
+        # go to a thread: with the SQLite or Redis backend they do I/O
+        cache_key = None
+        if (
+            response_cache_enabled
+            and not sources
+            and not await asyncio.to_thread(
+                llm_memory_instance.get_recent_messages, 1
+            )
+        ):
+            try:
+                from src.application.rag import (
+                    aembed_query,
+                    aget_index_version,
+                    rewrite_time_references,
+                )
 
-            # For search, replace "current year" references with "currently/present" to match documents
-            search_query = message
-            if current_year in message:
-                search_query = re.sub(r'\b' + current_year + r'\b', 'currently', message, flags=re.IGNORECASE)
-                search_query = re.sub(r'\bthis year\b', 'currently', search_query, flags=re.IGNORECASE)
+                query_vec = await aembed_query(rewrite_time_references(message))
+                cache_key = (
+                    query_vec,
+                    use_model,
+                    api_url.rstrip("/"),
+                    await aget_index_version(),
+                )
+                cached = response_cache.get(*cache_key)
+            except Exception as e:
+                logger.error(f"Response cache lookup failed: {e}")
+                cache_key, cached = None, None
 
-            context = get_rag_context(search_query, top_k=10)
-            logger.info(f"RAG context retrieved: {len(context)} chars")
-            current_context = get_current_context()
-            message_with_context = f"""Context information:
-{current_context}
+            if cached is not None:
+                logger.info("Serving cached response")
+                await asyncio.to_thread(
+                    llm_memory_instance.add_user_message, message
+                )
+                await asyncio.to_thread(
+                    llm_memory_instance.add_assistant_message, cached
+                )
+                if stream:
+                    return replay_stream(cached)
+                return ChatMessage(role="assistant", content=cached)
 
-Relevant information about Ilyas:
-{context}
+        # Get RAG chunks; the context builder decides how many fit
+        try:
+            from src.application.rag import (
+                aget_rag_chunks,
+                rewrite_time_references,
+            )
 
-User question: {message}""" if context else message
+            # For search, replace "current year" references with "currently/present" to match documents
+            search_query = rewrite_time_references(message)
+
+            chunks = await aget_rag_chunks(search_query, top_k=10, sources=sources)
+            logger.info(f"RAG retrieved {len(chunks)} chunks")
         except Exception as e:
             logger.error(f"RAG failed: {e}, using original message")
-            message_with_context = message
-
-        # Add user message to memory
-        llm_memory_instance.add_user_message(message_with_context)
-        logger.info(
-            f"Current messages in memory: {llm_memory_instance.get_last7_messages()}"
-        )
+            chunks = []
 
-        # Define payload only once
+        # Build the prompt from earlier turns before storing this one, and
+        # store only the raw question so later turns don't resend context
         payload = {
             **kwargs,
-            "messages": llm_adapter_instance._build_messages(),
+            "messages": await asyncio.to_thread(
+                llm_adapter_instance._build_messages,
+                message,
+                chunks,
+                get_current_context(),
+                use_model,
+            ),
         }
+        await asyncio.to_thread(llm_memory_instance.add_user_message, message)
 
         logger.info(f"LLM payload: {payload}")
-        async with httpx.AsyncClient() as client:
-            try:
-                # Handle both API URLs with and without trailing /v1
-                api_url = llm_adapter_instance.api_url
-                if not api_url.endswith('/v1') and not api_url.endswith('/v1/'):
-                    api_url = f"{api_url}/v1"
-
-                full_url = f"{api_url}/chat/completions"
-                logger.info(f"Calling LLM API at: {full_url}")
-                logger.info(f"Using model: {kwargs['model']}")
-                logger.info(f"Payload has {len(payload['messages'])} messages")
-
-                response = await client.post(
-                    full_url,
-                    headers=llm_adapter_instance._get_headers(),
-                    json=payload,
-                    timeout=timeout,
-                )
-                response.raise_for_status()
+        try:
+            # Handle both API URLs with and without trailing /v1
+            api_url = llm_adapter_instance.api_url
+            if not api_url.endswith('/v1') and not api_url.endswith('/v1/'):
+                api_url = f"{api_url}/v1"
 
-                if stream:
+            full_url = f"{api_url}/chat/completions"
+            logger.info(f"Calling LLM API at: {full_url}")
+            logger.info(f"Using model: {kwargs['model']}")
+            logger.info(f"Payload has {len(payload['messages'])} messages")
+
+            client = get_http_client(full_url)
+            request_started = time.perf_counter()
+
+            if stream:
+                # Open the upstream stream here so HTTP errors still surface
+                # as a proper status code; the generator then owns it and
+                # closes it when the browser finishes or disconnects.
+                upstream = AsyncExitStack()
+                response = await upstream.enter_async_context(
+                    client.stream(
+                        "POST",
+                        full_url,
+                        headers=llm_adapter_instance._get_headers(),
+                        json=payload,
+                        timeout=timeout,
+                    )
+                )
+                try:
+                    response.raise_for_status()
+                except BaseException:
+                    await upstream.aclose()
+                    raise
 
-                    async def generate_stream():
-                        collected_message = ""
-                        logger.debug("Starting stream generation")
+                async def generate_stream():
+                    collected_message = ""
+                    first_token_at = None
+                    logger.debug("Starting stream generation")
+                    try:
                         async for line in response.aiter_lines():
                             # logger.debug(f"Raw stream line: {line}")
                             if line.strip():
@@ -144,6 +228,11 @@ User question: {message}""" if context else message
                                         content = chunk["choices"][0]["delta"][
                                             "content"
                                         ]
+                                        if first_token_at is None:
+                                            first_token_at = time.perf_counter()
+                                            logger.info(
+                                                f"Time to first token: {(first_token_at - request_started) * 1000:.1f} ms"
+                                            )
                                         collected_message += content
                                         # Format as SSE
                                         yield f"data: {content}\n\n"
@@ -152,52 +241,83 @@ User question: {message}""" if context else message
                                         f"JSON decode error: {e} for line: {line}"
                                     )
                                     continue
-                        # Add the complete message to memory after streaming is done
-                        logger.info(
-                            f"Final collected message: {collected_message}"
-                        )
-                        llm_memory_instance.add_assistant_message(
-                            collected_message
+                    finally:
+                        await upstream.aclose()
+
+                    elapsed_ms = (time.perf_counter() - request_started) * 1000
+                    logger.info(f"Stream finished in {elapsed_ms:.1f} ms")
+                    if cache_key is not None and collected_message:
+                        response_cache.put(
+                            *cache_key, collected_message, elapsed_ms
                         )
+                    # Add the complete message to memory after streaming is done
+                    logger.info(
+                        f"Final collected message: {collected_message}"
+                    )
+                    await asyncio.to_thread(
+                        llm_memory_instance.add_assistant_message,
+                        collected_message,
+                    )
+                    conversation_summarizer.schedule(
+                        llm_memory_instance, api_key, api_url, use_model
+                    )
 
-                    return generate_stream()
+                return generate_stream()
 
-                # Non-streaming response handling (existing code)
-                data = response.json()
-                logger.info(f"LLM response: {data}")
+            response = await client.post(
+                full_url,
+                headers=llm_adapter_instance._get_headers(),
+                json=payload,
+                timeout=timeout,
+            )
+            response.raise_for_status()
 
-                if "error" in data:
-                    error = data["error"]
-                    raise LLMError(
-                        message=error.get("message", "Unknown error"),
-                        code=error.get("code"),
-                        metadata=error.get("metadata", {}),
-                    )
+            # Non-streaming response handling (existing code)
+            data = response.json()
+            logger.info(f"LLM response: {data}")
 
-                # Add assistant message to memory
-                llm_adapter_instance.memory.add_assistant_message(
-                    data["choices"][0]["message"]["content"]
+            if "error" in data:
+                error = data["error"]
+                raise LLMError(
+                    message=error.get("message", "Unknown error"),
+                    code=error.get("code"),
+                    metadata=error.get("metadata", {}),
                 )
 
-                return ChatMessage(
-                    role="assistant",
-                    content=data["choices"][0]["message"]["content"],
-                    usage=TokenUsage(**data["usage"])
-                    if "usage" in data
-                    else None,
+            # Add assistant message to memory
+            await asyncio.to_thread(
+                llm_memory_instance.add_assistant_message,
+                data["choices"][0]["message"]["content"],
+            )
+            if cache_key is not None:
+                response_cache.put(
+                    *cache_key,
+                    data["choices"][0]["message"]["content"],
+                    (time.perf_counter() - request_started) * 1000,
                 )
+            conversation_summarizer.schedule(
+                llm_memory_instance, api_key, api_url, use_model
+            )
 
-            except httpx.HTTPError as e:
-                logger.error(f"HTTP error occurred: {e}")
-                raise HTTPException(status_code=500, detail=str(e))
-            except LLMError as e:
-                logger.error(f"LLM error: {e.message} (code: {e.code})")
-                if e.code == 503:  # Service Unavailable
-                    raise HTTPException(
-                        status_code=503,
-                        detail=f"Model unavailable: {e.metadata.get('raw', e.message)}",
-                    )
-                raise HTTPException(status_code=500, detail=e.message)
-            except Exception as e:
-                logger.error(f"Error: {e}")
-                raise HTTPException(status_code=500, detail=str(e))
+            return ChatMessage(
+                role="assistant",
+                content=data["choices"][0]["message"]["content"],
+                usage=TokenUsage(**data["usage"])
+                if "usage" in data
+                else None,
+            )
+
+        except httpx.HTTPError as e:
+            logger.error(f"HTTP error occurred: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
+        except LLMError as e:
+            logger.error(f"LLM error: {e.message} (code: {e.code})")
+            if e.code == 503:  # Service Unavailable
+                raise HTTPException(
+                    status_code=503,
+                    detail=f"Model unavailable: {e.metadata.get('raw', e.message)}",
+                )
+            raise HTTPException(status_code=500, detail=e.message)
+        except Exception as e:
+            logger.error(f"Error: {e}")
+            raise HTTPException(status_code=500, detail=str(e))
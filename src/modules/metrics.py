@@ -0,0 +1,37 @@
+import bisect
+import threading
+from typing import Sequence
+
+
+class Histogram:
+    """Cumulative bucket histogram, reported as a plain dict on /metrics."""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = sorted(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += value
+            self._count += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            total, count = self._sum, self._count
+        buckets = {
+            f"le_{bound:g}": sum(counts[: i + 1])
+            for i, bound in enumerate(self.buckets)
+        }
+        buckets["le_inf"] = count
+        return {
+            "count": count,
+            "sum": round(total, 3),
+            "avg": round(total / count, 3) if count else 0.0,
+            "buckets": buckets,
+        }
@@ -0,0 +1,177 @@
+import mmap
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from typing import Callable, Iterator, Optional
+
+import fitz  # PyMuPDF
+
+
+@contextmanager
+def _open_mapped(path: str) -> Iterator[fitz.Document]:
+    """Open a PDF from a read-only memory map of ``path``.
+
+    PyMuPDF reads a memoryview in place, so every process extracting
+    from the same file shares its pages through the OS page cache
+    instead of holding (or being sent) its own copy of the bytes.
+    """
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mapped)
+    doc = fitz.open(stream=view, filetype="pdf")
+    try:
+        yield doc
+    finally:
+        doc.close()
+        view.release()
+        mapped.close()
+
+
+def _extract_range(path: str, start: int, stop: int) -> list[tuple[int, str]]:
+    """(1-based page number, text) of pages [start, stop); runs in a
+    worker process"""
+    with _open_mapped(path) as doc:
+        return [(i + 1, doc[i].get_text("text")) for i in range(start, stop)]
+
+
+def page_count(path: str) -> int:
+    """Number of pages, reading only the document's structure"""
+    with _open_mapped(path) as doc:
+        return doc.page_count
+
+
+class PDFExtractor:
+    """Page text of PDFs on disk, sharded across a process pool.
+
+    Text extraction is CPU-bound and holds the GIL, so documents of at
+    least ``min_parallel_pages`` pages are split into runs of
+    ``pages_per_shard`` pages that worker processes extract from a
+    memory map of the file; only the path and page range are sent to a
+    worker. Pages are yielded in document order as soon as their shard
+    and every shard before it are done. Smaller documents are extracted
+    in the calling thread, where starting processes would cost more than
+    it saves. The pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        processes: int = 0,
+        pages_per_shard: int = 16,
+        min_parallel_pages: int = 32,
+    ):
+        self.processes = processes or os.cpu_count() or 1
+        self.pages_per_shard = pages_per_shard
+        self.min_parallel_pages = min_parallel_pages
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+        self.documents = 0
+        self.parallel_documents = 0
+        self.pages = 0
+        self._extract_total = 0.0
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # No fork: the parent runs threads and an event loop
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context(
+                    "forkserver" if "forkserver" in methods else "spawn"
+                )
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes, mp_context=context
+                )
+        return self._pool
+
+    def iter_pages(
+        self,
+        path: str,
+        progress: Optional[Callable[[int, Optional[int]], None]] = None,
+    ) -> Iterator[tuple[int, str]]:
+        """(1-based page number, text) for every page of the PDF at
+        ``path``, in order; ``progress(pages, total)`` follows each shard"""
+        started = time.perf_counter()
+        with _open_mapped(path) as doc:
+            total = doc.page_count
+            serial = self.processes <= 1 or total < self.min_parallel_pages
+            if serial:
+                for i, page in enumerate(doc):
+                    yield i + 1, page.get_text("text")
+                    if progress is not None and (
+                        (i + 1) % self.pages_per_shard == 0 or i + 1 == total
+                    ):
+                        progress(i + 1, total)
+
+        if not serial:
+            shards = [
+                (start, min(start + self.pages_per_shard, total))
+                for start in range(0, total, self.pages_per_shard)
+            ]
+            self.parallel_documents += 1
+            pool = self._get_pool()
+            # Keep a couple of shards per process in flight so results
+            # are held only until the consumer catches up
+            window = self.processes * 2
+            pending = []
+            try:
+                pending = [
+                    pool.submit(_extract_range, path, start, stop)
+                    for start, stop in shards[:window]
+                ]
+                next_shard = len(pending)
+                while pending:
+                    pages = pending.pop(0).result()
+                    if next_shard < len(shards):
+                        pending.append(
+                            pool.submit(
+                                _extract_range, path, *shards[next_shard]
+                            )
+                        )
+                        next_shard += 1
+                    yield from pages
+                    if progress is not None:
+                        progress(pages[-1][0], total)
+            except BrokenProcessPool:
+                # A crashed worker (e.g. killed for memory) breaks the
+                # whole pool; start a new one for the next document
+                self._discard_pool(pool)
+                raise
+            finally:
+                for future in pending:
+                    future.cancel()
+
+        self.documents += 1
+        self.pages += total
+        self._extract_total += time.perf_counter() - started
+
+    def _discard_pool(self, pool: ProcessPoolExecutor):
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def stats(self) -> dict:
+        return {
+            "processes": self.processes,
+            "pool_started": self._pool is not None,
+            "pages_per_shard": self.pages_per_shard,
+            "min_parallel_pages": self.min_parallel_pages,
+            "documents": self.documents,
+            "parallel_documents": self.parallel_documents,
+            "pages": self.pages,
+            "ms_per_page_avg": round(
+                self._extract_total / self.pages * 1000, 3
+            )
+            if self.pages
+            else 0.0,
+        }
@@ -0,0 +1,186 @@
+import json
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, Optional, Sequence
+
+from loguru import logger
+
+# Same as src.application.rag.SPAN_KEYS, which imports this module
+SPAN_KEYS = ("page", "page_end", "line", "line_end")
+
+_YEAR = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+def latest_year(text: str) -> int:
+    """Most recent year (not in the future) mentioned in ``text``, or 0"""
+    current = datetime.now().year
+    years = [int(y) for y in _YEAR.findall(text)]
+    return max((y for y in years if y <= current), default=0)
+
+
+class TagRule:
+    def __init__(self, tag: str, patterns: list[str]):
+        self.tag = tag
+        self.patterns = [re.compile(p) for p in patterns]
+
+    def matches(self, text: str) -> bool:
+        return any(p.search(text) for p in self.patterns)
+
+
+class PinRule:
+    def __init__(
+        self,
+        tag: str,
+        keywords: list[str],
+        recent_years: int = 0,
+        max_chunks: int = 1,
+    ):
+        self.tag = tag
+        self.keywords = [k.lower() for k in keywords]
+        self.recent_years = recent_years
+        self.max_chunks = max_chunks
+
+    def matches(self, query: str) -> bool:
+        query = query.lower()
+        keywords = list(self.keywords)
+        if self.recent_years:
+            year = datetime.now().year
+            keywords += [
+                str(y) for y in range(year - self.recent_years, year + 1)
+            ]
+        return any(keyword in query for keyword in keywords)
+
+
+def parse_tag_rules(raw: Optional[str], default: dict) -> list[TagRule]:
+    rules = json.loads(raw) if raw else default
+    return [TagRule(tag, patterns) for tag, patterns in rules.items()]
+
+
+def parse_pin_rules(raw: Optional[str], default: list) -> list[PinRule]:
+    rules = json.loads(raw) if raw else default
+    return [PinRule(**rule) for rule in rules]
+
+
+class PinnedChunks:
+    """In-memory copy of tagged chunks, injected into context by rule.
+
+    Tags are assigned when a chunk is indexed (explicit ``tags`` metadata
+    plus ``tag_rules`` matches) and stored in the ``chunk_tags`` table.
+    ``load`` reads every tagged chunk once, most recent first by the
+    latest year each mentions (several roles can be "Present"); ``apply``
+    then adds them to a query's results with no embedding or KNN work.
+    """
+
+    def __init__(self, tag_rules: list[TagRule], pin_rules: list[PinRule]):
+        self.tag_rules = tag_rules
+        self.pin_rules = pin_rules
+        self._by_tag: dict[str, list[dict]] = {}
+        # Ids of the entries that stand for deduplicated chunks
+        self._aliases: set[int] = set()
+        self._lock = threading.Lock()
+        self.injected = 0
+
+    def tags_for(self, text: str, explicit: Iterable[str] = ()) -> set[str]:
+        tags = set(explicit)
+        tags.update(rule.tag for rule in self.tag_rules if rule.matches(text))
+        return tags
+
+    def load(self, conn: sqlite3.Connection):
+        rows = conn.execute(
+            """
+            SELECT t.tag, d.rowid, c.text, d.source,
+                COALESCE(c.page, NULLIF(d.page, 0)),
+                c.page_end, c.line, c.line_end
+            FROM chunk_tags t
+            JOIN chunks c ON c.id = t.chunk_id
+            JOIN documents d ON d.rowid = t.chunk_id
+            ORDER BY t.tag, d.rowid
+            """
+        ).fetchall()
+        # Chunks deduplicated into a tagged chunk carry its tags, so a
+        # source-scoped query still finds them under their own source
+        duplicates = conn.execute(
+            """
+            SELECT t.tag, x.id, x.text, x.source,
+                x.page, x.page_end, x.line, x.line_end, x.duplicate_of
+            FROM chunk_tags t
+            JOIN chunk_duplicates x ON x.duplicate_of = t.chunk_id
+            ORDER BY t.tag, x.id
+            """
+        ).fetchall()
+
+        by_tag: dict[str, list[dict]] = {}
+        for tag, rowid, text, source, *span in rows + [
+            row[:-1] for row in duplicates
+        ]:
+            by_tag.setdefault(tag, []).append(
+                {
+                    "id": rowid,
+                    "text": text,
+                    "source": source,
+                    **{
+                        key: value
+                        for key, value in zip(SPAN_KEYS, span)
+                        if value is not None
+                    },
+                    "score": None,
+                    "pinned": tag,
+                }
+            )
+        aliases = {row[1] for row in duplicates}
+        for chunks in by_tag.values():
+            # Stable: chunks naming the same year keep their index order
+            chunks.sort(key=lambda c: latest_year(c["text"]), reverse=True)
+        with self._lock:
+            self._by_tag = by_tag
+            self._aliases = aliases
+        logger.info(
+            f"Loaded pinned chunks: "
+            f"{ {tag: len(chunks) for tag, chunks in by_tag.items()} }"
+        )
+
+    def apply(
+        self,
+        query: str,
+        chunks: list[dict],
+        sources: Optional[Sequence[str]] = None,
+    ) -> list[dict]:
+        """Prepend pinned chunks for every rule the query triggers.
+
+        With ``sources``, only pinned chunks from those sources qualify.
+        """
+        with self._lock:
+            by_tag = self._by_tag
+            aliases = self._aliases
+
+        seen = {c.get("text") for c in chunks}
+        pinned = []
+        for rule in self.pin_rules:
+            if not rule.matches(query):
+                continue
+            candidates = [
+                c
+                for c in by_tag.get(rule.tag, [])
+                if (
+                    c["source"] in sources
+                    if sources
+                    else c["id"] not in aliases
+                )
+            ]
+            for chunk in candidates[: rule.max_chunks]:
+                if chunk["text"] not in seen:
+                    seen.add(chunk["text"])
+                    pinned.append(dict(chunk))
+        if pinned:
+            self.injected += len(pinned)
+            print(f"[RAG] Pinned {len(pinned)} chunk(s) for query")
+        return pinned + chunks
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "tags": {tag: len(c) for tag, c in self._by_tag.items()},
+                "injected": self.injected,
+            }
@@ -0,0 +1,152 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+import numpy as np
+
+
+class SemanticResponseCache:
+    """Completed answers looked up by query-embedding similarity.
+
+    An entry matches a query when it was produced by the same model of
+    the same provider (API URL), against the same index version, and its
+    query embedding has cosine similarity of at least ``threshold``. A
+    lookup that sees a new index version drops every entry, so a reindex
+    or upload invalidates the cache even when it happened in another
+    process; answers computed against any other version than the current
+    one are not stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        threshold: float = 0.95,
+        ttl: float = 21600.0,
+    ):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.ttl = ttl
+
+        # key -> entry; oldest first for LRU eviction
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        self._next_key = 0
+        self._matrix: Optional[np.ndarray] = None
+        self._matrix_keys: list[int] = []
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+        self.saved_ms = 0.0
+
+    @staticmethod
+    def _unit(vector: np.ndarray) -> np.ndarray:
+        vector = np.asarray(vector, dtype="float32")
+        norm = float(np.linalg.norm(vector))
+        return vector / norm if norm else vector
+
+    def _sync_version(self, version: int):
+        if self._version != version:
+            if self._entries:
+                self.invalidations += 1
+            self._entries.clear()
+            self._matrix = None
+            self._version = version
+
+    def _best(
+        self, vector: np.ndarray, model: str, provider: str
+    ) -> Optional[dict]:
+        if not self._entries:
+            return None
+        if self._matrix is None:
+            self._matrix_keys = list(self._entries)
+            self._matrix = np.stack(
+                [self._entries[k]["vector"] for k in self._matrix_keys]
+            )
+        scores = self._matrix @ vector
+        now = time.monotonic()
+        for i in np.argsort(-scores):
+            if scores[i] < self.threshold:
+                break
+            key = self._matrix_keys[i]
+            entry = self._entries.get(key)
+            if (
+                entry is None
+                or entry["model"] != model
+                or entry["provider"] != provider
+            ):
+                continue
+            if now - entry["created"] >= self.ttl:
+                continue
+            self._entries.move_to_end(key)
+            return entry
+        return None
+
+    def get(
+        self, vector: np.ndarray, model: str, provider: str, version: int
+    ) -> Optional[str]:
+        vector = self._unit(vector)
+        with self._lock:
+            self._sync_version(version)
+            entry = self._best(vector, model, provider)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.saved_ms += entry["latency_ms"]
+            return entry["answer"]
+
+    def put(
+        self,
+        vector: np.ndarray,
+        model: str,
+        provider: str,
+        version: int,
+        answer: str,
+        latency_ms: float,
+    ):
+        vector = self._unit(vector)
+        with self._lock:
+            if version != self._version:
+                # Answered against an index that has changed since; the
+                # cached entries of the current version are still valid
+                self.stale_puts += 1
+                return
+            if self._best(vector, model, provider) is not None:
+                return
+            self._entries[self._next_key] = {
+                "vector": vector,
+                "model": model,
+                "provider": provider,
+                "answer": answer,
+                "latency_ms": latency_ms,
+                "created": time.monotonic(),
+            }
+            self._next_key += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._matrix = None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._matrix = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "threshold": self.threshold,
+                "index_version": self._version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                "saved_ms_total": round(self.saved_ms, 1),
+            }
@@ -0,0 +1,430 @@
+import json
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from loguru import logger
+
+from src.configs.configs import config
+from src.modules.session_store import SessionStore
+from src.modules.simple_memory import SimpleMemory
+from src.modules.sqlite_pool import SQLiteVecPool
+
+
+def _init_session_schema(conn):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS sessions (
+            id TEXT PRIMARY KEY,
+            last_access REAL NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_messages (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            session_id TEXT NOT NULL,
+            role TEXT NOT NULL,
+            content TEXT NOT NULL
+        )
+    """)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS session_messages_session "
+        "ON session_messages (session_id, seq)"
+    )
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS session_summaries (
+            session_id TEXT PRIMARY KEY,
+            summary TEXT NOT NULL
+        )
+    """)
+
+
+class SQLiteSessionBackend:
+    """Sessions in a local SQLite file in WAL mode, shared by all workers.
+
+    Messages are only ever inserted, and a read fetches the last N
+    messages of a session in one query.
+    """
+
+    PRUNE_EVERY = 100
+    # last_access is rewritten at most this often, so reads stay reads
+    TOUCH_INTERVAL = 60.0
+
+    def __init__(self, db_path: str, idle_ttl: float = 86400.0):
+        self.idle_ttl = idle_ttl
+        self.pool = SQLiteVecPool(
+            db_path, init_schema=_init_session_schema, load_vec=False
+        ).open()
+        self.created = 0
+        self.appends = 0
+        self.loads = 0
+
+    def get(self, session_id: str) -> Optional[SimpleMemory]:
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT last_access FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        now = time.time()
+        if row is None or now - row[0] >= self.idle_ttl:
+            return None
+        if now - row[0] >= self.TOUCH_INTERVAL:
+            with self.pool.writer() as conn:
+                conn.execute(
+                    "UPDATE sessions SET last_access = ? WHERE id = ?",
+                    (now, session_id),
+                )
+        return SimpleMemory(log=self, session_id=session_id)
+
+    def get_or_create(self, session_id: str) -> tuple[SimpleMemory, bool]:
+        memory = self.get(session_id)
+        if memory is not None:
+            return memory, False
+        with self.pool.writer() as conn:
+            # An expired session starts over with an empty history
+            self._delete_history(conn, session_id)
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, last_access) VALUES (?, ?)",
+                (session_id, time.time()),
+            )
+            self.created += 1
+            if self.created % self.PRUNE_EVERY == 0:
+                self._prune(conn)
+        return SimpleMemory(log=self, session_id=session_id), True
+
+    @staticmethod
+    def _delete_history(conn, session_id: str):
+        conn.execute(
+            "DELETE FROM session_messages WHERE session_id = ?", (session_id,)
+        )
+        conn.execute(
+            "DELETE FROM session_summaries WHERE session_id = ?", (session_id,)
+        )
+
+    def _prune(self, conn):
+        cutoff = time.time() - self.idle_ttl
+        for table, column in (
+            ("session_messages", "session_id"),
+            ("session_summaries", "session_id"),
+        ):
+            conn.execute(
+                f"DELETE FROM {table} WHERE {column} IN "
+                "(SELECT id FROM sessions WHERE last_access < ?)",
+                (cutoff,),
+            )
+        conn.execute("DELETE FROM sessions WHERE last_access < ?", (cutoff,))
+
+    def append(self, session_id: str, message: Dict[str, str]):
+        with self.pool.writer() as conn:
+            conn.execute(
+                "INSERT INTO session_messages (session_id, role, content) "
+                "VALUES (?, ?, ?)",
+                (session_id, message["role"], message["content"]),
+            )
+        self.appends += 1
+
+    def load(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        if limit is not None and limit <= 0:
+            # SQLite reads a negative LIMIT as no limit
+            return []
+        with self.pool.reader() as conn:
+            rows = conn.execute(
+                """
+                SELECT role, content FROM (
+                    SELECT seq, role, content FROM session_messages
+                    WHERE session_id = ?
+                    ORDER BY seq DESC
+                    LIMIT ?
+                ) ORDER BY seq
+                """,
+                (session_id, -1 if limit is None else limit),
+            ).fetchall()
+        self.loads += 1
+        return [{"role": role, "content": content} for role, content in rows]
+
+    def clear(self, session_id: str):
+        with self.pool.writer() as conn:
+            self._delete_history(conn, session_id)
+
+    def load_summary(self, session_id: str) -> str:
+        with self.pool.reader() as conn:
+            row = conn.execute(
+                "SELECT summary FROM session_summaries WHERE session_id = ?",
+                (session_id,),
+            ).fetchone()
+        return row[0] if row else ""
+
+    def compact(self, session_id: str, summary: str, drop: int):
+        with self.pool.writer() as conn:
+            conn.execute(
+                """
+                DELETE FROM session_messages WHERE seq IN (
+                    SELECT seq FROM session_messages
+                    WHERE session_id = ?
+                    ORDER BY seq
+                    LIMIT ?
+                )
+                """,
+                (session_id, drop),
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO session_summaries (session_id, summary) "
+                "VALUES (?, ?)",
+                (session_id, summary),
+            )
+
+    def close(self):
+        self.pool.close()
+
+    def stats(self) -> dict:
+        with self.pool.reader() as conn:
+            sessions = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()
+            messages = conn.execute(
+                "SELECT COUNT(*) FROM session_messages"
+            ).fetchone()
+        return {
+            "backend": "sqlite",
+            "sessions": sessions[0],
+            "messages": messages[0],
+            "created": self.created,
+            "appends": self.appends,
+            "loads": self.loads,
+            "pool": self.pool.stats(),
+        }
+
+
+class LocalRedis:
+    """In-process stand-in for the subset of redis-py used for sessions.
+
+    Lets the Redis backend run in development and on a single host
+    without a Redis server; it is not shared between processes.
+    """
+
+    def __init__(self):
+        self._data: dict[str, Any] = {}
+        self._expires: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def _alive(self, key: str) -> bool:
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+        return key in self._data
+
+    def set(self, key: str, value: Any, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            self._data[key] = value
+            self._expires.pop(key, None)
+            if ex is not None:
+                self._expires[key] = time.monotonic() + ex
+            return True
+
+    def exists(self, *keys: str) -> int:
+        with self._lock:
+            return sum(1 for key in keys if self._alive(key))
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            return self._data.get(key) if self._alive(key) else None
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if not self._alive(key):
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def rpush(self, key: str, *values: Any) -> int:
+        with self._lock:
+            if not self._alive(key):
+                self._data[key] = []
+            self._data[key].extend(values)
+            return len(self._data[key])
+
+    def lrange(self, key: str, start: int, end: int) -> list:
+        with self._lock:
+            if not self._alive(key):
+                return []
+            items = self._data[key]
+            end = len(items) if end == -1 else end + 1
+            return list(items[start:end])
+
+    def ltrim(self, key: str, start: int, end: int) -> bool:
+        with self._lock:
+            if self._alive(key):
+                items = self._data[key]
+                end = len(items) if end == -1 else end + 1
+                self._data[key] = items[start:end]
+            return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if self._alive(key):
+                    del self._data[key]
+                    self._expires.pop(key, None)
+                    removed += 1
+            return removed
+
+    def dbsize(self) -> int:
+        with self._lock:
+            return sum(1 for key in list(self._data) if self._alive(key))
+
+    def pipeline(self) -> "LocalPipeline":
+        return LocalPipeline(self)
+
+
+class LocalPipeline:
+    """Queues LocalRedis commands and runs them on ``execute()``."""
+
+    def __init__(self, client: LocalRedis):
+        self.client = client
+        self._commands: list = []
+
+    def __getattr__(self, name: str):
+        command = getattr(self.client, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    def execute(self) -> list:
+        commands, self._commands = self._commands, []
+        return [command(*args, **kwargs) for command, args, kwargs in commands]
+
+
+class RedisSessionBackend:
+    """Sessions as Redis lists (RPUSH to append, one LRANGE to read).
+
+    Works with a redis-py client or anything with the same methods, such
+    as LocalRedis. Keys expire after the idle TTL.
+    """
+
+    def __init__(self, client: Any, idle_ttl: float = 86400.0):
+        self.client = client
+        self.idle_ttl = int(idle_ttl)
+        self.created = 0
+        self.appends = 0
+        self.loads = 0
+
+    @staticmethod
+    def _marker(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    @staticmethod
+    def _messages(session_id: str) -> str:
+        return f"session:{session_id}:messages"
+
+    @staticmethod
+    def _summary(session_id: str) -> str:
+        return f"session:{session_id}:summary"
+
+    def get(self, session_id: str) -> Optional[SimpleMemory]:
+        # One round-trip; refreshing the TTL of a missing key is a no-op
+        pipe = self.client.pipeline()
+        pipe.exists(self._marker(session_id))
+        for key in (
+            self._marker(session_id),
+            self._messages(session_id),
+            self._summary(session_id),
+        ):
+            pipe.expire(key, self.idle_ttl)
+        if not pipe.execute()[0]:
+            return None
+        return SimpleMemory(log=self, session_id=session_id)
+
+    def get_or_create(self, session_id: str) -> tuple[SimpleMemory, bool]:
+        memory = self.get(session_id)
+        if memory is not None:
+            return memory, False
+        self.client.delete(
+            self._messages(session_id), self._summary(session_id)
+        )
+        self.client.set(self._marker(session_id), "1", ex=self.idle_ttl)
+        self.created += 1
+        return SimpleMemory(log=self, session_id=session_id), True
+
+    def append(self, session_id: str, message: Dict[str, str]):
+        key = self._messages(session_id)
+        pipe = self.client.pipeline()
+        pipe.rpush(key, json.dumps(message))
+        pipe.expire(key, self.idle_ttl)
+        pipe.execute()
+        self.appends += 1
+
+    def load(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]:
+        if limit is not None and limit <= 0:
+            # LRANGE key -0 -1 would return the whole list
+            return []
+        start = 0 if limit is None else -limit
+        raw = self.client.lrange(self._messages(session_id), start, -1)
+        self.loads += 1
+        return [json.loads(item) for item in raw]
+
+    def clear(self, session_id: str):
+        self.client.delete(
+            self._messages(session_id), self._summary(session_id)
+        )
+
+    def load_summary(self, session_id: str) -> str:
+        summary = self.client.get(self._summary(session_id))
+        if isinstance(summary, bytes):
+            summary = summary.decode()
+        return summary or ""
+
+    def compact(self, session_id: str, summary: str, drop: int):
+        self.client.set(self._summary(session_id), summary, ex=self.idle_ttl)
+        self.client.ltrim(self._messages(session_id), drop, -1)
+
+    def close(self):
+        close = getattr(self.client, "close", None)
+        if close is not None:
+            close()
+
+    def stats(self) -> dict:
+        return {
+            "backend": "redis",
+            "keys": self.client.dbsize(),
+            "created": self.created,
+            "appends": self.appends,
+            "loads": self.loads,
+        }
+
+
+def create_session_backend():
+    """Build the session backend selected by SESSION_BACKEND."""
+    backend = str(config.session_backend).lower()
+    idle_ttl = float(config.session_idle_ttl_seconds)
+
+    if backend == "sqlite":
+        logger.info(f"Using SQLite sessions at {config.session_db_path}")
+        return SQLiteSessionBackend(config.session_db_path, idle_ttl)
+
+    if backend == "redis":
+        url = getattr(config, "session_redis_url", "")
+        if url:
+            import redis
+
+            client = redis.Redis.from_url(url)
+            logger.info("Using Redis sessions")
+        else:
+            logger.warning(
+                "SESSION_REDIS_URL is not set; using the in-process "
+                "LocalRedis stand-in"
+            )
+            client = LocalRedis()
+        return RedisSessionBackend(client, idle_ttl)
+
+    if backend != "memory":
+        raise ValueError(f"Unknown SESSION_BACKEND: {backend}")
+    return SessionStore(
+        max_entries=int(config.session_max_entries),
+        max_bytes=int(config.session_max_bytes),
+        idle_ttl=idle_ttl,
+    )
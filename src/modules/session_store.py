@@ -0,0 +1,127 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from src.modules.simple_memory import SimpleMemory
+
+
+class SessionStore:
+    """In-process session memories with LRU, idle-TTL and byte caps.
+
+    Sizes are measured from message contents whenever a session is
+    accessed, so a session's growth during one turn is accounted for on
+    its next request. Expired and least recently used sessions are
+    evicted first.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 10000,
+        max_bytes: int = 64 * 1024 * 1024,
+        idle_ttl: float = 86400.0,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.idle_ttl = idle_ttl
+
+        # session_id -> (last_access, memory)
+        self._sessions: OrderedDict[str, tuple[float, SimpleMemory]] = (
+            OrderedDict()
+        )
+        self._sizes: dict[str, int] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.created = 0
+        self.evicted_ttl = 0
+        self.evicted_lru = 0
+
+    @staticmethod
+    def _measure(memory: SimpleMemory) -> int:
+        return len(memory.get_summary()) + sum(
+            len(m.get("content") or "") + len(m.get("role") or "")
+            for m in memory.get_messages()
+        )
+
+    def _account(self, session_id: str, memory: SimpleMemory):
+        size = self._measure(memory)
+        self._bytes += size - self._sizes.get(session_id, 0)
+        self._sizes[session_id] = size
+
+    def _remove(self, session_id: str):
+        self._sessions.pop(session_id, None)
+        self._bytes -= self._sizes.pop(session_id, 0)
+
+    def _evict(self, keep: Optional[str] = None):
+        now = time.monotonic()
+        while self._sessions:
+            oldest, (last_access, _) = next(iter(self._sessions.items()))
+            if oldest == keep or now - last_access < self.idle_ttl:
+                break
+            self._remove(oldest)
+            self.evicted_ttl += 1
+
+        while self._sessions and (
+            len(self._sessions) > self.max_entries
+            or self._bytes > self.max_bytes
+        ):
+            oldest = next(iter(self._sessions))
+            if oldest == keep:
+                break
+            self._remove(oldest)
+            self.evicted_lru += 1
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def get(self, session_id: str) -> Optional[SimpleMemory]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.idle_ttl:
+                self._remove(session_id)
+                self.evicted_ttl += 1
+                return None
+            memory = entry[1]
+            self._sessions[session_id] = (time.monotonic(), memory)
+            self._sessions.move_to_end(session_id)
+            self._account(session_id, memory)
+            self._evict(keep=session_id)
+            return memory
+
+    def get_or_create(self, session_id: str) -> tuple[SimpleMemory, bool]:
+        """Return the session's memory and whether it was just created."""
+        memory = self.get(session_id)
+        if memory is not None:
+            return memory, False
+        with self._lock:
+            memory = SimpleMemory(messages=[])
+            self._sessions[session_id] = (time.monotonic(), memory)
+            self._sizes[session_id] = 0
+            self.created += 1
+            self._evict(keep=session_id)
+            return memory, True
+
+    def __getitem__(self, session_id: str) -> SimpleMemory:
+        memory = self.get(session_id)
+        if memory is None:
+            raise KeyError(session_id)
+        return memory
+
+    def close(self):
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "backend": "memory",
+                "sessions": len(self._sessions),
+                "max_entries": self.max_entries,
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "created": self.created,
+                "evicted_ttl": self.evicted_ttl,
+                "evicted_lru": self.evicted_lru,
+            }
@@ -1,26 +1,84 @@
-from typing import List, Dict
+from typing import List, Dict, Optional, Protocol
+
+
+class MessageLog(Protocol):
+    """Append-only message storage shared by every worker."""
+
+    def append(self, session_id: str, message: Dict[str, str]) -> None: ...
+
+    def load(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> List[Dict[str, str]]: ...
+
+    def clear(self, session_id: str) -> None: ...
+
+    def load_summary(self, session_id: str) -> str: ...
+
+    def compact(self, session_id: str, summary: str, drop: int) -> None: ...
 
 
 class SimpleMemory:
-    def __init__(self, messages: List[Dict[str, str]] = None):
+    def __init__(
+        self,
+        messages: List[Dict[str, str]] = None,
+        log: Optional[MessageLog] = None,
+        session_id: Optional[str] = None,
+    ):
         if messages is None:
             messages = []
         if not isinstance(messages, list):
             raise ValueError("Messages must be a list.")
-        
+        if log is not None and session_id is None:
+            raise ValueError("A session_id is required with a message log.")
+
         self.messages = messages
+        # With a log, history lives in the shared backend and every read
+        # goes there, so any worker sees the latest turns
+        self.log = log
+        self.session_id = session_id
+        self.summary = ""
+
+    def _append(self, message: Dict[str, str]):
+        if self.log is not None:
+            self.log.append(self.session_id, message)
+        else:
+            self.messages.append(message)
 
     def add_user_message(self, message: str):
-        self.messages.append({"role": "user", "content": message})
+        self._append({"role": "user", "content": message})
 
     def add_assistant_message(self, message: str):
-        self.messages.append({"role": "assistant", "content": message})
+        self._append({"role": "assistant", "content": message})
 
     def get_messages(self) -> List[Dict[str, str]]:
+        if self.log is not None:
+            return self.log.load(self.session_id)
         return self.messages
 
+    def get_recent_messages(self, limit: int) -> List[Dict[str, str]]:
+        if self.log is not None:
+            return self.log.load(self.session_id, limit=limit)
+        return self.messages[-limit:] if limit > 0 else []
+
     def get_last7_messages(self) -> List[Dict[str, str]]:
-        return self.messages[-7:]
+        return self.get_recent_messages(7)
+
+    def get_summary(self) -> str:
+        if self.log is not None:
+            return self.log.load_summary(self.session_id)
+        return self.summary
+
+    def compact(self, summary: str, drop: int):
+        """Replace the oldest ``drop`` messages with a running summary."""
+        if self.log is not None:
+            self.log.compact(self.session_id, summary, drop)
+        else:
+            del self.messages[:drop]
+            self.summary = summary
 
     def clear_memory(self):
-        self.messages.clear()
+        if self.log is not None:
+            self.log.clear(self.session_id)
+        else:
+            self.messages.clear()
+            self.summary = ""
@@ -0,0 +1,141 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+from loguru import logger
+from sqlite_vec import load
+
+
+class SQLiteVecPool:
+    """Long-lived sqlite-vec connections: one reader per thread, one writer.
+
+    The database runs in WAL mode so readers never block the writer and
+    vice versa. All writes go through a single connection guarded by a
+    lock, which serializes them the same way SQLite would anyway but
+    without ``database is locked`` retries.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        busy_timeout_ms: int = 5000,
+        init_schema: Optional[Callable[[sqlite3.Connection], None]] = None,
+        load_vec: bool = True,
+    ):
+        self.db_path = Path(db_path).as_posix()
+        self.busy_timeout_ms = busy_timeout_ms
+        self._init_schema = init_schema
+        self.load_vec = load_vec
+
+        self._local = threading.local()
+        self._readers: list[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_lock = threading.Lock()
+        self._closed = False
+
+        self._reads = 0
+        self._writes = 0
+        self._writer_contended = 0
+        self._writer_wait_total = 0.0
+        self._writer_wait_max = 0.0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self.load_vec:
+            conn.enable_load_extension(True)
+            load(conn)
+            conn.enable_load_extension(False)
+        conn.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = NORMAL")
+        return conn
+
+    def open(self) -> "SQLiteVecPool":
+        """Open the writer connection and create the schema once."""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = self._connect()
+                if self._init_schema is not None:
+                    self._init_schema(self._writer)
+                    self._writer.commit()
+                self._closed = False
+                logger.info(f"Opened sqlite-vec pool at {self.db_path}")
+        return self
+
+    def _get_reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            if self._writer is None:
+                self.open()
+            conn = self._connect()
+            self._local.conn = conn
+            with self._readers_lock:
+                self._readers.append(conn)
+        return conn
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Yield this thread's read connection."""
+        if self._closed:
+            raise RuntimeError("sqlite-vec pool is closed")
+        conn = self._get_reader()
+        self._reads += 1
+        yield conn
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Yield the shared writer inside a transaction."""
+        if self._closed:
+            raise RuntimeError("sqlite-vec pool is closed")
+        if self._writer is None:
+            self.open()
+
+        started = time.perf_counter()
+        if not self._writer_lock.acquire(blocking=False):
+            self._writer_contended += 1
+            self._writer_lock.acquire()
+        waited = time.perf_counter() - started
+        self._writer_wait_total += waited
+        self._writer_wait_max = max(self._writer_wait_max, waited)
+
+        try:
+            self._writes += 1
+            try:
+                yield self._writer
+                self._writer.commit()
+            except Exception:
+                self._writer.rollback()
+                raise
+        finally:
+            self._writer_lock.release()
+
+    def close(self):
+        """Close every connection the pool has handed out."""
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            with self._readers_lock:
+                for conn in self._readers:
+                    conn.close()
+                self._readers.clear()
+            self._local = threading.local()
+            self._closed = True
+        logger.info(f"Closed sqlite-vec pool at {self.db_path}")
+
+    def stats(self) -> dict:
+        return {
+            "db_path": self.db_path,
+            "reader_connections": len(self._readers),
+            "writer_open": self._writer is not None,
+            "reads": self._reads,
+            "writes": self._writes,
+            "writer_contended": self._writer_contended,
+            "writer_wait_ms_total": round(self._writer_wait_total * 1000, 3),
+            "writer_wait_ms_max": round(self._writer_wait_max * 1000, 3),
+        }
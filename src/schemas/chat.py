@@ -23,6 +23,8 @@ class ChatRequest(BaseModel):
     message: str
     stream: bool = False
     use_model: Optional[str] = None
+    # Restrict retrieval to these document sources (file names)
+    sources: Optional[list[str]] = None
 
 
 class ChatResponse(BaseModel):
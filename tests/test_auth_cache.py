@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+import src.modules.auth_cache as auth_cache
+from src.modules.auth_cache import CredentialCache
+
+CREDENTIALS = ("sk-test", "https://llm.example/v1", "model")
+
+
+class Response:
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class Validator:
+    """Upstream probe that answers once ``release`` is set"""
+
+    def __init__(self, status_code=200):
+        self.status_code = status_code
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self, api_key, api_url, use_model):
+        self.calls += 1
+        await self.release.wait()
+        return Response(self.status_code)
+
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_concurrent_validations_share_one_call():
+    async def scenario():
+        cache = CredentialCache()
+        validator = Validator()
+        tasks = [
+            asyncio.create_task(cache.validate(*CREDENTIALS, validator))
+            for _ in range(5)
+        ]
+        await settle()
+        validator.release.set()
+        await asyncio.gather(*tasks)
+        await cache.validate(*CREDENTIALS, validator)
+        return cache, validator
+
+    cache, validator = asyncio.run(scenario())
+
+    assert validator.calls == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["hits"] == 1
+
+
+def test_waiter_validates_again_when_leader_is_cancelled():
+    async def scenario():
+        cache = CredentialCache()
+        validator = Validator()
+        leader = asyncio.create_task(cache.validate(*CREDENTIALS, validator))
+        await settle()
+        waiter = asyncio.create_task(cache.validate(*CREDENTIALS, validator))
+        await settle()
+        leader.cancel()
+        await settle()
+        validator.release.set()
+        await waiter
+        return leader, validator
+
+    leader, validator = asyncio.run(scenario())
+
+    assert leader.cancelled()
+    assert validator.calls == 2
+
+
+def test_failure_is_remembered_for_failure_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(auth_cache.time, "monotonic", lambda: now[0])
+    cache = CredentialCache(ttl=300, failure_ttl=10)
+    validator = Validator(status_code=403)
+    validator.release.set()
+
+    def validate():
+        with pytest.raises(HTTPException) as excinfo:
+            asyncio.run(cache.validate(*CREDENTIALS, validator))
+        return excinfo.value.status_code
+
+    assert validate() == 401
+    now[0] += 9
+    assert validate() == 401
+    assert validator.calls == 1
+    now[0] += 2
+    validate()
+    assert validator.calls == 2
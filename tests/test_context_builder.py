@@ -0,0 +1,90 @@
+import pytest
+
+from src.modules.context_builder import (
+    RAG_BLOCK_PREFIX,
+    RAG_QUESTION_MARKER,
+    ContextBuilder,
+    estimate_tokens,
+)
+
+HISTORY = [
+    {"role": "user", "content": "Where do you work?"},
+    {"role": "assistant", "content": "At ProcurA."},
+    {"role": "user", "content": "Since when?"},
+    {"role": "assistant", "content": "Since 2024."},
+]
+
+
+def build(builder, history=HISTORY, chunks=(), **kwargs):
+    return builder.build(
+        "You are a portfolio assistant.",
+        list(history),
+        "What stack do you use?",
+        list(chunks),
+        "",
+        **kwargs,
+    )
+
+
+def history_of(messages):
+    # Everything between the system prompt and the final question
+    return messages[1:-1]
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [(0, []), (1, HISTORY[-1:]), (len(HISTORY) + 5, HISTORY)],
+)
+def test_max_history_messages(limit, expected):
+    builder = ContextBuilder(default_budget=4000, max_history_messages=limit)
+
+    assert history_of(build(builder)) == expected
+
+
+def test_history_keeps_newest_turns_within_share():
+    builder = ContextBuilder(default_budget=400, history_share=0.1)
+
+    history = history_of(build(builder, history=HISTORY * 20))
+
+    assert history == HISTORY[-len(history) :]
+    assert 0 < len(history) < len(HISTORY) * 20
+
+
+def test_old_rag_blocks_are_stripped_from_history():
+    stored = f"{RAG_BLOCK_PREFIX}\nlots of chunks\n{RAG_QUESTION_MARKER}Hi?"
+    builder = ContextBuilder(default_budget=4000)
+
+    history = history_of(
+        build(builder, history=[{"role": "user", "content": stored}])
+    )
+
+    assert history == [{"role": "user", "content": "Hi?"}]
+    assert builder.stats()["rag_blocks_stripped"] == 1
+
+
+def test_chunks_fill_budget_pinned_first_then_by_score():
+    chunks = [
+        {"text": "low " * 100, "score": 0.1},
+        {"text": "high " * 80, "score": 0.9},
+        {"text": "pinned " * 57, "score": None},
+    ]
+    builder = ContextBuilder(default_budget=300, history_share=0.0)
+
+    question = build(builder, history=[], chunks=chunks)[-1]["content"]
+
+    assert "pinned" in question and "high" in question
+    assert "low" not in question
+    assert builder.stats()["chunks_dropped"] == 1
+
+
+def test_prompt_stays_within_model_budget():
+    chunks = [
+        {"text": f"chunk {i} " * 30, "score": 1 / (i + 1)} for i in range(50)
+    ]
+    builder = ContextBuilder(default_budget=4000, budgets={"small": 500})
+
+    messages = build(
+        builder, history=HISTORY * 10, chunks=chunks, model="small"
+    )
+
+    assert sum(estimate_tokens(m["content"]) for m in messages) <= 500
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+import src.modules.conversation_summarizer as conversation_summarizer
+from src.modules.conversation_summarizer import (
+    ConversationSummarizer,
+    extractive_summary,
+)
+from src.modules.simple_memory import SimpleMemory
+
+
+def conversation(turns):
+    memory = SimpleMemory(messages=[])
+    for i in range(turns):
+        memory.add_user_message(f"Question {i} about the projects you built?")
+        memory.add_assistant_message(
+            f"Answer {i} names the project. It then goes on at length "
+            "about the stack, the team and what was learned along the way."
+        )
+    return memory
+
+
+def compact(summarizer, memory, **kwargs):
+    async def scenario():
+        summarizer.schedule(memory, **kwargs)
+        await asyncio.gather(*summarizer._inflight.values())
+
+    asyncio.run(scenario())
+
+
+def test_extractive_summary_keeps_questions_and_first_sentences():
+    summary = extractive_summary(
+        "Visitor asked: Hi",
+        [
+            {"role": "user", "content": "Where do you work?"},
+            {"role": "assistant", "content": "At ProcurA. Since 2024."},
+        ],
+        max_chars=1000,
+    )
+
+    assert summary.splitlines() == [
+        "Visitor asked: Hi",
+        "Visitor asked: Where do you work?",
+        "Assistant said: At ProcurA.",
+    ]
+    assert extractive_summary(summary, [], max_chars=40) == (
+        "Assistant said: At ProcurA."
+    )
+
+
+def test_old_turns_are_folded_into_a_smaller_summary():
+    memory = conversation(8)
+    before = memory.get_messages()[-4:]
+    summarizer = ConversationSummarizer(
+        mode="extractive", keep_recent=4, compact_batch=4
+    )
+
+    compact(summarizer, memory)
+
+    # The newest compacted turns survive the size cap
+    assert memory.get_messages() == before
+    assert "Visitor asked: Question 5" in memory.get_summary()
+    assert summarizer.stats()["messages_compacted"] == 12
+    assert summarizer.stats()["bytes_reclaimed"] > 0
+
+
+def test_short_sessions_are_left_alone():
+    memory = conversation(3)
+    summarizer = ConversationSummarizer(
+        mode="extractive", keep_recent=4, compact_batch=4
+    )
+
+    compact(summarizer, memory)
+
+    assert len(memory.get_messages()) == 6
+    assert summarizer.stats()["compactions"] == 0
+
+
+def test_llm_failure_falls_back_to_extractive(monkeypatch):
+    async def failing_summary(*args):
+        raise RuntimeError("upstream down")
+
+    monkeypatch.setattr(
+        conversation_summarizer, "llm_summary", failing_summary
+    )
+    memory = conversation(8)
+    summarizer = ConversationSummarizer(
+        mode="llm", keep_recent=4, compact_batch=4
+    )
+
+    compact(
+        summarizer,
+        memory,
+        api_key="sk-test",
+        api_url="https://llm.example",
+        model="small",
+    )
+
+    assert summarizer.stats()["llm_failures"] == 1
+    assert summarizer.stats()["compactions"] == 1
+    assert "Assistant said: Answer 5 names the project." in (
+        memory.get_summary()
+    )
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ConversationSummarizer(mode="abstractive")
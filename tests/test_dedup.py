@@ -0,0 +1,161 @@
+import hashlib
+import re
+import sqlite3
+
+import numpy as np
+import pytest
+
+import src.application.rag as rag
+from src.application.rag import config
+
+STICKEARN = "Built the ad pipeline at Stickearn for outdoor campaigns"
+
+
+class WordHashEncoder:
+    """Bag-of-words vectors, so texts sharing words are similar"""
+
+    name = "test"
+
+    def encode(self, texts):
+        vectors = np.zeros((len(texts), rag.DEFAULT_VECTOR_DIM), "float32")
+        for row, text in zip(vectors, texts):
+            for word in re.findall(r"\w+", text.lower()):
+                digest = hashlib.md5(word.encode()).digest()
+                row[int.from_bytes(digest[:4], "big") % len(row)] += 1
+            row /= np.linalg.norm(row) or 1
+        return vectors
+
+
+@pytest.fixture(params=["vector", "hybrid"])
+def index(request, tmp_path, monkeypatch):
+    rag.close_sqlite_vec_pool()
+    monkeypatch.setattr(config, "sqlite_db_path", str(tmp_path / "vectors.db"))
+    monkeypatch.setattr(config, "rag_vector_storage", "float")
+    monkeypatch.setattr(config, "rag_retrieval", request.param)
+    monkeypatch.setattr(config, "rag_dedup", "exact")
+    monkeypatch.setattr(rag, "_model", WordHashEncoder())
+    rag.query_embedding_cache.clear()
+    rag.prepare_index()
+
+    rag.reindex_source(
+        "cv.pdf",
+        [STICKEARN, "Engineer at ProcurA since 2024, Present"],
+        [{"page": 1}, {"page": 2}],
+    )
+    yield
+    rag.close_sqlite_vec_pool()
+
+
+def index_project(**kwargs):
+    return rag.reindex_source(
+        "project.pdf",
+        ["I play music on weekends", STICKEARN],
+        [{"page": 1}, {"page": 3}],
+        **kwargs,
+    )
+
+
+def test_exact_duplicate_found_in_its_own_source(index):
+    assert index_project()["skipped"] == 1
+
+    results = rag.search_chunks("Stickearn", 2, sources=["project.pdf"])
+
+    assert results[0]["text"] == STICKEARN
+    assert results[0]["source"] == "project.pdf"
+    assert results[0]["page"] == 3
+    assert {r["source"] for r in results} == {"project.pdf"}
+
+
+def test_duplicate_page_filter(index):
+    index_project()
+
+    results = rag.search_chunks(
+        "Stickearn", 2, sources=["project.pdf"], pages=(3, 3)
+    )
+
+    assert [(r["source"], r["page"]) for r in results] == [("project.pdf", 3)]
+    assert rag.search_chunks("Stickearn", 2, pages=(2, 2))[0]["page"] == 2
+
+
+def test_unscoped_search_returns_kept_copy_once(index):
+    index_project()
+
+    results = rag.search_chunks("Stickearn", 3)
+
+    assert [r["source"] for r in results if r["text"] == STICKEARN] == [
+        "cv.pdf"
+    ]
+
+
+def test_duplicate_restored_when_kept_copy_deleted(index):
+    index_project()
+
+    result = rag.reindex_source("cv.pdf", ["Unrelated"], [{"page": 1}])
+
+    assert result["restored"] == 1
+    with rag.get_sqlite_vec_pool().reader() as client:
+        assert client.execute(
+            "SELECT source FROM chunks WHERE text = ?", (STICKEARN,)
+        ).fetchall() == [("project.pdf",)]
+        assert client.execute(
+            "SELECT count(*) FROM chunk_duplicates"
+        ).fetchone() == (0,)
+    results = rag.search_chunks("Stickearn", 1, sources=["project.pdf"])
+    assert results[0]["text"] == STICKEARN
+    assert results[0]["page"] == 3
+
+
+def test_near_duplicate_found_in_its_own_source(index, monkeypatch):
+    monkeypatch.setattr(config, "rag_dedup", "near")
+    monkeypatch.setattr(config, "rag_dedup_threshold", "0.8")
+    near_copy = STICKEARN + " in 2021"
+    chunks = ["I play music on weekends", near_copy]
+
+    metadata = [{"page": 1}, {"page": 3}]
+    written = rag.embed_new_chunks("project.pdf", chunks, metadata)
+    result = rag.reindex_source(
+        "project.pdf", chunks, metadata, written=written
+    )
+
+    assert written["merged"] == result["merged"] == 1
+    assert result["added"] == 1 and result["unchanged"] == 0
+    results = rag.search_chunks("Stickearn", 1, sources=["project.pdf"])
+    assert results[0]["text"] == near_copy
+    assert results[0]["source"] == "project.pdf"
+
+
+def test_pinned_duplicate_found_in_its_own_source(index):
+    rag.reindex_source(
+        "project.pdf",
+        ["Engineer at ProcurA since 2024, Present"],
+        [{"page": 5}],
+    )
+
+    pinned = rag.pinned_chunks.apply("what do you do now", [], ["project.pdf"])
+    unscoped = rag.pinned_chunks.apply("what do you do now", [])
+
+    assert [(c["source"], c["page"]) for c in pinned] == [("project.pdf", 5)]
+    assert [(c["source"], c["page"]) for c in unscoped] == [("cv.pdf", 2)]
+
+
+def test_many_duplicates_stay_within_bound_variable_limit(index):
+    chunks = [f"Stickearn campaign number {i}" for i in range(20)]
+    metadata = [{"page": i + 1} for i in range(20)]
+    rag.reindex_source("other.pdf", chunks, metadata)
+    rag.reindex_source("project.pdf", chunks, metadata)
+    query_vec = rag.embed_query("Stickearn campaign")
+
+    with rag.get_sqlite_vec_pool().reader() as client:
+        limit = client.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 8)
+        try:
+            vector = rag._vector_candidates(
+                client, query_vec, 5, sources=["project.pdf"]
+            )
+            lexical = rag._lexical_candidates(
+                client, "Stickearn campaign", 5, sources=["project.pdf"]
+            )
+        finally:
+            client.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+    assert len(vector) == 5
+    assert {row[2] for row in vector + lexical} == {"project.pdf"}
@@ -0,0 +1,73 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.modules.bounded_executor import BoundedExecutor
+from src.modules.embedding_batcher import EmbeddingBatcher
+
+
+class Encoder:
+    """Encodes a text as its length and records each batch"""
+
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(list(texts))
+        if self.fail:
+            raise RuntimeError("model not loaded")
+        return np.array([[len(text)] for text in texts], dtype="float32")
+
+
+@pytest.fixture
+def executor():
+    executor = BoundedExecutor(1, name="test-embed")
+    yield executor
+    executor.shutdown()
+
+
+def embed_all(batcher, texts):
+    async def scenario():
+        try:
+            return await asyncio.gather(
+                *(batcher.embed(text) for text in texts),
+                return_exceptions=True,
+            )
+        finally:
+            await batcher.stop()
+
+    return asyncio.run(scenario())
+
+
+def test_concurrent_queries_share_one_encode(executor):
+    encoder = Encoder()
+    batcher = EmbeddingBatcher(encoder, executor, max_wait_ms=50)
+    texts = ["a", "bb", "ccc", "dddd"]
+
+    vectors = embed_all(batcher, texts)
+
+    assert encoder.batches == [texts]
+    assert [int(v[0]) for v in vectors] == [1, 2, 3, 4]
+    assert batcher.stats()["batch_size"]["count"] == 1
+
+
+def test_batches_are_capped_at_max_batch_size(executor):
+    encoder = Encoder()
+    batcher = EmbeddingBatcher(
+        encoder, executor, max_batch_size=2, max_wait_ms=50
+    )
+
+    vectors = embed_all(batcher, ["a", "bb", "ccc", "dddd", "eeeee"])
+
+    assert [len(batch) for batch in encoder.batches] == [2, 2, 1]
+    assert [int(v[0]) for v in vectors] == [1, 2, 3, 4, 5]
+
+
+def test_encode_failure_reaches_every_caller_of_the_batch(executor):
+    batcher = EmbeddingBatcher(Encoder(fail=True), executor, max_wait_ms=50)
+
+    results = embed_all(batcher, ["a", "bb"])
+
+    assert all(isinstance(r, RuntimeError) for r in results)
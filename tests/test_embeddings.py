@@ -0,0 +1,37 @@
+import asyncio
+
+import numpy as np
+
+import src.application.rag as rag
+
+
+class ListEncoder:
+    """A backend that answers with float64 lists, unlike the real ones"""
+
+    name = "test"
+
+    def encode(self, texts):
+        return [
+            [float(len(text)), 1.0] + [0.0] * (rag.DEFAULT_VECTOR_DIM - 2)
+            for text in texts
+        ]
+
+
+def test_every_path_encodes_the_same_way(monkeypatch):
+    monkeypatch.setattr(rag, "_model", ListEncoder())
+    rag.query_embedding_cache.clear()
+
+    async def batched():
+        try:
+            return await rag.aembed_query("Where do you work?")
+        finally:
+            await rag.stop_embedding_batcher()
+
+    direct = rag.embed_query("Where do you work?")
+    rag.query_embedding_cache.clear()
+    through_batcher = asyncio.run(batched())
+    chunk = rag.get_embedding(["where do you work?"])[0]
+
+    for vector in (direct, through_batcher, chunk):
+        assert vector.dtype == np.float32
+        np.testing.assert_array_equal(vector, direct)
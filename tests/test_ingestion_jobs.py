@@ -0,0 +1,117 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.modules.ingestion_jobs import IngestionJobs, IngestionQueueFull
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """Two processes' views of one job database"""
+    db_path = str(tmp_path / "jobs.db")
+    accepting = IngestionJobs(db_path, max_jobs=2)
+    polling = IngestionJobs(db_path, max_jobs=2)
+    yield accepting, polling
+    accepting.store.close()
+    polling.store.close()
+
+
+async def wait_for(jobs, job_id, status):
+    for _ in range(500):
+        job = jobs.get(job_id)
+        if job is not None and job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job never reached {status}: {job}")
+
+
+def test_other_worker_sees_status_and_result(workers):
+    accepting, polling = workers
+    release = threading.Event()
+
+    def extract(payload, progress):
+        progress(1, 2)
+        release.wait(5)
+        return f"{payload} extracted"
+
+    def index(text, progress):
+        return {"indexed": text}
+
+    async def scenario():
+        job = accepting.submit(
+            "cv.pdf", [("extract", extract), ("index", index)], "cv"
+        )
+        assert polling.get(job.id)["status"] == "queued"
+        running = await wait_for(polling, job.id, "running")
+        release.set()
+        done = await wait_for(polling, job.id, "done")
+        await accepting.stop()
+        return running, done
+
+    running, done = asyncio.run(scenario())
+
+    assert running["stage"] == "extract"
+    assert done["result"] == {"indexed": "cv extracted"}
+    assert set(done["timings_ms"]) == {"extract", "index"}
+
+
+def test_failure_is_reported_to_other_workers(workers):
+    accepting, polling = workers
+
+    def extract(payload, progress):
+        raise ValueError("Not a readable PDF")
+
+    async def scenario():
+        job = accepting.submit("cv.pdf", [("extract", extract)], "cv")
+        failed = await wait_for(polling, job.id, "failed")
+        await accepting.stop()
+        return failed
+
+    failed = asyncio.run(scenario())
+
+    assert failed["error"] == "Not a readable PDF"
+    assert failed["stage"] == "extract"
+
+
+def test_only_the_newest_finished_jobs_are_kept(workers):
+    accepting, polling = workers
+
+    async def scenario():
+        ids = []
+        for name in ("a", "b", "c"):
+            job = accepting.submit(name, [("noop", lambda v, p: v)], name)
+            await wait_for(polling, job.id, "done")
+            ids.append(job.id)
+        await accepting.stop()
+        return ids
+
+    first, *rest = asyncio.run(scenario())
+
+    assert polling.get(first) is None
+    assert all(polling.get(job_id) for job_id in rest)
+
+
+def test_full_queue_rejects_and_stop_discards_pending(tmp_path):
+    jobs = IngestionJobs(str(tmp_path / "jobs.db"), max_pending=1)
+    release = threading.Event()
+    discarded = []
+
+    def block(payload, progress):
+        release.wait(5)
+
+    async def scenario():
+        running = jobs.submit("a", [("block", block)], "a")
+        await wait_for(jobs, running.id, "running")
+        queued = jobs.submit("b", [("block", block)], "b", discarded.append)
+        with pytest.raises(IngestionQueueFull):
+            jobs.submit("c", [("block", block)], "c")
+        release.set()
+        await jobs.stop()
+        return queued
+
+    queued = asyncio.run(scenario())
+
+    assert discarded == ["b"]
+    assert jobs.get(queued.id)["error"] == "cancelled at shutdown"
+    jobs.store.close()
@@ -0,0 +1,69 @@
+import os
+import signal
+from concurrent.futures.process import BrokenProcessPool
+
+import fitz
+import pytest
+
+from src.modules.pdf_extractor import PDFExtractor, page_count
+
+
+@pytest.fixture
+def document(tmp_path):
+    path = tmp_path / "cv.pdf"
+    doc = fitz.open()
+    for i in range(6):
+        doc.new_page().insert_text((72, 72), f"Page number {i + 1}")
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+@pytest.fixture
+def extractor():
+    extractor = PDFExtractor(
+        processes=2, pages_per_shard=2, min_parallel_pages=4
+    )
+    yield extractor
+    extractor.shutdown()
+
+
+def texts(extractor, path, **kwargs):
+    return [
+        (number, text.strip())
+        for number, text in extractor.iter_pages(path, **kwargs)
+    ]
+
+
+EXPECTED = [(i, f"Page number {i}") for i in range(1, 7)]
+
+
+def test_pages_come_back_in_order_with_progress(extractor, document):
+    progress = []
+
+    pages = texts(extractor, document, progress=lambda *p: progress.append(p))
+
+    assert pages == EXPECTED
+    assert progress == [(2, 6), (4, 6), (6, 6)]
+    assert extractor.stats()["parallel_documents"] == 1
+    assert page_count(document) == 6
+
+
+def test_small_documents_skip_the_pool(document):
+    extractor = PDFExtractor(processes=2, min_parallel_pages=10)
+
+    assert texts(extractor, document) == EXPECTED
+    assert not extractor.stats()["pool_started"]
+
+
+def test_pool_is_replaced_after_a_worker_crash(extractor, document):
+    assert texts(extractor, document) == EXPECTED
+    broken = extractor._pool
+    for pid in list(broken._processes):
+        os.kill(pid, signal.SIGKILL)
+
+    with pytest.raises(BrokenProcessPool):
+        texts(extractor, document)
+
+    assert texts(extractor, document) == EXPECTED
+    assert extractor._pool is not broken
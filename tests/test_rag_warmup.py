@@ -0,0 +1,55 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+import src.application.rag as rag
+from src.application.rag import config
+
+
+class ConstantEncoder:
+    name = "test"
+
+    def encode(self, texts):
+        return np.ones((len(texts), rag.DEFAULT_VECTOR_DIM), "float32")
+
+
+@pytest.fixture
+def fresh_rag(tmp_path, monkeypatch):
+    rag.close_sqlite_vec_pool()
+    monkeypatch.setattr(config, "sqlite_db_path", str(tmp_path / "vectors.db"))
+    monkeypatch.setattr(rag, "_model", None)
+    monkeypatch.setattr(rag, "_rag_warm", False)
+    monkeypatch.setattr(rag, "_warmup_task", None)
+    monkeypatch.setattr(rag, "_warmup_error", None)
+    yield
+    rag.close_sqlite_vec_pool()
+
+
+async def probe():
+    """What /readyz does: start the warmup, never await it"""
+    task = rag.start_rag_warmup()
+    while not task.done():
+        await asyncio.sleep(0.01)
+    return rag.rag_readiness()
+
+
+def test_failed_warmup_is_reported_then_retried(fresh_rag, monkeypatch):
+    def unavailable(*args, **kwargs):
+        raise OSError("model download failed")
+
+    monkeypatch.setattr(rag, "create_embedding_backend", unavailable)
+
+    async def scenario():
+        failed = await probe()
+        monkeypatch.setattr(
+            rag, "create_embedding_backend", lambda *a, **k: ConstantEncoder()
+        )
+        return failed, await probe()
+
+    failed, ready = asyncio.run(scenario())
+
+    assert not failed["ready"]
+    assert failed["warmup_error"] == "OSError: model download failed"
+    assert ready["ready"]
+    assert ready["warmup_error"] is None
@@ -0,0 +1,56 @@
+import numpy as np
+
+from src.modules.response_cache import SemanticResponseCache
+
+PROVIDER = "https://llm.example/v1"
+
+
+def vector(*values):
+    return np.array(values, dtype="float32")
+
+
+def cache_with_answer(**kwargs):
+    cache = SemanticResponseCache(threshold=0.95, **kwargs)
+    # A lookup records the current index version
+    assert cache.get(vector(1, 0, 0), "model", PROVIDER, 1) is None
+    cache.put(vector(1, 0, 0), "model", PROVIDER, 1, "At ProcurA.", 800.0)
+    return cache
+
+
+def test_similar_question_is_served_from_cache():
+    cache = cache_with_answer()
+
+    assert cache.get(vector(1, 0.1, 0), "model", PROVIDER, 1) == "At ProcurA."
+    assert cache.stats()["saved_ms_total"] == 800.0
+
+
+def test_question_below_threshold_misses():
+    cache = cache_with_answer()
+
+    # cosine ~0.89
+    assert cache.get(vector(1, 0.5, 0), "model", PROVIDER, 1) is None
+
+
+def test_other_model_or_provider_misses():
+    cache = cache_with_answer()
+
+    assert cache.get(vector(1, 0, 0), "other", PROVIDER, 1) is None
+    assert cache.get(vector(1, 0, 0), "model", "https://other/v1", 1) is None
+
+
+def test_new_index_version_invalidates():
+    cache = cache_with_answer()
+
+    assert cache.get(vector(1, 0, 0), "model", PROVIDER, 2) is None
+    assert cache.get(vector(1, 0, 0), "model", PROVIDER, 1) is None
+    assert cache.stats()["invalidations"] == 1
+
+
+def test_answer_for_an_old_index_version_is_not_stored():
+    cache = cache_with_answer()
+    cache.get(vector(0, 1, 0), "model", PROVIDER, 2)
+
+    cache.put(vector(0, 1, 0), "model", PROVIDER, 1, "Stale.", 500.0)
+
+    assert cache.get(vector(0, 1, 0), "model", PROVIDER, 2) is None
+    assert cache.stats()["stale_puts"] == 1
@@ -0,0 +1,108 @@
+import pytest
+
+from src.modules.session_backends import (
+    LocalRedis,
+    RedisSessionBackend,
+    SQLiteSessionBackend,
+)
+from src.modules.session_store import SessionStore
+
+TURNS = [
+    {"role": "user", "content": "Where do you work?"},
+    {"role": "assistant", "content": "At ProcurA."},
+    {"role": "user", "content": "Since when?"},
+]
+
+
+class RoundTrips:
+    """Counts the commands sent to a client; a pipeline is one"""
+
+    def __init__(self, client):
+        self.client = client
+        self.count = 0
+
+    def __getattr__(self, name):
+        self.count += 1
+        return getattr(self.client, name)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        backend = SessionStore()
+    elif request.param == "sqlite":
+        backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    else:
+        backend = RedisSessionBackend(LocalRedis())
+    yield backend
+    backend.close()
+
+
+def fill(backend, session_id="s1"):
+    memory, created = backend.get_or_create(session_id)
+    assert created
+    for turn in TURNS:
+        memory._append(turn)
+    return memory
+
+
+def test_history_round_trips(backend):
+    fill(backend)
+
+    memory, created = backend.get_or_create("s1")
+
+    assert not created
+    assert memory.get_messages() == TURNS
+    assert backend.get("unknown") is None
+
+
+@pytest.mark.parametrize(
+    "limit, expected",
+    [(0, []), (-1, []), (2, TURNS[-2:]), (len(TURNS) + 5, TURNS)],
+)
+def test_recent_messages_limit(backend, limit, expected):
+    memory = fill(backend)
+
+    assert memory.get_recent_messages(limit) == expected
+
+
+def test_compact_keeps_newest_turns(backend):
+    memory = fill(backend)
+
+    memory.compact("They work at ProcurA.", 2)
+
+    assert memory.get_messages() == TURNS[2:]
+    assert backend.get("s1").get_summary() == "They work at ProcurA."
+
+
+def test_sqlite_read_does_not_write(tmp_path):
+    backend = SQLiteSessionBackend(str(tmp_path / "sessions.db"))
+    fill(backend)
+    writes = backend.pool.stats()["writes"]
+
+    for _ in range(5):
+        backend.get("s1").get_messages()
+
+    assert backend.pool.stats()["writes"] == writes
+    backend.close()
+
+
+def test_redis_get_is_one_round_trip():
+    client = RoundTrips(LocalRedis())
+    backend = RedisSessionBackend(client)
+    fill(backend)
+    client.count = 0
+
+    assert backend.get("s1") is not None
+    assert client.count == 1
+
+
+def test_redis_expired_session_starts_empty():
+    client = LocalRedis()
+    backend = RedisSessionBackend(client, idle_ttl=0)
+    fill(backend)
+
+    memory, created = backend.get_or_create("s1")
+
+    assert created
+    assert memory.get_messages() == []
@@ -0,0 +1,70 @@
+import pytest
+
+import src.modules.session_store as session_store
+from src.modules.session_store import SessionStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(session_store.time, "monotonic", clock)
+    return clock
+
+
+def test_least_recently_used_session_is_evicted(clock):
+    store = SessionStore(max_entries=2)
+    store.get_or_create("a")
+    store.get_or_create("b")
+    store.get("a")
+
+    store.get_or_create("c")
+
+    assert "a" in store and "c" in store
+    assert "b" not in store
+    assert store.stats()["evicted_lru"] == 1
+
+
+def test_idle_session_expires(clock):
+    store = SessionStore(idle_ttl=60)
+    memory, _ = store.get_or_create("a")
+    memory.add_user_message("Hi")
+
+    clock.now += 59
+    assert store.get("a") is memory
+    clock.now += 60
+    memory, created = store.get_or_create("a")
+
+    assert created
+    assert memory.get_messages() == []
+    assert store.stats()["evicted_ttl"] == 1
+
+
+def test_byte_cap_evicts_oldest_sessions(clock):
+    store = SessionStore(max_bytes=100)
+    for session_id in ("a", "b", "c"):
+        memory, _ = store.get_or_create(session_id)
+        memory.add_user_message("x" * 40)
+        # Growth is accounted for on the session's next access
+        store.get(session_id)
+
+    stats = store.stats()
+    assert "a" not in store
+    assert "c" in store
+    assert stats["bytes"] <= 100
+    assert stats["evicted_lru"] == 1
+
+
+def test_active_session_is_kept_over_the_cap(clock):
+    store = SessionStore(max_bytes=10)
+    memory, _ = store.get_or_create("a")
+    memory.add_user_message("x" * 40)
+
+    assert store.get("a") is memory
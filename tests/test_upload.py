@@ -0,0 +1,134 @@
+import asyncio
+import importlib
+import os
+
+import fitz
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.configs.configs import config
+
+
+@pytest.fixture
+def upload(tmp_path, monkeypatch):
+    # The route module opens its job store on import
+    monkeypatch.setattr(
+        config, "ingest_job_db_path", str(tmp_path / "jobs.db")
+    )
+    monkeypatch.setattr(config, "upload_max_bytes", "4096")
+    monkeypatch.setattr(config, "upload_max_pages", "2")
+    upload = importlib.import_module("src.application.api.upload")
+    # Only the upload limits are under test: the job just removes the file
+    monkeypatch.setattr(
+        upload,
+        "ingestion_stages",
+        lambda filename, content_type: [
+            ("discard", lambda path, progress: os.unlink(path))
+        ],
+    )
+    return upload
+
+
+@pytest.fixture
+def send(upload):
+    """Run requests against the upload routes, then stop the job workers"""
+    app = FastAPI()
+    app.include_router(upload.router, prefix="/upload")
+
+    def send(*requests):
+        async def scenario():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://test"
+            ) as client:
+                try:
+                    return [
+                        await client.request(method, url, **kwargs)
+                        for method, url, kwargs in requests
+                    ]
+                finally:
+                    await upload.ingestion_jobs.stop()
+
+        return asyncio.run(scenario())
+
+    return send
+
+
+def pdf(pages):
+    document = fitz.open()
+    for i in range(pages):
+        document.new_page().insert_text((72, 72), f"Page {i}")
+    data = document.tobytes()
+    document.close()
+    return data
+
+
+def upload_file(content, filename="doc.txt"):
+    return ("POST", "/upload/", {"files": {"file": (filename, content)}})
+
+
+def status(send, *requests):
+    return [response.status_code for response in send(*requests)]
+
+
+def test_text_upload_is_queued(send, upload):
+    (response,) = send(upload_file(b"Engineer at ProcurA since 2024"))
+
+    assert response.status_code == 202
+    job = upload.ingestion_jobs.get(response.json()["job_id"])
+    assert job["file"] == "doc.txt"
+
+
+def test_oversized_upload_is_rejected(send):
+    assert status(send, upload_file(b"x" * 5000)) == [413]
+
+
+def test_oversized_chunked_upload_is_rejected(send):
+    body = (
+        b"--b\r\nContent-Disposition: form-data; name=file; "
+        b'filename="doc.txt"\r\n\r\n' + b"x" * 5000 + b"\r\n--b--\r\n"
+    )
+
+    async def chunks():
+        # No Content-Length: the limit applies while the body streams in
+        for start in range(0, len(body), 1024):
+            yield body[start : start + 1024]
+
+    request = (
+        "POST",
+        "/upload/",
+        {
+            "content": chunks(),
+            "headers": {"content-type": "multipart/form-data; boundary=b"},
+        },
+    )
+
+    assert status(send, request) == [413]
+
+
+def test_binary_upload_is_unsupported(send):
+    # The type comes from the bytes, whatever the client names the file
+    png = b"\x89PNG\r\n\x1a\n\x00\x00"
+
+    assert status(send, upload_file(png, filename="cv.txt")) == [415]
+
+
+def test_missing_file_field(send):
+    request = ("POST", "/upload/", {"files": {"other": ("a.txt", b"hi")}})
+
+    assert status(send, request) == [422]
+
+
+def test_unreadable_pdf(send):
+    truncated = b"%PDF-1.7 truncated"
+
+    assert status(send, upload_file(truncated, filename="cv.pdf")) == [422]
+
+
+def test_pdf_page_limit(send):
+    assert status(
+        send,
+        upload_file(pdf(2), filename="cv.pdf"),
+        upload_file(pdf(3), filename="cv.pdf"),
+    ) == [202, 413]